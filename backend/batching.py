@@ -0,0 +1,164 @@
+"""Micro-batching of concurrent prediction requests.
+
+This module coalesces single-row predictions that arrive within a short window
+into one vectorized model call and fans the results back out to the callers.
+"""
+
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from typing import Callable
+
+from starlette.concurrency import run_in_threadpool
+
+PREDICTION_BATCH_MAX_SIZE = int(os.getenv('PREDICTION_BATCH_MAX_SIZE', '64'))
+PREDICTION_BATCH_WINDOW_MS = float(os.getenv('PREDICTION_BATCH_WINDOW_MS', '2'))
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    """Collect pending rows and evaluate them together.
+
+    A batch is flushed when it reaches max_batch_size rows or when the oldest row
+    has waited window_ms milliseconds, whichever comes first. All state is only
+    touched from the event loop thread, so no locking is needed.
+
+    Attributes:
+        predict_batch (Callable[[list[tuple]], list]): Vectorized predict function returning
+            one result per row.
+        max_batch_size (int): Number of rows that triggers an immediate flush.
+        window (float): Maximum time in seconds a row waits for companions.
+
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[list[tuple]], list],
+        max_batch_size: int = PREDICTION_BATCH_MAX_SIZE,
+        window_ms: float = PREDICTION_BATCH_WINDOW_MS,
+    ):
+        """Initialize an idle batcher.
+
+        Args:
+            predict_batch (Callable[[list[tuple]], list]): Function evaluating a batch of
+                rows, run in the threadpool so it does not block the event loop.
+            max_batch_size (int): Number of rows that triggers an immediate flush.
+            window_ms (float): Maximum time in milliseconds a row waits for companions.
+
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000
+        self._pending = []
+        self._timer = None
+        # the event loop only keeps weak references to tasks, so running batches are held here
+        self._tasks = set()
+        self._batches = 0
+        self._rows = 0
+        self._max_batch = 0
+        # per-bucket counts, the last slot counts batches above the largest bound (+Inf)
+        self._size_buckets = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self._queue_delay_total = 0.0
+        self._queue_delay_max = 0.0
+
+    async def submit(self, row: tuple):
+        """Queue a single row and wait for its prediction.
+
+        Args:
+            row (tuple): Feature tuple to evaluate.
+
+        Returns:
+            The result predict_batch produced for the row.
+
+        Raises:
+            Exception: Whatever predict_batch raised for the batch containing the row.
+
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        """Hand the pending rows to a background task and reset the window."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def close(self):
+        """Flush the pending rows and wait for every running batch to finish."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    async def _run(self, batch: list):
+        """Evaluate one batch and resolve the waiting futures.
+
+        Args:
+            batch (list): Tuples of (row, future, enqueued_at).
+
+        """
+        started = time.perf_counter()
+        self._record(batch, started)
+        try:
+            predictions = await run_in_threadpool(self.predict_batch, [row for row, _, _ in batch])
+        except Exception as ex:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(ex)
+            return
+
+        for (_, future, _), prediction in zip(batch, predictions):
+            if not future.done():
+                future.set_result(prediction)
+
+    def _record(self, batch: list, started: float):
+        """Update batch size and queue delay statistics.
+
+        Args:
+            batch (list): Tuples of (row, future, enqueued_at).
+            started (float): perf_counter value when the batch started evaluating.
+
+        """
+        size = len(batch)
+        self._batches += 1
+        self._rows += size
+        self._max_batch = max(self._max_batch, size)
+        self._size_buckets[bisect_left(BATCH_SIZE_BUCKETS, size)] += 1
+        for _, _, enqueued_at in batch:
+            delay = started - enqueued_at
+            self._queue_delay_total += delay
+            self._queue_delay_max = max(self._queue_delay_max, delay)
+
+    def stats(self) -> dict:
+        """Return batch size and queue delay statistics.
+
+        Returns:
+            dict: Dictionary with batch and row counts, batch size distribution
+                (counts per upper bound, with '+Inf' for larger batches) and mean/max
+                queue delay in milliseconds.
+
+        """
+        return {
+            'batches': self._batches,
+            'rows': self._rows,
+            'pending': len(self._pending),
+            'mean_batch_size': self._rows / self._batches if self._batches else 0.0,
+            'max_batch_size': self._max_batch,
+            'batch_size_buckets': dict(zip(BATCH_SIZE_BUCKETS + ('+Inf',), self._size_buckets)),
+            'mean_queue_delay_ms': self._queue_delay_total / self._rows * 1000
+            if self._rows
+            else 0.0,
+            'max_queue_delay_ms': self._queue_delay_max * 1000,
+        }
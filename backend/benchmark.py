@@ -0,0 +1,344 @@
+"""Benchmarks for the prediction backend.
+
+This module provides command line benchmarks for serving performance.
+
+.. code-block:: bash
+
+    python benchmark.py workers --workers 8
+    python benchmark.py workers --workers 8 --no-forest
+    python benchmark.py latency --rows 1 --repeat 2000
+    python benchmark.py training --cores 1 4 0
+
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from collections import Counter
+
+import numpy as np
+
+PREDICT_PARAMS = {
+    'age': 25,
+    'gender': 'male',
+    'backsq': 315,
+    'deadlift': 405,
+    'snatch': 185,
+    'candj': 225,
+    'pullups': 30,
+    'weight': 180,
+    'height': 70,
+    'run400': 75,
+    'fran': 240,
+    'helen': 520,
+    'grace': 195,
+}
+
+
+def _predict_query(index: int) -> str:
+    """Build the query string of a distinct prediction request.
+
+    Every index gets its own back squat, deadlift and Fran values, so no request
+    is answered from a worker's prediction cache.
+
+    Args:
+        index (int): Request number.
+
+    Returns:
+        str: URL-encoded prediction parameters.
+
+    """
+    params = dict(
+        PREDICT_PARAMS,
+        age=18 + index % 40,
+        backsq=PREDICT_PARAMS['backsq'] + index,
+        deadlift=PREDICT_PARAMS['deadlift'] + index % 97,
+        fran=PREDICT_PARAMS['fran'] + index % 61,
+    )
+    return urllib.parse.urlencode(params)
+
+
+def _read_memory_kb(pid: int) -> tuple[int, int]:
+    """Read resident and proportional set size of a process from /proc.
+
+    PSS divides shared pages between the processes that map them, so it shows how
+    much memory a worker really costs when the model pages are shared.
+
+    Args:
+        pid (int): Process id.
+
+    Returns:
+        tuple[int, int]: RSS and PSS in kilobytes.
+
+    """
+    rss = pss = 0
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Rss:'):
+                rss = int(line.split()[1])
+            elif line.startswith('Pss:'):
+                pss = int(line.split()[1])
+    return rss, pss
+
+
+def _child_pids(pid: int) -> list[int]:
+    """List the direct children of a process.
+
+    Args:
+        pid (int): Parent process id.
+
+    Returns:
+        list[int]: Child process ids.
+
+    """
+    children = []
+    # processes started from other threads (e.g. loky's executor) are listed per thread
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as f:
+            children.extend(int(child) for child in f.read().split())
+    return children
+
+
+def benchmark_workers(
+    workers: int, port: int, use_forest: bool, requests_per_worker: int, startup_timeout: float
+):
+    """Start uvicorn with several workers and report cold start time, latency and memory.
+
+    Every request has different features, so predictions come from the model and not
+    from the prediction cache. The X-Worker-Pid response header records which worker
+    served each request. Cold start is measured from process launch until the last
+    worker answered its first prediction, which includes loading the model artifact;
+    requests keep being sent until every worker answered or startup_timeout passed.
+
+    The server's stderr is kept and printed if it exits early, in which case the
+    benchmark exits with the server's exit code.
+
+    Args:
+        workers (int): Number of uvicorn worker processes.
+        port (int): Port to bind the server to.
+        use_forest (bool): Serve from the memory-mapped flat forest instead of the pickled model.
+        requests_per_worker (int): Prediction requests to send per worker before sampling memory.
+        startup_timeout (float): Seconds to wait for a prediction, and for every worker
+            to answer, before giving up.
+
+    """
+    env = dict(os.environ, PREDICT_ENGINE='forest' if use_forest else 'sklearn')
+    server_log = tempfile.TemporaryFile()
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            '-m',
+            'uvicorn',
+            'routes:app',
+            '--port',
+            str(port),
+            '--workers',
+            str(workers),
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=server_log,
+    )
+    url = f'http://127.0.0.1:{port}/api/predict/run5k'
+    served_by = Counter()
+    timings = []
+    cold_start = None
+    deadline = start + startup_timeout
+    try:
+        while len(timings) < workers * requests_per_worker or (
+            len(served_by) < workers and time.perf_counter() - start < startup_timeout
+        ):
+            request_start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(
+                    f'{url}?{_predict_query(len(timings))}', timeout=30
+                ) as response:
+                    response.read()
+                    pid = int(response.headers['X-Worker-Pid'])
+            except OSError:
+                if server.poll() is not None:
+                    server_log.seek(0)
+                    sys.stderr.write(server_log.read().decode(errors='replace'))
+                    print(f'Server exited with code {server.returncode}', file=sys.stderr)
+                    sys.exit(server.returncode or 1)
+                if time.perf_counter() > deadline:
+                    sys.exit(f'No prediction answered within {startup_timeout:.0f}s')
+                time.sleep(0.05)
+                continue
+            deadline = time.perf_counter() + startup_timeout
+            timings.append(time.perf_counter() - request_start)
+            if pid not in served_by:
+                cold_start = time.perf_counter() - start
+            served_by[pid] += 1
+
+        print(f'Artifact: {"flat forest (mmap)" if use_forest else "pickled model"}')
+        print(f'Cold start until {len(served_by)} of {workers} workers answered: {cold_start:.2f}s')
+        p50, p99 = np.percentile(timings, [50, 99]) * 1000
+        print(f'Latency over {len(timings)} uncached requests: p50={p50:.2f}ms p99={p99:.2f}ms')
+        total_rss = total_pss = 0
+        for pid in _child_pids(server.pid):
+            rss, pss = _read_memory_kb(pid)
+            total_rss += rss
+            total_pss += pss
+            print(
+                f'  worker {pid}: requests={served_by[pid]}, '
+                f'RSS={rss / 1024:.1f} MB, PSS={pss / 1024:.1f} MB'
+            )
+        print(f'Total: RSS={total_rss / 1024:.1f} MB, PSS={total_pss / 1024:.1f} MB')
+    finally:
+        server.send_signal(signal.SIGINT)
+        server.wait()
+        server_log.close()
+
+
+def _tree_memory_kb(pid: int) -> tuple[int, int]:
+    """Sum resident and proportional set size over a process and its descendants.
+
+    Args:
+        pid (int): Root process id.
+
+    Returns:
+        tuple[int, int]: RSS and PSS in kilobytes; zero for processes that already exited.
+
+    """
+    try:
+        rss, pss = _read_memory_kb(pid)
+        children = _child_pids(pid)
+    except (FileNotFoundError, ProcessLookupError):
+        return 0, 0
+    for child in children:
+        child_rss, child_pss = _tree_memory_kb(child)
+        rss += child_rss
+        pss += child_pss
+    return rss, pss
+
+
+def benchmark_training(cores: list[int], search: str, interval: float):
+    """Run the trainer's search stage with several worker counts and report peak memory.
+
+    The load and clean stages run once first, so every measured run starts from the
+    same checkpoint. Memory is sampled over the trainer and all of its workers; PSS
+    counts the shared training memmap once instead of once per worker.
+
+    Args:
+        cores (list[int]): Worker counts to measure; 0 means every core.
+        search (str): Search strategy passed to the trainer.
+        interval (float): Seconds between memory samples.
+
+    """
+    subprocess.run([sys.executable, 'trainer.py', 'load', 'clean'], check=True)
+    for count in cores:
+        n_jobs = count or os.cpu_count()
+        start = time.perf_counter()
+        trainer = subprocess.Popen(
+            [sys.executable, 'trainer.py', 'search', '--search', search, '--n-jobs', str(n_jobs)],
+            stdout=subprocess.DEVNULL,
+        )
+        peak_rss = peak_pss = 0
+        while trainer.poll() is None:
+            rss, pss = _tree_memory_kb(trainer.pid)
+            peak_rss, peak_pss = max(peak_rss, rss), max(peak_pss, pss)
+            time.sleep(interval)
+        wall = time.perf_counter() - start
+        status = 'ok' if trainer.returncode == 0 else f'exit {trainer.returncode}'
+        print(
+            f'{n_jobs:3d} workers: wall={wall:.1f}s peak RSS={peak_rss / 1024:.1f} MB '
+            f'peak PSS={peak_pss / 1024:.1f} MB ({status})'
+        )
+
+
+def benchmark_latency(version: str | None, rows: int, repeat: int):
+    """Compare prediction latency of the sklearn model and the flat forest evaluator.
+
+    Parity is reported as the largest absolute difference from the sklearn
+    predictions on the same rows.
+
+    Args:
+        version (str | None): Registry version to benchmark. Defaults to the CURRENT version.
+        rows (int): Number of rows per predict call.
+        repeat (int): Number of timed predict calls per engine.
+
+    """
+    import registry
+
+    version = version or registry.current_version() or registry.LEGACY_VERSION
+    engines = {
+        engine: registry.load_version(version, engine=engine).model
+        for engine in ('sklearn', 'forest')
+    }
+    rng = np.random.default_rng(0)
+    X = rng.uniform(50, 600, size=(rows, 13))
+    reference = np.asarray(engines['sklearn'].predict(X))
+
+    for name, engine in engines.items():
+        max_diff = np.max(np.abs(np.asarray(engine.predict(X)) - reference))
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            engine.predict(X)
+            timings.append(time.perf_counter() - start)
+        p50, p99 = np.percentile(timings, [50, 99]) * 1e6
+        print(
+            f'{name:8s}: rows={rows} p50={p50:.1f}µs p99={p99:.1f}µs '
+            f'max diff from sklearn={max_diff:.3g}s'
+        )
+
+
+def main():
+    """Parse command line arguments and run the selected benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    workers_parser = subparsers.add_parser('workers', help='per-worker memory and cold start')
+    workers_parser.add_argument('--workers', type=int, default=8)
+    workers_parser.add_argument('--port', type=int, default=5050)
+    workers_parser.add_argument('--requests-per-worker', type=int, default=20)
+    workers_parser.add_argument(
+        '--no-forest', dest='use_forest', action='store_false', help='load the pickled model'
+    )
+    workers_parser.add_argument(
+        '--startup-timeout',
+        type=float,
+        default=120,
+        help='seconds to wait for a prediction before giving up',
+    )
+
+    latency_parser = subparsers.add_parser('latency', help='predict latency per engine')
+    latency_parser.add_argument('--version', default=None, help='registry model version')
+    latency_parser.add_argument('--rows', type=int, default=1)
+    latency_parser.add_argument('--repeat', type=int, default=2000)
+
+    training_parser = subparsers.add_parser(
+        'training', help='search wall time and peak memory per worker count'
+    )
+    training_parser.add_argument(
+        '--cores', type=int, nargs='+', default=[1, 4, 0], help='worker counts, 0 for all cores'
+    )
+    training_parser.add_argument('--search', default='grid')
+    training_parser.add_argument('--interval', type=float, default=0.2)
+
+    args = parser.parse_args()
+    if args.benchmark == 'workers':
+        benchmark_workers(
+            workers=args.workers,
+            port=args.port,
+            use_forest=args.use_forest,
+            requests_per_worker=args.requests_per_worker,
+            startup_timeout=args.startup_timeout,
+        )
+    elif args.benchmark == 'latency':
+        benchmark_latency(version=args.version, rows=args.rows, repeat=args.repeat)
+    elif args.benchmark == 'training':
+        benchmark_training(cores=args.cores, search=args.search, interval=args.interval)
+
+
+if __name__ == '__main__':
+    main()
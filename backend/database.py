@@ -4,16 +4,76 @@ This module provides functions to interact with the DuckDB database
 containing athlete information.
 """
 
+import time
 from typing import Optional
 
 import duckdb
+import metrics
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
 
+PREDICTIONS_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS predictions (
+        athlete_id BIGINT NOT NULL,
+        model_version VARCHAR NOT NULL,
+        predicted_run5k DOUBLE NOT NULL,
+        scored_at TIMESTAMP DEFAULT current_timestamp,
+        PRIMARY KEY (athlete_id, model_version)
+    )
+"""
+
+# same name as the index convert.py builds, so existing databases are left as they are
+ATHLETE_ID_INDEX_DDL = 'CREATE INDEX IF NOT EXISTS idx_athlete_id ON athletes (athlete_id)'
+EXPORT_COLUMNS = ['name', 'affiliate', 'region', 'team', 'gender']
+EXPORT_FORMATS = {'parquet': pq.write_table, 'feather': feather.write_feather}
+# stratified samples rank athletes by a seeded multiplicative hash of athlete_id; the
+# dashboard samples with the same rule (frontend/src/plot.py) so exports match it
+SAMPLE_HASH_MULTIPLIER = 2654435761
+SAMPLE_HASH_MODULUS = 2**32
+# how long init_schema waits for other worker processes holding the database file lock
+SCHEMA_LOCK_TIMEOUT_SECONDS = 30
+
+
+def init_schema(lock_timeout: float = SCHEMA_LOCK_TIMEOUT_SECONDS):
+    """Create the tables and indexes the API relies on in the athletes database.
+
+    Runs once at startup so the read and write paths never execute DDL. Worker
+    processes starting together run it at the same time, and only one process can
+    hold the database file, so the others retry until lock_timeout.
+
+    Args:
+        lock_timeout (float): Seconds to keep retrying while another process holds
+            the database file lock.
+
+    Raises:
+        duckdb.Error: If there's an error connecting to or writing to the database.
+
+    """
+    db_path = 'athletes.duckdb'
+    deadline = time.monotonic() + lock_timeout
+
+    while True:
+        try:
+            with duckdb.connect(db_path) as conn:
+                conn.execute(PREDICTIONS_TABLE_DDL)
+                conn.execute(ATHLETE_ID_INDEX_DDL)
+            return
+        except duckdb.IOException:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
 
-def get_athletes():
+
+def get_athletes(model_version: Optional[str] = None):
     """Get athlete data from the DuckDB database.
 
-    Retrieves up to 1000 athlete records from the athletes table in the DuckDB database,
-    including all columns and column names.
+    Retrieves athlete records from the athletes table in the DuckDB database,
+    including all columns and column names. Each athlete is joined with the stored
+    prediction of the given model version, adding predicted_run5k and
+    run5k_residual (actual minus predicted) columns that are NULL when unscored.
+
+    Args:
+        model_version (Optional[str]): Model version whose predictions to join. Defaults to None.
 
     Returns:
         dict: A dictionary containing:
@@ -27,9 +87,56 @@ def get_athletes():
     db_path = 'athletes.duckdb'
 
     with duckdb.connect(db_path) as conn:
-        query = 'SELECT * FROM athletes ORDER BY athlete_id DESC;'
-        result = conn.execute(query=query)
-        return {'athletes': result.fetchall(), 'columns': [col[0] for col in result.description]}
+        query = """
+            SELECT
+                a.*,
+                p.predicted_run5k,
+                a.run5k - p.predicted_run5k AS run5k_residual
+            FROM athletes a
+            LEFT JOIN predictions p
+                ON p.athlete_id = a.athlete_id AND p.model_version = ?
+            ORDER BY a.athlete_id DESC;
+        """
+        with metrics.DB_QUERY_LATENCY.time(query='get_athletes'):
+            result = conn.execute(query, [model_version])
+            athletes = result.fetchall()
+        metrics.DB_ROWS_RETURNED.observe(len(athletes), query='get_athletes')
+        return {'athletes': athletes, 'columns': [col[0] for col in result.description]}
+
+
+def get_data_version(model_version: Optional[str] = None) -> str:
+    """Get a cheap fingerprint of the data returned by get_athletes.
+
+    Athletes are only ever inserted with increasing ids, so the athlete count and
+    highest id change whenever an athlete is added. The model version and the number
+    of athletes it has scored change whenever predictions are swapped or filled in.
+
+    Args:
+        model_version (Optional[str]): Model version whose predictions get_athletes joins.
+            Defaults to None.
+
+    Returns:
+        str: Version string that changes whenever get_athletes would return new data.
+
+    Raises:
+        duckdb.Error: If there's an error connecting to or querying the database.
+
+    """
+    db_path = 'athletes.duckdb'
+
+    with duckdb.connect(db_path) as conn:
+        with metrics.DB_QUERY_LATENCY.time(query='get_data_version'):
+            athletes, max_athlete_id, scored = conn.execute(
+                """
+                SELECT
+                    count(*),
+                    max(athlete_id),
+                    (SELECT count(*) FROM predictions WHERE model_version = ?)
+                FROM athletes
+                """,
+                [model_version],
+            ).fetchone()
+    return f'{athletes}-{max_athlete_id}-{model_version}-{scored}'
 
 
 def create_athlete(
@@ -80,7 +187,7 @@ def create_athlete(
     """
     db_path = 'athletes.duckdb'
 
-    with duckdb.connect(db_path) as conn:
+    with duckdb.connect(db_path) as conn, metrics.DB_QUERY_LATENCY.time(query='create_athlete'):
         # Get next athlete_id
         result = conn.execute(
             'SELECT COALESCE(MAX(athlete_id), 0) + 1 as next_id FROM athletes'
@@ -157,8 +264,12 @@ def get_athlete(athlete_id: int) -> Optional[dict]:
     db_path = 'athletes.duckdb'
 
     with duckdb.connect(db_path) as conn:
-        result = conn.execute('SELECT * FROM athletes WHERE athlete_id = ? LIMIT 1', [athlete_id])
-        row = result.fetchone()
+        with metrics.DB_QUERY_LATENCY.time(query='get_athlete'):
+            result = conn.execute(
+                'SELECT * FROM athletes WHERE athlete_id = ? LIMIT 1', [athlete_id]
+            )
+            row = result.fetchone()
+        metrics.DB_ROWS_RETURNED.observe(0 if row is None else 1, query='get_athlete')
 
         if row is None:
             return None
@@ -166,3 +277,266 @@ def get_athlete(athlete_id: int) -> Optional[dict]:
         # Convert row to dictionary with column names as keys
         columns = [col[0] for col in result.description]
         return dict(zip(columns, row))
+
+
+def get_athlete_navigation(athlete_id: Optional[int] = None, window: int = 1) -> Optional[dict]:
+    """Get an athlete's neighbours and position in athlete_id order.
+
+    The existence check is a point lookup on the athlete_id index. Neighbours
+    come from top-N scans and the position from a count bounded by athlete_id.
+    Only ids and counts are returned, no athlete rows are transferred.
+
+    Args:
+        athlete_id (Optional[int]): Athlete to locate. Defaults to the first athlete.
+        window (int): Number of neighbours to return on each side. Defaults to 1.
+
+    Returns:
+        Optional[dict]: Dictionary with keys:
+            - athlete_id (int): The located athlete
+            - previous_id (Optional[int]): Preceding athlete_id, None for the first athlete
+            - next_id (Optional[int]): Following athlete_id, None for the last athlete
+            - previous_ids (list[int]): Up to window preceding ids, nearest first
+            - next_ids (list[int]): Up to window following ids, nearest first
+            - position (int): 1-based position of the athlete in athlete_id order
+            - total (int): Number of athletes
+        or None if the athlete (or, without athlete_id, any athlete) does not exist.
+
+    Raises:
+        duckdb.Error: If there's an error connecting to or querying the database.
+
+    """
+    db_path = 'athletes.duckdb'
+
+    with duckdb.connect(db_path) as conn:
+        with metrics.DB_QUERY_LATENCY.time(query='get_athlete_navigation'):
+            if athlete_id is None:
+                (athlete_id,) = conn.execute('SELECT min(athlete_id) FROM athletes').fetchone()
+            row = conn.execute(
+                """
+                SELECT
+                    (
+                        SELECT list(athlete_id ORDER BY athlete_id DESC) FROM (
+                            SELECT athlete_id FROM athletes WHERE athlete_id < $id
+                            ORDER BY athlete_id DESC LIMIT $window
+                        )
+                    ),
+                    (
+                        SELECT list(athlete_id ORDER BY athlete_id) FROM (
+                            SELECT athlete_id FROM athletes WHERE athlete_id > $id
+                            ORDER BY athlete_id LIMIT $window
+                        )
+                    ),
+                    (SELECT count(*) FROM athletes WHERE athlete_id <= $id),
+                    (SELECT count(*) FROM athletes)
+                FROM athletes
+                WHERE athlete_id = $id
+                LIMIT 1
+                """,
+                {'id': athlete_id, 'window': max(window, 1)},
+            ).fetchone()
+        metrics.DB_ROWS_RETURNED.observe(0 if row is None else 1, query='get_athlete_navigation')
+
+    if row is None:
+        return None
+    previous_ids, next_ids, position, total = row
+    previous_ids, next_ids = previous_ids or [], next_ids or []
+    return {
+        'athlete_id': athlete_id,
+        'previous_id': previous_ids[0] if previous_ids else None,
+        'next_id': next_ids[0] if next_ids else None,
+        'previous_ids': previous_ids,
+        'next_ids': next_ids,
+        'position': position,
+        'total': total,
+    }
+
+
+def export_athletes(
+    path: str,
+    file_format: str,
+    x_axis: str,
+    y_axis: str,
+    x_thresholds: tuple[Optional[float], Optional[float]] = (None, None),
+    y_thresholds: tuple[Optional[float], Optional[float]] = (None, None),
+    standard_deviations: tuple[float, float] = (0, 0),
+    sample_size: int = 0,
+    seed: int = 42,
+) -> int:
+    """Export filtered athlete data to a Parquet or Feather file.
+
+    Applies the dashboard's cleaning steps in SQL: drop rows missing either axis,
+    keep values within the thresholds, draw a seeded sample proportional to every
+    gender x age decade stratum, then drop values beyond the given number of
+    standard deviations from the sample mean. Every stratum keeps its athletes with
+    the lowest seeded hash of athlete_id, the rule the dashboard samples with, so
+    the same seed exports the athletes the dashboard plots. The result is fetched as an Arrow
+    table and written without converting through Python objects.
+
+    Args:
+        path (str): Destination file path.
+        file_format (str): 'parquet' or 'feather'.
+        x_axis (str): Column name for the x-axis metric.
+        y_axis (str): Column name for the y-axis metric.
+        x_thresholds (tuple): Lower and upper bounds for x-axis values, None for no bound.
+        y_thresholds (tuple): Lower and upper bounds for y-axis values, None for no bound.
+        standard_deviations (tuple[float, float]): Outlier standard deviation multipliers
+            for x and y (0 to disable). Defaults to (0, 0).
+        sample_size (int): Target number of sampled rows, 0 for all rows. Defaults to 0.
+        seed (int): Sampling seed. Defaults to 42.
+
+    Returns:
+        int: Number of exported rows.
+
+    Raises:
+        ValueError: If the format or an axis column is unknown.
+        duckdb.Error: If there's an error connecting to or querying the database.
+
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f'Unknown export format {file_format}')
+    db_path = 'athletes.duckdb'
+
+    with duckdb.connect(db_path) as conn:
+        columns = {
+            row[0]
+            for row in conn.execute(
+                "SELECT column_name FROM information_schema.columns WHERE table_name = 'athletes'"
+            ).fetchall()
+        }
+        for axis in (x_axis, y_axis):
+            if axis not in columns:
+                raise ValueError(f'Unknown column {axis}')
+
+        # axes are validated column names, so they can be quoted into the query
+        x, y = f'"{x_axis}"', f'"{y_axis}"'
+        query = f"""
+            WITH filtered AS (
+                SELECT athlete_id, age, {', '.join(EXPORT_COLUMNS)}, {x}, {y}
+                FROM athletes
+                WHERE {x} IS NOT NULL AND {y} IS NOT NULL
+                    AND ($x_min IS NULL OR {x} >= $x_min) AND ($x_max IS NULL OR {x} <= $x_max)
+                    AND ($y_min IS NULL OR {y} >= $y_min) AND ($y_max IS NULL OR {y} <= $y_max)
+            ),
+            ranked AS (
+                SELECT
+                    *,
+                    row_number() OVER (
+                        PARTITION BY gender, floor(age / 10)
+                        ORDER BY (athlete_id::BIGINT + $seed) * {SAMPLE_HASH_MULTIPLIER}
+                            % {SAMPLE_HASH_MODULUS}, athlete_id
+                    ) AS stratum_rank,
+                    count(*) OVER (PARTITION BY gender, floor(age / 10)) AS stratum_rows,
+                    count(*) OVER () AS total_rows
+                FROM filtered
+            ),
+            sampled AS (
+                SELECT * FROM ranked
+                WHERE $sample_size = 0 OR total_rows <= $sample_size
+                    OR stratum_rank <= floor(stratum_rows * $sample_size / total_rows + 0.5)
+            ),
+            stats AS (
+                SELECT
+                    avg({x}) - stddev_samp({x}) * $x_sigma AS x_lower,
+                    avg({x}) + stddev_samp({x}) * $x_sigma AS x_upper,
+                    avg({y}) - stddev_samp({y}) * $y_sigma AS y_lower,
+                    avg({y}) + stddev_samp({y}) * $y_sigma AS y_upper
+                FROM sampled
+            )
+            SELECT {', '.join(EXPORT_COLUMNS)}, {x}, {y}
+            FROM sampled, stats
+            WHERE ($x_sigma = 0 OR {x} BETWEEN x_lower AND x_upper)
+                AND ($y_sigma = 0 OR {y} BETWEEN y_lower AND y_upper)
+            ORDER BY athlete_id DESC
+        """
+        params = {
+            'x_min': x_thresholds[0],
+            'x_max': x_thresholds[1],
+            'y_min': y_thresholds[0],
+            'y_max': y_thresholds[1],
+            'x_sigma': standard_deviations[0],
+            'y_sigma': standard_deviations[1],
+            'sample_size': sample_size,
+            'seed': seed,
+        }
+        with metrics.DB_QUERY_LATENCY.time(query='export_athletes'):
+            table = conn.execute(query, params).fetch_arrow_table()
+        metrics.DB_ROWS_RETURNED.observe(table.num_rows, query='export_athletes')
+
+    EXPORT_FORMATS[file_format](table, path)
+    return table.num_rows
+
+
+def get_unscored_athletes(
+    model_version: str,
+    feature_columns: list[str],
+    athlete_ids: Optional[list[int]] = None,
+    imputed_columns: Optional[list[str]] = None,
+) -> list[tuple]:
+    """Get athletes eligible for scoring that have no prediction for a model version.
+
+    An athlete is eligible when every feature column other than gender and the
+    imputed columns is present. Missing imputed values are returned as None.
+
+    Args:
+        model_version (str): Model version to check for existing predictions.
+        feature_columns (list[str]): Feature columns in model order.
+        athlete_ids (Optional[list[int]]): Restrict to these athletes. Defaults to None (all).
+        imputed_columns (Optional[list[str]]): Feature columns the caller fills in when
+            missing. Defaults to None (none).
+
+    Returns:
+        list[tuple]: Rows of (athlete_id, *feature values) in feature_columns order.
+
+    Raises:
+        duckdb.Error: If there's an error connecting to or querying the database.
+
+    """
+    db_path = 'athletes.duckdb'
+    optional = {'gender', *(imputed_columns or [])}
+    conditions = [f'a.{col} IS NOT NULL' for col in feature_columns if col not in optional]
+    if athlete_ids is not None:
+        conditions.append('a.athlete_id IN (SELECT UNNEST(?))')
+    params = [model_version] + ([athlete_ids] if athlete_ids is not None else [])
+
+    with duckdb.connect(db_path) as conn:
+        query = f"""
+            SELECT a.athlete_id, {', '.join(f'a.{col}' for col in feature_columns)}
+            FROM athletes a
+            WHERE NOT EXISTS (
+                SELECT 1 FROM predictions p
+                WHERE p.athlete_id = a.athlete_id AND p.model_version = ?
+            )
+            {''.join(f' AND {condition}' for condition in conditions)}
+        """
+        with metrics.DB_QUERY_LATENCY.time(query='get_unscored_athletes'):
+            rows = conn.execute(query, params).fetchall()
+        metrics.DB_ROWS_RETURNED.observe(len(rows), query='get_unscored_athletes')
+        return rows
+
+
+def save_predictions(model_version: str, predictions: list[tuple[int, float]]):
+    """Store predicted 5K times for a model version, replacing existing rows.
+
+    Args:
+        model_version (str): Model version that produced the predictions.
+        predictions (list[tuple[int, float]]): Pairs of (athlete_id, predicted_run5k).
+
+    Raises:
+        duckdb.Error: If there's an error connecting to or writing to the database.
+
+    """
+    if not predictions:
+        return
+    db_path = 'athletes.duckdb'
+
+    with duckdb.connect(db_path) as conn:
+        athlete_ids, predicted = zip(*predictions)
+        # a single set-based insert; executemany would round-trip once per row
+        with metrics.DB_QUERY_LATENCY.time(query='save_predictions'):
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO predictions (athlete_id, model_version, predicted_run5k)
+                SELECT UNNEST(?), ?, UNNEST(?)
+                """,
+                [list(athlete_ids), model_version, list(predicted)],
+            )
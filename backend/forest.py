@@ -0,0 +1,265 @@
+"""Flat array representation of tree ensembles.
+
+This module exports a fitted sklearn forest into contiguous NumPy arrays and
+stores them in a layout that can be memory-mapped, so every worker process
+shares the same read-only pages instead of unpickling a private copy. A compact
+variant with 32-bit arrays, optionally depth-capped or restricted to a subset of
+trees, is used for published models, and compact_model cuts the sklearn
+estimator the same way so both serving engines predict with the same trees.
+"""
+
+import copy
+
+import joblib
+import numpy as np
+
+
+def export_forest(model) -> dict:
+    """Export a fitted tree ensemble into flat node arrays.
+
+    The nodes of every tree are concatenated into single arrays and child indices
+    are rewritten to global positions in those arrays. Leaves point to themselves
+    with a dummy split, so a fixed number of traversal steps (the deepest tree's
+    depth) lands every row on its leaf in every tree at once.
+
+    Args:
+        model (ExtraTreesRegressor): A fitted sklearn forest regressor.
+
+    Returns:
+        dict: Dictionary of arrays with keys:
+            - feature (np.ndarray): Feature index tested at each node
+            - threshold (np.ndarray): Split threshold at each node
+            - left (np.ndarray): Global index of the left child (itself for leaves)
+            - right (np.ndarray): Global index of the right child (itself for leaves)
+            - value (np.ndarray): Mean target value at each node
+            - roots (np.ndarray): Global index of each tree's root node
+            - max_depth (int): Depth of the deepest tree
+
+    """
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    feature, threshold, left, right = [], [], [], []
+
+    for tree, offset in zip(trees, offsets):
+        is_leaf = tree.children_left == -1
+        own_index = np.arange(tree.node_count) + offset
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+        left.append(np.where(is_leaf, own_index, tree.children_left + offset))
+        right.append(np.where(is_leaf, own_index, tree.children_right + offset))
+
+    return {
+        'feature': np.ascontiguousarray(np.concatenate(feature), dtype=np.intp),
+        'threshold': np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64),
+        'left': np.ascontiguousarray(np.concatenate(left), dtype=np.intp),
+        'right': np.ascontiguousarray(np.concatenate(right), dtype=np.intp),
+        'value': np.ascontiguousarray(np.concatenate([tree.value[:, 0, 0] for tree in trees])),
+        'roots': np.ascontiguousarray(offsets[:-1], dtype=np.intp),
+        'max_depth': max(tree.max_depth for tree in trees),
+    }
+
+
+def compact_forest(forest: dict, max_depth: int | None = None, trees=None) -> dict:
+    """Shrink flat forest arrays to 32-bit types, optionally capping depth or dropping trees.
+
+    Thresholds are rounded down to float32. Rows are compared as float32, so for
+    every row ``x <= threshold`` gives the same answer as with the float64
+    threshold and the tree traversal is unchanged. Leaf values become float32.
+
+    With max_depth, nodes at that depth become leaves predicting their node mean.
+    With trees, only those trees are kept. Nodes no longer reachable are removed.
+
+    Args:
+        forest (dict): Arrays produced by export_forest.
+        max_depth (int | None): Depth at which to cut every tree. Defaults to no cap.
+        trees (array-like | None): Indices of the trees to keep. Defaults to all trees.
+
+    Returns:
+        dict: Arrays with the same keys as export_forest.
+
+    """
+    left, right, roots = forest['left'], forest['right'], forest['roots']
+    if trees is not None:
+        roots = roots[np.sort(np.asarray(trees))]
+
+    # walk down from the roots level by level to find reachable nodes and their depth
+    depth = np.full(len(left), -1)
+    nodes, level = roots, 0
+    while len(nodes):
+        depth[nodes] = level
+        if max_depth is not None and level == max_depth:
+            break
+        is_split = left[nodes] != nodes
+        nodes = np.concatenate([left[nodes][is_split], right[nodes][is_split]])
+        level += 1
+
+    keep = depth >= 0
+    new_index = np.cumsum(keep) - 1
+    own_index = np.arange(len(left))
+    is_leaf = (left == own_index) | (depth == max_depth if max_depth is not None else False)
+    threshold = forest['threshold'].astype(np.float32)
+    # round down so float32 rows compare exactly as against the float64 threshold
+    threshold = np.where(
+        threshold > forest['threshold'], np.nextafter(threshold, np.float32(-np.inf)), threshold
+    )
+
+    return {
+        'feature': np.where(is_leaf, 0, forest['feature'])[keep].astype(np.int32),
+        'threshold': np.where(is_leaf, 0, threshold)[keep].astype(np.float32),
+        'left': new_index[np.where(is_leaf, own_index, left)][keep].astype(np.int32),
+        'right': new_index[np.where(is_leaf, own_index, right)][keep].astype(np.int32),
+        'value': forest['value'][keep].astype(np.float32),
+        'roots': new_index[roots].astype(np.int32),
+        'max_depth': int(depth.max()),
+    }
+
+
+def compact_model(model, max_depth: int | None = None, trees=None):
+    """Cut a fitted sklearn forest the same way compact_forest cuts its flat arrays.
+
+    With max_depth, split nodes at that depth become leaves predicting their node
+    mean. With trees, only those estimators are kept. The nodes below a cut stay
+    in the tree arrays but are never reached.
+
+    Args:
+        model (ExtraTreesRegressor): A fitted sklearn forest regressor; it is not modified.
+        max_depth (int | None): Depth at which to cut every tree. Defaults to no cap.
+        trees (array-like | None): Indices of the trees to keep. Defaults to all trees.
+
+    Returns:
+        ExtraTreesRegressor: A cut copy of model.
+
+    """
+    model = copy.deepcopy(model)
+    if trees is not None:
+        model.estimators_ = [model.estimators_[index] for index in np.sort(np.asarray(trees))]
+        model.n_estimators = len(model.estimators_)
+    if max_depth is None:
+        return model
+
+    for estimator in model.estimators_:
+        state = estimator.tree_.__getstate__()
+        nodes = state['nodes'].copy()
+        level_nodes = np.array([0])
+        for _ in range(max_depth):
+            split = level_nodes[nodes['left_child'][level_nodes] != -1]
+            level_nodes = np.concatenate([nodes['left_child'][split], nodes['right_child'][split]])
+        nodes['left_child'][level_nodes] = -1
+        nodes['right_child'][level_nodes] = -1
+        nodes['feature'][level_nodes] = -2
+        nodes['threshold'][level_nodes] = -2.0
+        state['nodes'] = nodes
+        state['max_depth'] = min(state['max_depth'], max_depth)
+        estimator.tree_.__setstate__(state)
+    return model
+
+
+def save_forest(forest: dict, path: str, compress: int = 0):
+    """Save flat forest arrays, uncompressed by default so they can be memory-mapped.
+
+    Args:
+        forest (dict): Arrays produced by export_forest or compact_forest.
+        path (str): Destination file path.
+        compress (int): joblib compression level. Compressed files are always loaded
+            into private memory. Defaults to 0.
+
+    """
+    joblib.dump(forest, path, compress=compress)
+
+
+def load_forest(path: str, mmap_mode: str | None = 'r') -> dict:
+    """Load flat forest arrays, memory-mapping them by default.
+
+    With mmap_mode='r' the arrays are backed by the page cache, so workers that
+    load the same file share physical memory.
+
+    Args:
+        path (str): Path to a file written by save_forest.
+        mmap_mode (str | None): numpy memmap mode, or None to load into private memory.
+
+    Returns:
+        dict: The flat forest arrays.
+
+    """
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def tree_predictions(forest: dict, X) -> np.ndarray:
+    """Predict with every tree of flat forest arrays, traversing all trees for all rows at once.
+
+    Args:
+        forest (dict): Arrays produced by export_forest, compact_forest or load_forest.
+        X (array-like): Feature matrix of shape (n_rows, n_features).
+
+    Returns:
+        np.ndarray: Leaf values of shape (n_rows, n_trees).
+
+    """
+    X = np.asarray(X, dtype=np.float32)
+    feature, threshold = forest['feature'], forest['threshold']
+    left, right, roots = forest['left'], forest['right'], forest['roots']
+
+    if len(X) == 1:
+        # single row fast path: 1-D node vector, no row broadcasting
+        row = X[0]
+        nodes = roots
+        for _ in range(forest['max_depth']):
+            nodes = np.where(row[feature[nodes]] <= threshold[nodes], left[nodes], right[nodes])
+        return forest['value'][nodes][np.newaxis, :]
+
+    rows = np.arange(len(X))[:, np.newaxis]
+    nodes = np.broadcast_to(roots, (len(X), len(roots)))
+    for _ in range(forest['max_depth']):
+        go_left = X[rows, feature[nodes]] <= threshold[nodes]
+        nodes = np.where(go_left, left[nodes], right[nodes])
+    return forest['value'][nodes]
+
+
+def predict_forest(forest: dict, X) -> np.ndarray:
+    """Predict with flat forest arrays.
+
+    Rows are cast to float32 before comparing against the thresholds and tree
+    outputs are summed in tree order in float64 before averaging, which reproduces
+    sklearn's ``ExtraTreesRegressor.predict`` bit for bit for export_forest arrays.
+
+    Args:
+        forest (dict): Arrays produced by export_forest, compact_forest or load_forest.
+        X (array-like): Feature matrix of shape (n_rows, n_features).
+
+    Returns:
+        np.ndarray: Predictions of shape (n_rows,).
+
+    """
+    leaf_values = tree_predictions(forest, X)
+    # cumsum accumulates sequentially, matching sklearn's per-tree `+=`
+    return np.cumsum(leaf_values, axis=1, dtype=np.float64)[:, -1] / leaf_values.shape[1]
+
+
+class FlatForest:
+    """Estimator-like wrapper that predicts from flat forest arrays.
+
+    Attributes:
+        arrays (dict): Arrays produced by export_forest or load_forest.
+
+    """
+
+    def __init__(self, arrays: dict):
+        """Wrap flat forest arrays.
+
+        Args:
+            arrays (dict): Arrays produced by export_forest or load_forest.
+
+        """
+        self.arrays = arrays
+
+    def predict(self, X) -> np.ndarray:
+        """Predict target values for X.
+
+        Args:
+            X (array-like): Feature matrix of shape (n_rows, n_features).
+
+        Returns:
+            np.ndarray: Predictions of shape (n_rows,).
+
+        """
+        return predict_forest(self.arrays, X)
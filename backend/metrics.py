@@ -0,0 +1,314 @@
+"""In-process Prometheus-style metrics.
+
+This module provides counters, gauges and histograms that render in the
+Prometheus text exposition format, plus an ASGI middleware recording request
+count, latency and in-flight requests per route. Each metric holds a single
+lock for a few integer updates, so recording stays cheap on the hot path.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+ROWS_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    """Format label names and values as a Prometheus label set.
+
+    Args:
+        names (tuple): Label names.
+        values (tuple): Label values in the same order.
+
+    Returns:
+        str: Label set such as '{route="/api/athletes",status="200"}', or '' without labels.
+
+    """
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class _Metric:
+    """Base class holding a metric's name, help text and label names."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        """Initialize a metric and add it to the default registry.
+
+        Args:
+            name (str): Metric name.
+            documentation (str): Help text.
+            labels (tuple): Label names. Defaults to no labels.
+
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        """Order label values according to the metric's label names.
+
+        Args:
+            labels (dict): Label values by name.
+
+        Returns:
+            tuple: Label values.
+
+        """
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def render(self) -> list[str]:
+        """Render HELP/TYPE headers and samples.
+
+        Returns:
+            list[str]: Lines in Prometheus text format.
+
+        """
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        """Initialize a counter.
+
+        Args:
+            name (str): Metric name.
+            documentation (str): Help text.
+            labels (tuple): Label names. Defaults to no labels.
+
+        """
+        super().__init__(name, documentation, labels)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        """Increment the counter.
+
+        Args:
+            amount (float): Amount to add. Defaults to 1.
+            **labels: Label values.
+
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        """Render the counter in Prometheus text format.
+
+        Returns:
+            list[str]: Lines in Prometheus text format.
+
+        """
+        with self._lock:
+            values = list(self._values.items())
+        return super().render() + [
+            f'{self.name}{_format_labels(self.labels, key)} {value}' for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        """Set the gauge to a value.
+
+        Args:
+            value (float): New value.
+            **labels: Label values.
+
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        """Decrement the gauge.
+
+        Args:
+            amount (float): Amount to subtract. Defaults to 1.
+            **labels: Label values.
+
+        """
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed bucket upper bounds."""
+
+    kind = 'histogram'
+
+    def __init__(
+        self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS
+    ):
+        """Initialize a histogram.
+
+        Args:
+            name (str): Metric name.
+            documentation (str): Help text.
+            labels (tuple): Label names. Defaults to no labels.
+            buckets (tuple): Sorted bucket upper bounds. Defaults to LATENCY_BUCKETS.
+
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        """Record an observation.
+
+        Args:
+            value (float): Observed value.
+            **labels: Label values.
+
+        """
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (last slot is +Inf), sum
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Time a block of code and record its duration in seconds.
+
+        Args:
+            **labels: Label values.
+
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        """Render the histogram in Prometheus text format.
+
+        Returns:
+            list[str]: Lines in Prometheus text format.
+
+        """
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+
+        lines = super().render()
+        label_names = self.labels + ('le',)
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                labels = _format_labels(label_names, key + (bound,))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, key)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+REGISTRY = []
+
+
+def render() -> str:
+    """Render every registered metric in Prometheus text format.
+
+    Returns:
+        str: The exposition text.
+
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+HTTP_REQUESTS = Counter('http_requests_total', 'HTTP requests handled.', ('route', 'status'))
+HTTP_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency.', ('route', 'status')
+)
+HTTP_IN_FLIGHT = Gauge('http_requests_in_flight', 'HTTP requests currently being handled.')
+DB_QUERY_LATENCY = Histogram('duckdb_query_duration_seconds', 'DuckDB query time.', ('query',))
+DB_ROWS_RETURNED = Histogram(
+    'duckdb_rows_returned', 'Rows returned by DuckDB queries.', ('query',), buckets=ROWS_BUCKETS
+)
+MODEL_INFERENCE_LATENCY = Histogram(
+    'model_inference_duration_seconds', 'Model predict call time.', ('version',)
+)
+MODEL_INFERENCE_ROWS = Histogram(
+    'model_inference_rows', 'Rows per model predict call.', buckets=ROWS_BUCKETS
+)
+PREDICTION_CACHE = Gauge('prediction_cache', 'Run5k prediction cache statistics.', ('stat',))
+PREDICTION_BATCHER = Gauge(
+    'prediction_batcher', 'Run5k prediction micro-batcher statistics.', ('stat',)
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count, latency and in-flight requests.
+
+    Requests are labelled with the matched route template (for example
+    '/api/athlete/{athlete_id}') rather than the raw path, keeping label
+    cardinality bounded.
+
+    Attributes:
+        app (ASGIApp): The wrapped ASGI application.
+
+    """
+
+    def __init__(self, app):
+        """Wrap an ASGI application.
+
+        Args:
+            app (ASGIApp): The application to instrument.
+
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        """Handle an ASGI call, recording metrics for HTTP requests.
+
+        Args:
+            scope (dict): ASGI connection scope.
+            receive (Callable): ASGI receive channel.
+            send (Callable): ASGI send channel.
+
+        """
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get('route')
+            path = getattr(route, 'path', 'unmatched')
+            HTTP_REQUESTS.inc(route=path, status=status)
+            HTTP_LATENCY.observe(elapsed, route=path, status=status)
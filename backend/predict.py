@@ -1,6 +1,249 @@
-import joblib
+"""Run5k prediction module.
 
-model = joblib.load('run5k_predictor.model')
+This module serves 5K run time predictions from the active model in the model
+registry, memoizing results in a bounded LRU cache keyed on the model version and
+the normalized feature vector. By default the pickled sklearn estimator serves
+predictions. Set ``PREDICT_ENGINE=forest`` to opt in to the flat forest artifact,
+which is memory-mapped and evaluated with a vectorized traversal, so uvicorn
+workers share the tree arrays and single-row calls skip sklearn's validation and
+joblib dispatch. Compare both engines with ``python benchmark.py latency`` first.
+"""
+
+import os
+import threading
+import traceback
+from collections import OrderedDict
+from typing import Optional
+
+import database
+import metrics
+from registry import FEATURE_COLUMNS, LoadedModel, ModelRegistry
+
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '4096'))
+PREDICTION_CACHE_PRECISION = int(os.getenv('PREDICTION_CACHE_PRECISION', '1'))
+SCORING_BATCH_SIZE = int(os.getenv('SCORING_BATCH_SIZE', '10000'))
+SCORE_ON_MODEL_CHANGE = os.getenv('SCORE_ON_MODEL_CHANGE', 'true').lower() == 'true'
+
+
+class PredictionCache:
+    """Bounded, thread-safe LRU cache for model predictions.
+
+    Keys pair the model version with feature values rounded to a fixed number of
+    decimals, so repeated submissions of the same form values resolve to the same
+    entry and a new model version never reads an old prediction.
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept before evicting the least recently used.
+        precision (int): Number of decimals feature values are rounded to when building keys.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that required a model evaluation.
+        evictions (int): Number of entries dropped because the cache was full.
+
+    """
+
+    def __init__(self, maxsize: int = PREDICTION_CACHE_SIZE, precision: int = 1):
+        """Initialize an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries. 0 disables caching.
+            precision (int): Number of decimals used to quantize feature values.
+
+        """
+        self.maxsize = maxsize
+        self.precision = precision
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, features) -> tuple:
+        """Quantize a feature vector into a hashable cache key.
+
+        Args:
+            features (Iterable[float]): Numeric feature values in model order.
+
+        Returns:
+            tuple: Feature values rounded to the cache precision.
+
+        """
+        return tuple(round(float(value), self.precision) for value in features)
+
+    def get(self, key: tuple):
+        """Look up a cached prediction and mark it as recently used.
+
+        Args:
+            key (tuple): Model version and features built with make_key.
+
+        Returns:
+            Optional[float]: The cached prediction, or None on a miss.
+
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: float):
+        """Store a prediction, evicting the least recently used entry when full.
+
+        Args:
+            key (tuple): Model version and features built with make_key.
+            value (float): Predicted value to store.
+
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached entry while keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return cache counters and the current hit rate.
+
+        Returns:
+            dict: Dictionary with size, maxsize, hits, misses, evictions and hit_rate.
+
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+cache = PredictionCache(maxsize=PREDICTION_CACHE_SIZE, precision=PREDICTION_CACHE_PRECISION)
+
+registry = ModelRegistry()
+# predictions from a previous version are never served again, so free the memory
+registry.add_listener(lambda loaded: cache.clear())
+
+
+def get_model() -> LoadedModel:
+    """Get the model currently serving predictions.
+
+    Callers should take the returned LoadedModel once and use it for the whole
+    request, so a concurrent hot reload cannot mix two versions.
+
+    Returns:
+        LoadedModel: The active model version, model and metadata.
+
+    Raises:
+        FileNotFoundError: If no model artifact exists.
+
+    """
+    return registry.active
+
+
+def build_features(
+    age: int,
+    gender: str,
+    backsq: int,
+    deadlift: int,
+    snatch: int,
+    candj: int,
+    pullups: int,
+    weight: float,
+    height: float,
+    run400: float | int,
+    fran: float | int,
+    helen: float | int,
+    grace: float | int,
+) -> tuple:
+    """Build the normalized, quantized feature tuple for a prediction.
+
+    The tuple is both the model input row and the prediction cache key.
+
+    Args:
+        age (int): Athlete's age.
+        gender (str): Athlete's gender ('male' or 'female).
+        backsq (int): Back squat weight.
+        deadlift (int): Deadlift weight.
+        snatch (int): Snatch weight.
+        candj (int): Clean and jerk weight.
+        pullups (int): Number of pull-ups.
+        weight (int): Athlete's body weight.
+        height (float): Athlete's height.
+        run400 (float|int): 400m run time in seconds.
+        fran (float|int): Fran workout time in seconds.
+        helen (float|int): Helen workout time in seconds.
+        grace (float|int): Grace workout time in seconds.
+
+    Returns:
+        tuple: Feature values in FEATURE_COLUMNS order, rounded to the cache precision.
+
+    """
+    features = {
+        'age': age,
+        'gender': 1 if gender.lower() == 'male' else 0,
+        'backsq': backsq,
+        'deadlift': deadlift,
+        'snatch': snatch,
+        'candj': candj,
+        'pullups': pullups,
+        'weight': weight,
+        'height': height,
+        'run400': run400,
+        'fran': fran,
+        'helen': helen,
+        'grace': grace,
+    }
+    return cache.make_key(features[column] for column in FEATURE_COLUMNS)
+
+
+def predict_batch(rows: list[tuple]) -> list[tuple[float, str]]:
+    """Evaluate the active model on several feature rows in one vectorized call.
+
+    Rows are reordered to the model's recorded feature order if it differs from
+    FEATURE_COLUMNS.
+
+    Args:
+        rows (list[tuple]): Feature tuples built with build_features.
+
+    Returns:
+        list[tuple[float, str]]: Predicted 5K run time in seconds and the model version
+            that produced it, in input order.
+
+    """
+    return _predict_rows(get_model(), rows)
+
+
+def _predict_rows(loaded: LoadedModel, rows: list[tuple]) -> list[tuple[float, str]]:
+    """Evaluate a specific model version on feature rows.
+
+    Args:
+        loaded (LoadedModel): Model version to evaluate.
+        rows (list[tuple]): Feature tuples built with build_features.
+
+    Returns:
+        list[tuple[float, str]]: Predicted 5K run time in seconds and the model version.
+
+    """
+    feature_order = loaded.metadata.get('feature_order', FEATURE_COLUMNS)
+    if feature_order != FEATURE_COLUMNS:
+        positions = [FEATURE_COLUMNS.index(column) for column in feature_order]
+        rows = [[row[position] for position in positions] for row in rows]
+    with metrics.MODEL_INFERENCE_LATENCY.time(version=loaded.version):
+        predictions = loaded.model.predict([list(row) for row in rows])
+    metrics.MODEL_INFERENCE_ROWS.observe(len(rows))
+    return [(float(value), loaded.version) for value in predictions]
 
 
 def predict_run5k(
@@ -20,6 +263,9 @@ def predict_run5k(
 ):
     """Predict 5K run time based on athlete metrics using a pre-trained model.
 
+    Identical (after quantization) feature vectors for the active model version are
+    served from the LRU cache instead of re-evaluating the forest.
+
     Args:
         age (int): Athlete's age.
         gender (str): Athlete's gender ('male' or 'female).
@@ -36,24 +282,97 @@ def predict_run5k(
         grace (float|int): Grace workout time in seconds.
 
     Returns:
-        float: Predicted 5K run time in seconds.
-
-    """
-    features = [
-        [
-            age,
-            1 if gender.lower() == 'male' else 0,
-            backsq,
-            deadlift,
-            snatch,
-            candj,
-            pullups,
-            weight,
-            height,
-            run400,
-            fran,
-            helen,
-            grace,
-        ]
-    ]
-    return model.predict(features)[0]
+        tuple[float, str]: Predicted 5K run time in seconds and the model version used.
+
+    """
+    features = build_features(
+        age=age,
+        gender=gender,
+        backsq=backsq,
+        deadlift=deadlift,
+        snatch=snatch,
+        candj=candj,
+        pullups=pullups,
+        weight=weight,
+        height=height,
+        run400=run400,
+        fran=fran,
+        helen=helen,
+        grace=grace,
+    )
+    version = get_model().version
+    cached = cache.get((version, features))
+    if cached is not None:
+        return cached, version
+
+    prediction, version = predict_batch([features])[0]
+    cache.put((version, features), prediction)
+    return prediction, version
+
+
+def score_athletes(
+    loaded: Optional[LoadedModel] = None, athlete_ids: Optional[list[int]] = None
+) -> int:
+    """Batch-score eligible athletes that have no stored prediction for a model version.
+
+    Predictions are written to the predictions table so the dashboard can read
+    predicted_run5k as an ordinary column without calling the model. Missing
+    features are filled with their training mean from the model's feature_stats
+    metadata, the way the trainer imputes incomplete rows. Models without
+    feature_stats only score athletes that have every feature.
+
+    Args:
+        loaded (Optional[LoadedModel]): Model version to score with. Defaults to the active model.
+        athlete_ids (Optional[list[int]]): Restrict scoring to these athletes. Defaults to None (all).
+
+    Returns:
+        int: Number of athletes scored.
+
+    """
+    loaded = loaded or get_model()
+    fill_values = {
+        column: stats['mean']
+        for column, stats in loaded.metadata.get('feature_stats', {}).items()
+        if column in FEATURE_COLUMNS and column != 'gender'
+    }
+    rows = database.get_unscored_athletes(
+        loaded.version, FEATURE_COLUMNS, athlete_ids, imputed_columns=list(fill_values)
+    )
+
+    for start in range(0, len(rows), SCORING_BATCH_SIZE):
+        chunk = rows[start : start + SCORING_BATCH_SIZE]
+        features = []
+        for row in chunk:
+            values = dict(zip(FEATURE_COLUMNS, row[1:]))
+            for column, fill_value in fill_values.items():
+                if values[column] is None:
+                    values[column] = fill_value
+            values['gender'] = values['gender'] or ''
+            features.append(build_features(**values))
+        predictions = _predict_rows(loaded, features)
+        database.save_predictions(
+            loaded.version, [(row[0], predicted) for row, (predicted, _) in zip(chunk, predictions)]
+        )
+    return len(rows)
+
+
+def _score_in_background(loaded: LoadedModel):
+    """Score all unscored athletes for a newly activated model on a background thread.
+
+    Args:
+        loaded (LoadedModel): The newly active model.
+
+    """
+
+    def _score():
+        try:
+            scored = score_athletes(loaded)
+            print(f'Scored {scored} athletes with model version {loaded.version}')
+        except Exception:
+            traceback.print_exc()
+
+    threading.Thread(target=_score, daemon=True).start()
+
+
+if SCORE_ON_MODEL_CHANGE:
+    registry.add_listener(_score_in_background)
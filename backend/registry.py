@@ -0,0 +1,493 @@
+"""Versioned model registry with atomic hot reload.
+
+This module stores trained models as versioned directories with metadata and
+keeps the active model behind a single reference, so a new version can be loaded
+in the background and swapped in without blocking or restarting the backend.
+
+The registry layout is::
+
+    models/
+        CURRENT               # name of the active version
+        v0001/
+            model.joblib      # pickled sklearn estimator, compressed
+            model.forest.z    # compact flat node arrays, compressed
+            model.forest      # the same arrays inflated on first load, memory-mapped
+            metadata.json     # training date, R² scores, feature order, ...
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import threading
+import traceback
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple, Optional
+
+import joblib
+from forest import FlatForest, compact_forest, export_forest, load_forest, save_forest
+
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', 'models')
+MODEL_REGISTRY_POLL_SECONDS = float(os.getenv('MODEL_REGISTRY_POLL_SECONDS', '2'))
+PREDICT_ENGINE = os.getenv('PREDICT_ENGINE', 'sklearn')
+MODEL_PATH = os.getenv('MODEL_PATH', 'run5k_predictor.model')
+FOREST_PATH = os.getenv('FOREST_PATH', 'run5k_predictor.forest')
+
+CURRENT_FILE = 'CURRENT'
+MODEL_FILE = 'model.joblib'
+FOREST_FILE = 'model.forest'
+FOREST_ARCHIVE_FILE = 'model.forest.z'
+ARTIFACT_COMPRESS = int(os.getenv('ARTIFACT_COMPRESS', '3'))
+METADATA_FILE = 'metadata.json'
+VERSION_PATTERN = re.compile(r'^v\d{4,}$')
+STAGING_PREFIX = '.staging-'
+# a staging directory this old belongs to a publish that crashed, not one in progress
+STAGING_MAX_AGE_SECONDS = 3600
+LEGACY_VERSION = 'legacy'
+
+# column order of the training matrix built in trainer.py
+FEATURE_COLUMNS = [
+    'age',
+    'backsq',
+    'gender',
+    'deadlift',
+    'snatch',
+    'candj',
+    'pullups',
+    'weight',
+    'height',
+    'run400',
+    'fran',
+    'helen',
+    'grace',
+]
+
+
+class LoadedModel(NamedTuple):
+    """A model version that is ready to serve.
+
+    Attributes:
+        version (str): Registry version name, or 'legacy' for the unversioned artifact.
+        model (object): Estimator-like object with a ``predict`` method.
+        metadata (dict): Metadata written at training time.
+
+    """
+
+    version: str
+    model: object
+    metadata: dict
+
+
+def list_versions(registry_dir: str = MODEL_REGISTRY_DIR) -> list[str]:
+    """List the published versions in a registry, oldest first.
+
+    Args:
+        registry_dir (str): Path to the registry directory.
+
+    Returns:
+        list[str]: Version names (v0001, v0002, ...) that contain a metadata file, in
+            numeric order.
+
+    """
+    if not os.path.isdir(registry_dir):
+        return []
+    return sorted(
+        (
+            name
+            for name in os.listdir(registry_dir)
+            if VERSION_PATTERN.match(name)
+            and os.path.isfile(os.path.join(registry_dir, name, METADATA_FILE))
+        ),
+        key=lambda name: int(name[1:]),
+    )
+
+
+def _remove_stale_staging(registry_dir: str):
+    """Delete staging directories left behind by publishes that crashed.
+
+    Args:
+        registry_dir (str): Path to the registry directory.
+
+    """
+    cutoff = time.time() - STAGING_MAX_AGE_SECONDS
+    for entry in os.scandir(registry_dir):
+        if entry.name.startswith(STAGING_PREFIX) and entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def current_version(registry_dir: str = MODEL_REGISTRY_DIR) -> Optional[str]:
+    """Read the name of the active version from the CURRENT pointer file.
+
+    Args:
+        registry_dir (str): Path to the registry directory.
+
+    Returns:
+        Optional[str]: The active version, or None if nothing has been published.
+
+    """
+    try:
+        with open(os.path.join(registry_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_metadata(version: str, registry_dir: str = MODEL_REGISTRY_DIR) -> dict:
+    """Read the metadata of a published version.
+
+    Args:
+        version (str): Version name.
+        registry_dir (str): Path to the registry directory.
+
+    Returns:
+        dict: The version's metadata.
+
+    Raises:
+        FileNotFoundError: If the version does not exist.
+
+    """
+    with open(os.path.join(registry_dir, version, METADATA_FILE)) as f:
+        return json.load(f)
+
+
+def activate(version: str, registry_dir: str = MODEL_REGISTRY_DIR):
+    """Point CURRENT at a version by atomically replacing the pointer file.
+
+    Args:
+        version (str): Version name to activate.
+        registry_dir (str): Path to the registry directory.
+
+    Raises:
+        FileNotFoundError: If the version does not exist.
+
+    """
+    if version not in list_versions(registry_dir):
+        raise FileNotFoundError(f'Model version {version} not found in {registry_dir}')
+    fd, tmp_path = tempfile.mkstemp(dir=registry_dir, prefix='.current-')
+    with os.fdopen(fd, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(registry_dir, CURRENT_FILE))
+
+
+def publish(
+    model,
+    metadata: dict,
+    registry_dir: str = MODEL_REGISTRY_DIR,
+    make_current: bool = True,
+    forest: Optional[dict] = None,
+) -> str:
+    """Publish a trained model as a new registry version.
+
+    Artifacts are written compressed to a staging directory that is renamed into
+    place, so watchers never observe a partially written version. Staging
+    directories left by earlier publishes that crashed are removed first.
+
+    Args:
+        model (ExtraTreesRegressor): The fitted model.
+        metadata (dict): Training metadata such as R² scores and hyperparameters.
+        registry_dir (str): Path to the registry directory.
+        make_current (bool): Whether to activate the new version. Defaults to True.
+        forest (Optional[dict]): Flat forest arrays to serve. Defaults to the compact
+            export of model.
+
+    Returns:
+        str: The new version name.
+
+    """
+    os.makedirs(registry_dir, exist_ok=True)
+    _remove_stale_staging(registry_dir)
+    existing = list_versions(registry_dir)
+    version = f'v{int(existing[-1][1:]) + 1 if existing else 1:04d}'
+
+    staging_dir = tempfile.mkdtemp(dir=registry_dir, prefix=STAGING_PREFIX)
+    if forest is None:
+        forest = compact_forest(export_forest(model))
+    joblib.dump(model, os.path.join(staging_dir, MODEL_FILE), compress=ARTIFACT_COMPRESS)
+    save_forest(forest, os.path.join(staging_dir, FOREST_ARCHIVE_FILE), compress=ARTIFACT_COMPRESS)
+    metadata = {
+        'version': version,
+        'trained_at': datetime.now(timezone.utc).isoformat(),
+        'feature_order': FEATURE_COLUMNS,
+        **metadata,
+    }
+    with open(os.path.join(staging_dir, METADATA_FILE), 'w') as f:
+        json.dump(metadata, f, indent=2, default=str)
+    os.rename(staging_dir, os.path.join(registry_dir, version))
+
+    if make_current:
+        activate(version, registry_dir)
+    return version
+
+
+def _inflate_forest(archive_path: str, forest_path: str):
+    """Decompress a forest archive next to it so it can be memory-mapped.
+
+    The file is written under a temporary name and renamed into place, so
+    concurrent workers either see the complete file or inflate their own copy.
+
+    Args:
+        archive_path (str): Path of the compressed forest.
+        forest_path (str): Destination path of the uncompressed forest.
+
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(forest_path), prefix='.forest-')
+    os.close(fd)
+    save_forest(load_forest(archive_path, mmap_mode=None), tmp_path)
+    os.replace(tmp_path, forest_path)
+
+
+def load_version(
+    version: str, registry_dir: str = MODEL_REGISTRY_DIR, engine: str = PREDICT_ENGINE
+) -> LoadedModel:
+    """Load a published version, or the legacy unversioned artifact.
+
+    With the 'forest' engine the flat forest arrays are memory-mapped, inflating
+    the compressed archive on first use; with 'sklearn' the pickled estimator is
+    loaded.
+
+    Args:
+        version (str): Version name, or 'legacy' for MODEL_PATH/FOREST_PATH.
+        registry_dir (str): Path to the registry directory.
+        engine (str): 'forest' or 'sklearn'.
+
+    Returns:
+        LoadedModel: The loaded model ready to serve.
+
+    Raises:
+        FileNotFoundError: If the artifacts do not exist.
+
+    """
+    if version == LEGACY_VERSION:
+        forest_path, model_path = FOREST_PATH, MODEL_PATH
+        metadata = {'version': LEGACY_VERSION, 'feature_order': FEATURE_COLUMNS}
+    else:
+        forest_path = os.path.join(registry_dir, version, FOREST_FILE)
+        model_path = os.path.join(registry_dir, version, MODEL_FILE)
+        metadata = read_metadata(version, registry_dir)
+
+    if engine == 'forest' and version != LEGACY_VERSION and not os.path.exists(forest_path):
+        archive_path = os.path.join(registry_dir, version, FOREST_ARCHIVE_FILE)
+        if os.path.exists(archive_path):
+            _inflate_forest(archive_path, forest_path)
+    if engine == 'forest' and os.path.exists(forest_path):
+        model = FlatForest(load_forest(forest_path, mmap_mode='r'))
+    else:
+        model = joblib.load(model_path)
+    return LoadedModel(version=version, model=model, metadata=metadata)
+
+
+class ModelRegistry:
+    """Holds the active model and swaps in new versions atomically.
+
+    Readers take ``registry.active`` once per request and keep using that
+    LoadedModel, so in-flight requests finish on the version they started with.
+    New versions are loaded off the request path and published by a single
+    reference assignment.
+
+    Attributes:
+        registry_dir (str): Path to the registry directory.
+        engine (str): Prediction engine passed to load_version.
+
+    """
+
+    def __init__(self, registry_dir: str = MODEL_REGISTRY_DIR, engine: str = PREDICT_ENGINE):
+        """Initialize a registry with no model loaded yet.
+
+        Args:
+            registry_dir (str): Path to the registry directory.
+            engine (str): 'forest' or 'sklearn'.
+
+        """
+        self.registry_dir = registry_dir
+        self.engine = engine
+        self._active = None
+        self._loading = None
+        self._last_error = None
+        self._failed_version = None
+        self._load_lock = threading.Lock()
+        self._listeners = []
+        self._stop = threading.Event()
+        self._watcher = None
+
+    @property
+    def active(self) -> LoadedModel:
+        """Get the model currently serving requests, loading it on first use.
+
+        Returns:
+            LoadedModel: The active model.
+
+        Raises:
+            FileNotFoundError: If neither a registry version nor a legacy artifact exists.
+
+        """
+        active = self._active
+        if active is not None:
+            return active
+        with self._load_lock:
+            # another request may have finished the first load while this one waited
+            if self._active is not None:
+                return self._active
+            loaded, changed = self._swap(None)
+        if changed:
+            self._notify(loaded)
+        return loaded
+
+    @property
+    def active_version(self) -> Optional[str]:
+        """Get the active version without triggering a load.
+
+        Returns:
+            Optional[str]: The active version, or None if no model has been loaded yet.
+
+        """
+        active = self._active
+        return active.version if active else None
+
+    def add_listener(self, callback: Callable[[LoadedModel], None]):
+        """Register a callback invoked whenever the active version changes.
+
+        Args:
+            callback (Callable[[LoadedModel], None]): Called with the newly active model.
+
+        """
+        self._listeners.append(callback)
+
+    def load(self, version: Optional[str] = None) -> LoadedModel:
+        """Load a version and make it active.
+
+        Loads are serialized, but readers are never blocked: they keep using the
+        previous model until the swap. Listeners are only notified when the active
+        version changes.
+
+        Args:
+            version (Optional[str]): Version to load. Defaults to the CURRENT version,
+                or the legacy artifact when nothing has been published.
+
+        Returns:
+            LoadedModel: The newly active model.
+
+        """
+        with self._load_lock:
+            loaded, changed = self._swap(version)
+        if changed:
+            self._notify(loaded)
+        return loaded
+
+    def _swap(self, version: Optional[str]) -> tuple[LoadedModel, bool]:
+        """Load a version and make it active. The caller must hold _load_lock.
+
+        Args:
+            version (Optional[str]): Version to load. Defaults to the CURRENT version,
+                or the legacy artifact when nothing has been published.
+
+        Returns:
+            tuple[LoadedModel, bool]: The newly active model and whether the active
+                version changed.
+
+        """
+        version = version or current_version(self.registry_dir) or LEGACY_VERSION
+        self._loading = version
+        try:
+            loaded = load_version(version, self.registry_dir, self.engine)
+        except Exception as ex:
+            self._last_error = f'{version}: {ex}'
+            self._failed_version = version
+            raise
+        finally:
+            self._loading = None
+        previous = self._active
+        self._last_error = None
+        self._failed_version = None
+        self._active = loaded
+        return loaded, previous is None or previous.version != loaded.version
+
+    def _notify(self, loaded: LoadedModel):
+        """Call every listener with a newly active model.
+
+        Args:
+            loaded (LoadedModel): The newly active model.
+
+        """
+        for callback in self._listeners:
+            callback(loaded)
+
+    def reload_in_background(self, version: Optional[str] = None) -> threading.Thread:
+        """Load a version on a background thread.
+
+        Args:
+            version (Optional[str]): Version to load. Defaults to the CURRENT version.
+
+        Returns:
+            threading.Thread: The started loader thread.
+
+        """
+        thread = threading.Thread(target=self._load_quietly, args=(version,), daemon=True)
+        thread.start()
+        return thread
+
+    def _load_quietly(self, version: Optional[str] = None):
+        """Load a version, logging instead of raising on failure.
+
+        Args:
+            version (Optional[str]): Version to load.
+
+        """
+        try:
+            self.load(version)
+        except Exception:
+            traceback.print_exc()
+
+    def start_watching(self, interval: float = MODEL_REGISTRY_POLL_SECONDS):
+        """Poll the CURRENT pointer and hot reload when it changes.
+
+        Args:
+            interval (float): Seconds between polls.
+
+        """
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """Stop the watcher thread started by start_watching."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval: float):
+        """Watcher loop: load the CURRENT version whenever it differs from the active one.
+
+        Args:
+            interval (float): Seconds between polls.
+
+        """
+        while not self._stop.wait(interval):
+            version = current_version(self.registry_dir)
+            active = self._active
+            if version is None or version == self._failed_version:
+                continue
+            if active is None or active.version != version:
+                self._load_quietly(version)
+
+    def status(self) -> dict:
+        """Describe the active model and the versions available in the registry.
+
+        Returns:
+            dict: Active version and metadata, version being loaded, last load error and
+                the list of published versions.
+
+        """
+        active = self._active
+        return {
+            'active_version': active.version if active else None,
+            'active_metadata': active.metadata if active else None,
+            'current_version': current_version(self.registry_dir),
+            'loading_version': self._loading,
+            'last_error': self._last_error,
+            'versions': list_versions(self.registry_dir),
+        }
@@ -3,14 +3,50 @@
 This module defines the API endpoints for accessing athlete information.
 """
 
+import os
+import tempfile
 import traceback
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
 
 import database
-from fastapi import FastAPI, HTTPException
+import metrics
+import predict
+import registry
+from batching import MicroBatcher
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from fastapi.responses import FileResponse, PlainTextResponse
 from models import Athlete, AthleteResponse
-from predict import predict_run5k
+from starlette.background import BackgroundTask
 
-app = FastAPI()
+EXPORT_MEDIA_TYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'feather': 'application/vnd.apache.arrow.file',
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the database schema, load the active model and watch the registry.
+
+    The active model is loaded in the background and new versions are picked up
+    while the app runs. On shutdown, batched predictions still running are awaited.
+
+    Args:
+        app (FastAPI): The application instance.
+
+    """
+    database.init_schema()
+    predict.registry.reload_in_background()
+    predict.registry.start_watching()
+    yield
+    await batcher.close()
+    predict.registry.stop_watching()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+batcher = MicroBatcher(predict.predict_batch)
 
 
 @app.get('/api/athletes')
@@ -18,7 +54,8 @@ def get_athletes():
     """Get all athletes from the database.
 
     Retrieves athlete data from the database and returns it as a JSON response.
-    This endpoint fetches up to 1000 athlete records with their associated columns.
+    This endpoint fetches athlete records with their associated columns, plus the
+    stored predicted_run5k and run5k_residual for the active model version.
 
     Returns:
         dict: A dictionary containing athlete data and column names.
@@ -28,17 +65,153 @@ def get_athletes():
 
     """
     try:
-        return database.get_athletes()
+        return database.get_athletes(model_version=predict.registry.active_version)
     except Exception as ex:
         traceback.print_exc()
         raise HTTPException(500, detail=str(ex))
 
 
+@app.get('/api/athletes/version')
+def get_athletes_version(response: Response, if_none_match: Optional[str] = Header(None)):
+    """Get the version of the athlete data returned by GET /api/athletes.
+
+    A cheap check for clients caching the athlete list: the version changes when
+    athletes are added or the active model's predictions change. The version is
+    also sent as an ETag, and a matching If-None-Match gets an empty 304.
+
+    Args:
+        response (Response): Response used to set the ETag header.
+        if_none_match (Optional[str]): ETag the client already has.
+
+    Returns:
+        dict: A dictionary containing the data version.
+
+    Raises:
+        HTTPException: 500 error if database query fails.
+
+    """
+    try:
+        version = database.get_data_version(model_version=predict.registry.active_version)
+    except Exception as ex:
+        traceback.print_exc()
+        raise HTTPException(500, detail=str(ex))
+
+    etag = f'"{version}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={'ETag': etag})
+    response.headers['ETag'] = etag
+    return {'version': version}
+
+
+@app.get('/api/athletes/navigation')
+def get_athletes_navigation(athlete_id: Optional[int] = None, window: int = Query(1, ge=1, le=50)):
+    """Get the previous/next athlete ids and the position of an athlete.
+
+    Lets the profile page page through athletes without downloading the whole
+    athletes table to build the list of ids.
+
+    Args:
+        athlete_id (Optional[int]): Athlete to locate. Defaults to the first athlete.
+        window (int): Number of neighbour ids to return on each side, for prefetching.
+            Defaults to 1.
+
+    Returns:
+        dict: athlete_id, previous_id, next_id, previous_ids, next_ids, 1-based position
+            and total athlete count.
+
+    Raises:
+        HTTPException: 404 error if athlete not found, 500 error if database query fails.
+
+    """
+    try:
+        navigation = database.get_athlete_navigation(athlete_id, window=window)
+    except Exception as ex:
+        traceback.print_exc()
+        raise HTTPException(500, detail=str(ex))
+
+    if navigation is None:
+        if athlete_id is None:
+            raise HTTPException(404, detail='No athletes found')
+        raise HTTPException(404, detail=f'Athlete with ID {athlete_id} not found')
+    return navigation
+
+
+@app.get('/api/athletes/export')
+def export_athletes(
+    x_axis: str,
+    y_axis: str,
+    format: Literal['parquet', 'feather'] = 'parquet',
+    x_min: Optional[float] = None,
+    x_max: Optional[float] = None,
+    y_min: Optional[float] = None,
+    y_max: Optional[float] = None,
+    x_std: float = Query(0, ge=0),
+    y_std: float = Query(0, ge=0),
+    sample_size: int = Query(0, ge=0),
+    seed: int = 42,
+):
+    """Export filtered athlete data as a Parquet or Feather file.
+
+    Takes the same filters as the dashboard: axis bounds, outlier removal in
+    standard deviations and a seeded stratified sample.
+
+    Args:
+        x_axis (str): Column name for the x-axis metric.
+        y_axis (str): Column name for the y-axis metric.
+        format (str): 'parquet' or 'feather'. Defaults to 'parquet'.
+        x_min (Optional[float]): Lower bound for x-axis values.
+        x_max (Optional[float]): Upper bound for x-axis values.
+        y_min (Optional[float]): Lower bound for y-axis values.
+        y_max (Optional[float]): Upper bound for y-axis values.
+        x_std (float): Remove x-axis outliers beyond this many standard deviations (0 to disable).
+        y_std (float): Remove y-axis outliers beyond this many standard deviations (0 to disable).
+        sample_size (int): Target number of sampled athletes, 0 for all. Defaults to 0.
+        seed (int): Sampling seed. Defaults to 42.
+
+    Returns:
+        FileResponse: The export file, removed once sent.
+
+    Raises:
+        HTTPException: 422 error if an axis column is unknown, 500 error if the export fails.
+
+    """
+    fd, path = tempfile.mkstemp(suffix=f'.{format}')
+    os.close(fd)
+    try:
+        database.export_athletes(
+            path,
+            format,
+            x_axis,
+            y_axis,
+            x_thresholds=(x_min, x_max),
+            y_thresholds=(y_min, y_max),
+            standard_deviations=(x_std, y_std),
+            sample_size=sample_size,
+            seed=seed,
+        )
+    except ValueError as ex:
+        os.remove(path)
+        raise HTTPException(422, detail=str(ex))
+    except Exception as ex:
+        os.remove(path)
+        traceback.print_exc()
+        raise HTTPException(500, detail=str(ex))
+
+    return FileResponse(
+        path,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        filename=f'crossfit_data.{format}',
+        background=BackgroundTask(os.remove, path),
+    )
+
+
 @app.post('/api/athletes', status_code=201)
 def create_athlete(athlete: Athlete):
     """Create a new athlete in the database.
 
-    Validates and inserts a new athlete record with their information.
+    Validates and inserts a new athlete record with their information. When a
+    model is loaded, the new athlete is scored immediately so their predicted
+    5K time is available to the dashboard.
 
     Args:
         athlete (Athlete): Athlete data including name, age, gender, and optional scores.
@@ -51,7 +224,7 @@ def create_athlete(athlete: Athlete):
 
     """
     try:
-        return database.create_athlete(
+        result = database.create_athlete(
             name=athlete.name,
             age=athlete.age,
             gender=athlete.gender,
@@ -72,6 +245,14 @@ def create_athlete(athlete: Athlete):
         traceback.print_exc()
         raise HTTPException(500, detail=str(ex))
 
+    if predict.registry.active_version is not None:
+        try:
+            predict.score_athletes(athlete_ids=[result['athlete_id']])
+        except Exception:
+            # a missing prediction is filled in by the next batch scoring run
+            traceback.print_exc()
+    return result
+
 
 @app.get('/api/athlete/{athlete_id}', response_model=AthleteResponse)
 def get_athlete_by_id(athlete_id: int):
@@ -103,7 +284,7 @@ def get_athlete_by_id(athlete_id: int):
 
 
 @app.get('/api/predict/run5k')
-def get_run5k_prediction(
+async def get_run5k_prediction(
     age: int,
     gender: str,
     backsq: int,
@@ -117,9 +298,15 @@ def get_run5k_prediction(
     fran: float | int,
     helen: float | int,
     grace: float | int,
+    response: Response,
 ):
     """Predict 5K run time based on athlete metrics using a pre-trained model.
 
+    Cache misses are queued on the micro-batcher, which evaluates rows from
+    concurrent requests together in a single vectorized model call. The response
+    reports the model version that produced the prediction, and its X-Worker-Pid
+    header the process that served it.
+
     Args:
         age (int): Athlete's age.
         gender (str): Athlete's gender ('male' or 'female).
@@ -134,13 +321,14 @@ def get_run5k_prediction(
         fran (float|int): Fran workout time in seconds.
         helen (float|int): Helen workout time in seconds.
         grace (float|int): Grace workout time in seconds.
+        response (Response): Response used to set the X-Worker-Pid header.
 
     Returns:
-        dict: Predicted 5K run time in seconds.
+        dict: Predicted 5K run time in seconds and the model version that served it.
 
     """
     try:
-        predicted_time = predict_run5k(
+        features = predict.build_features(
             age=age,
             gender=gender,
             backsq=backsq,
@@ -155,7 +343,100 @@ def get_run5k_prediction(
             helen=helen,
             grace=grace,
         )
-        return {'predicted_run5k_time': predicted_time}
+        version = predict.registry.active_version
+        predicted_time = predict.cache.get((version, features)) if version else None
+        if predicted_time is None:
+            predicted_time, version = await batcher.submit(features)
+            predict.cache.put((version, features), predicted_time)
+        response.headers['X-Worker-Pid'] = str(os.getpid())
+        return {'predicted_run5k_time': predicted_time, 'model_version': version}
+    except Exception as ex:
+        traceback.print_exc()
+        raise HTTPException(500, detail=str(ex))
+
+
+@app.get('/api/predict/run5k/cache')
+def get_run5k_prediction_cache_stats():
+    """Get hit/miss/eviction counters for the run5k prediction cache.
+
+    Returns:
+        dict: Cache size, capacity, hit, miss and eviction counts and the hit rate.
+
+    """
+    return predict.cache.stats()
+
+
+@app.get('/api/predict/run5k/batcher')
+def get_run5k_batcher_stats():
+    """Get batch size and queue delay statistics for the prediction micro-batcher.
+
+    Returns:
+        dict: Batch and row counts, batch size distribution and queue delay in milliseconds.
+
+    """
+    return batcher.stats()
+
+
+@app.get('/api/admin/models')
+def get_models():
+    """Get the active model version and the versions available in the registry.
+
+    Returns:
+        dict: Active version and metadata, version currently loading, last load error
+            and published versions.
+
+    """
+    return predict.registry.status()
+
+
+@app.post('/api/admin/models/reload', status_code=202)
+def reload_model(version: Optional[str] = None):
+    """Load a model version in the background and swap it in when ready.
+
+    Requests keep being served by the previous model while the new one loads.
+
+    Args:
+        version (Optional[str]): Version to activate. Defaults to the registry's CURRENT version.
+
+    Returns:
+        dict: Status and the version being loaded.
+
+    Raises:
+        HTTPException: 404 error if the version does not exist, 500 error if activation fails.
+
+    """
+    try:
+        if version is not None:
+            if version not in registry.list_versions(predict.registry.registry_dir):
+                raise HTTPException(404, detail=f'Model version {version} not found')
+            registry.activate(version, predict.registry.registry_dir)
+        predict.registry.reload_in_background(version)
+        return {
+            'status': 'loading',
+            'version': version or registry.current_version(predict.registry.registry_dir),
+        }
+    except HTTPException:
+        raise
     except Exception as ex:
         traceback.print_exc()
         raise HTTPException(500, detail=str(ex))
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+def get_metrics():
+    """Expose backend metrics in the Prometheus text format.
+
+    Includes request count and latency per route and status, in-flight requests,
+    DuckDB query time and rows returned, model inference time, and the prediction
+    cache and micro-batcher statistics.
+
+    Returns:
+        str: Prometheus exposition text.
+
+    """
+    for stat, value in predict.cache.stats().items():
+        metrics.PREDICTION_CACHE.set(value, stat=stat)
+    for stat, value in batcher.stats().items():
+        if not isinstance(value, dict):
+            metrics.PREDICTION_BATCHER.set(value, stat=stat)
+    return metrics.render()
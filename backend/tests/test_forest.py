@@ -0,0 +1,148 @@
+"""Tests for the flat forest evaluator.
+
+This module checks that predictions from the exported flat arrays match the
+sklearn estimator they were exported from.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from forest import (
+    FlatForest,
+    compact_forest,
+    compact_model,
+    export_forest,
+    load_forest,
+    save_forest,
+)
+
+
+@pytest.fixture(scope='module')
+def fitted_model():
+    """Fit a small ExtraTrees model on synthetic athlete-shaped data.
+
+    Returns:
+        tuple: The fitted model and a held-out feature matrix.
+
+    """
+    rng = np.random.default_rng(42)
+    X = rng.uniform(0, 600, size=(600, 13))
+    y = X[:, 9] * 6 + X[:, 10] - X[:, 2] * 0.5 + rng.normal(0, 20, size=600)
+    model = ExtraTreesRegressor(n_estimators=25, random_state=42).fit(X[:500], y[:500])
+    return model, X[500:]
+
+
+class TestFlatForest:
+    """Test suite for export_forest and predict_forest."""
+
+    def test_predictions_match_sklearn(self, fitted_model):
+        """Test that batch and single-row predictions match sklearn exactly.
+
+        Args:
+            fitted_model (tuple): Fitted model and held-out features.
+
+        """
+        model, X = fitted_model
+        flat = FlatForest(export_forest(model))
+
+        np.testing.assert_array_equal(flat.predict(X), model.predict(X))
+        for row in X[:10]:
+            assert flat.predict([row])[0] == model.predict([row])[0]
+
+    def test_memory_mapped_round_trip(self, fitted_model, tmp_path):
+        """Test that a saved forest loads memory-mapped and predicts the same values.
+
+        Args:
+            fitted_model (tuple): Fitted model and held-out features.
+            tmp_path (Path): Temporary directory provided by pytest.
+
+        """
+        model, X = fitted_model
+        path = tmp_path / 'run5k_predictor.forest'
+        save_forest(export_forest(model), path)
+
+        arrays = load_forest(path, mmap_mode='r')
+
+        assert isinstance(arrays['threshold'], np.memmap)
+        np.testing.assert_array_equal(FlatForest(arrays).predict(X), model.predict(X))
+
+
+class TestCompactForest:
+    """Test suite for compact_forest."""
+
+    def test_compact_forest_keeps_traversal(self, fitted_model):
+        """Test that 32-bit arrays land every row on the same leaves as float64 ones.
+
+        Args:
+            fitted_model (tuple): Fitted model and held-out features.
+
+        """
+        model, X = fitted_model
+        compact = compact_forest(export_forest(model))
+
+        assert compact['threshold'].dtype == np.float32
+        assert compact['left'].dtype == np.int32
+        np.testing.assert_allclose(FlatForest(compact).predict(X), model.predict(X), rtol=1e-6)
+
+    def test_depth_cap_and_tree_subset(self, fitted_model):
+        """Test that capping depth and dropping trees removes unreachable nodes.
+
+        Args:
+            fitted_model (tuple): Fitted model and held-out features.
+
+        """
+        model, X = fitted_model
+        forest = export_forest(model)
+        capped = compact_forest(forest, max_depth=3)
+        subset = compact_forest(forest, trees=[0, 2, 4])
+
+        assert capped['max_depth'] == 3
+        assert len(capped['left']) <= len(model.estimators_) * (2**4 - 1)
+        assert capped['left'].max() < len(capped['left'])
+        reference = np.mean([model.estimators_[index].predict(X) for index in (0, 2, 4)], axis=0)
+        np.testing.assert_allclose(FlatForest(subset).predict(X), reference, rtol=1e-6)
+
+    def test_compact_model_matches_compact_forest(self, fitted_model):
+        """Test that the cut sklearn estimator predicts like the cut flat arrays.
+
+        Args:
+            fitted_model (tuple): Fitted model and held-out features.
+
+        """
+        model, X = fitted_model
+        X = X.astype(np.float32)
+        forest = export_forest(model)
+        cut = compact_model(model, max_depth=3, trees=[4, 0, 2])
+
+        assert len(cut.estimators_) == 3
+        assert all(estimator.tree_.max_depth == 3 for estimator in cut.estimators_)
+        assert len(model.estimators_) == 25
+        np.testing.assert_allclose(
+            cut.predict(X),
+            FlatForest(compact_forest(forest, max_depth=3, trees=[4, 0, 2])).predict(X),
+            rtol=1e-6,
+        )
+
+    def test_compressed_round_trip(self, fitted_model, tmp_path):
+        """Test that a compressed compact forest loads and predicts the same values.
+
+        Args:
+            fitted_model (tuple): Fitted model and held-out features.
+            tmp_path (Path): Temporary directory provided by pytest.
+
+        """
+        model, X = fitted_model
+        compact = compact_forest(export_forest(model))
+        path = tmp_path / 'model.forest.z'
+        save_forest(compact, path, compress=3)
+
+        np.testing.assert_array_equal(
+            FlatForest(load_forest(path, mmap_mode=None)).predict(X), FlatForest(compact).predict(X)
+        )
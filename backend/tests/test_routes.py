@@ -6,7 +6,7 @@ including GET and POST operations.
 
 import os
 import sys
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -297,6 +297,144 @@ class TestGetAthletes:
             assert 'athletes' in response.json()
             assert 'columns' in response.json()
 
+    def test_get_athletes_version_etag(self, client):
+        """Test that the data version is returned with an ETag that short-circuits to 304.
+
+        Args:
+            client (TestClient): FastAPI test client.
+
+        """
+        with patch('database.get_data_version', return_value='10-10-v0001-10'):
+            response = client.get('/api/athletes/version')
+            assert response.status_code == 200
+            assert response.json() == {'version': '10-10-v0001-10'}
+            etag = response.headers['etag']
+
+            response = client.get('/api/athletes/version', headers={'If-None-Match': etag})
+            assert response.status_code == 304
+            assert response.headers['etag'] == etag
+
+    def test_get_athletes_navigation(self, client):
+        """Test neighbours and position lookup, defaulting to the first athlete.
+
+        Args:
+            client (TestClient): FastAPI test client.
+
+        """
+        navigation = {
+            'athlete_id': 2554,
+            'previous_id': 2553,
+            'next_id': 2560,
+            'previous_ids': [2553, 2550],
+            'next_ids': [2560, 2561],
+            'position': 40,
+            'total': 100,
+        }
+        with patch('database.get_athlete_navigation', return_value=navigation) as mock_nav:
+            response = client.get(
+                '/api/athletes/navigation', params={'athlete_id': 2554, 'window': 2}
+            )
+            assert response.status_code == 200
+            assert response.json() == navigation
+            mock_nav.assert_called_once_with(2554, window=2)
+
+            client.get('/api/athletes/navigation')
+            mock_nav.assert_called_with(None, window=1)
+
+            response = client.get('/api/athletes/navigation', params={'window': 0})
+            assert response.status_code == 422
+
+        with patch('database.get_athlete_navigation', return_value=None):
+            response = client.get('/api/athletes/navigation', params={'athlete_id': 99999})
+            assert response.status_code == 404
+
+    def test_export_athletes_file(self, client):
+        """Test that filtered athletes are exported as a file with the dashboard filters.
+
+        Args:
+            client (TestClient): FastAPI test client.
+
+        """
+
+        def write_export(path, file_format, *args, **kwargs):
+            with open(path, 'wb') as f:
+                f.write(b'PAR1')
+            return 1
+
+        with patch('database.export_athletes', side_effect=write_export) as mock_export:
+            response = client.get(
+                '/api/athletes/export',
+                params={
+                    'x_axis': 'fran',
+                    'y_axis': 'run5k',
+                    'x_max': 1000,
+                    'y_std': 3,
+                    'sample_size': 1000,
+                },
+            )
+            assert response.status_code == 200
+            assert response.content == b'PAR1'
+            assert response.headers['content-type'] == 'application/vnd.apache.parquet'
+            args, kwargs = mock_export.call_args
+            assert args[1:] == ('parquet', 'fran', 'run5k')
+            assert kwargs['x_thresholds'] == (None, 1000)
+            assert kwargs['standard_deviations'] == (0, 3)
+            assert kwargs['sample_size'] == 1000
+            assert not os.path.exists(args[0])
+
+        with patch('database.export_athletes', side_effect=ValueError('Unknown column nope')):
+            response = client.get(
+                '/api/athletes/export', params={'x_axis': 'nope', 'y_axis': 'fran'}
+            )
+            assert response.status_code == 422
+
+        response = client.get(
+            '/api/athletes/export', params={'x_axis': 'fran', 'y_axis': 'run5k', 'format': 'csv'}
+        )
+        assert response.status_code == 422
+
+    def test_export_sample_matches_dashboard_sample(self, tmp_path, monkeypatch):
+        """Test that the export samples the athletes the dashboard's sample rule picks.
+
+        The expected ids are what frontend/src/plot.py's _stratified_sample draws from
+        the same athletes with the same seed; its tests assert the same list.
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+            monkeypatch (MonkeyPatch): Pytest fixture for changing the working directory.
+
+        """
+        import database
+        import duckdb
+        import pyarrow.parquet as pq
+
+        monkeypatch.chdir(tmp_path)
+        with duckdb.connect('athletes.duckdb') as conn:
+            conn.execute(
+                'CREATE TABLE athletes (athlete_id DOUBLE, name VARCHAR, affiliate VARCHAR, '
+                'region VARCHAR, team VARCHAR, gender VARCHAR, age DOUBLE, fran DOUBLE, '
+                'run5k DOUBLE)'
+            )
+            conn.executemany(
+                'INSERT INTO athletes (athlete_id, gender, age, fran, run5k) VALUES (?, ?, ?, ?, ?)',
+                [
+                    [i, 'Female' if i % 5 == 0 else 'Male', 20 + i % 40, i, 1500]
+                    for i in range(1, 201)
+                ],
+            )
+
+        rows = database.export_athletes(
+            'sample.parquet', 'parquet', 'fran', 'run5k', sample_size=20, seed=42
+        )
+
+        # fran equals athlete_id in this table, so it identifies the sampled athletes
+        sampled = sorted(
+            int(value) for value in pq.read_table('sample.parquet')['fran'].to_pylist()
+        )
+        dashboard_sample = '5 18 26 39 47 52 60 73 81 94 107 115 128 136 149 162 170 183 191 196'
+        assert rows == 20
+        assert sampled == [int(athlete_id) for athlete_id in dashboard_sample.split()]
+
 
 class TestGetAthlete:
     """Test suite for GET /api/athlete/{athlete_id} endpoint."""
@@ -409,3 +547,442 @@ class TestGetAthlete:
             data = response.json()
             assert 'detail' in data
             mock_get.assert_called_with(1)
+
+
+class TestPredictRun5kCache:
+    """Test suite for the run5k prediction cache."""
+
+    def test_repeated_prediction_served_from_cache(self, client):
+        """Test that identical feature vectors only evaluate the model once.
+
+        Verifies that:
+        - The first request is a cache miss and calls the model
+        - A repeated request (differing only below the cache precision) is a hit
+        - The response reports the serving model version and worker process
+        - The stats endpoint reports the hit and miss counters
+
+        Args:
+            client (TestClient): FastAPI test client.
+
+        """
+        import predict
+        from registry import FEATURE_COLUMNS, LoadedModel
+
+        params = {
+            'age': 25,
+            'gender': 'male',
+            'backsq': 315,
+            'deadlift': 405,
+            'snatch': 185,
+            'candj': 225,
+            'pullups': 30,
+            'weight': 180.0,
+            'height': 70.0,
+            'run400': 75,
+            'fran': 240,
+            'helen': 520,
+            'grace': 195,
+        }
+        model = Mock()
+        model.predict.return_value = [1320.5]
+        predict.cache.clear()
+        predict.cache.hits = predict.cache.misses = predict.cache.evictions = 0
+
+        loaded = LoadedModel('v0001', model, {'feature_order': FEATURE_COLUMNS})
+
+        with patch.object(predict.registry, '_active', loaded):
+            first = client.get('/api/predict/run5k', params=params)
+            second = client.get('/api/predict/run5k', params={**params, 'weight': 180.01})
+
+        assert first.status_code == 200
+        assert first.json()['model_version'] == 'v0001'
+        assert first.headers['X-Worker-Pid'] == str(os.getpid())
+        assert second.json()['predicted_run5k_time'] == first.json()['predicted_run5k_time']
+        model.predict.assert_called_once()
+
+        stats = client.get('/api/predict/run5k/cache').json()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test that the cache stays bounded and evicts the oldest entry."""
+        from predict import PredictionCache
+
+        cache = PredictionCache(maxsize=2)
+        cache.put((1.0,), 1.0)
+        cache.put((2.0,), 2.0)
+        assert cache.get((1.0,)) == 1.0
+        cache.put((3.0,), 3.0)
+
+        assert cache.get((2.0,)) is None
+        assert cache.get((1.0,)) == 1.0
+        assert cache.stats()['evictions'] == 1
+
+
+class TestMicroBatcher:
+    """Test suite for the prediction micro-batcher."""
+
+    def test_concurrent_rows_share_one_batch(self):
+        """Test that rows submitted within one window are evaluated in a single call.
+
+        Verifies that:
+        - Every caller receives the prediction for its own row
+        - The predict function is called once with all rows
+        - Batch size statistics reflect the coalesced batch
+
+        """
+        import asyncio
+
+        from batching import MicroBatcher
+
+        calls = []
+
+        def predict_batch(rows):
+            calls.append(rows)
+            return [row[0] * 10 for row in rows]
+
+        async def submit_all():
+            batcher = MicroBatcher(predict_batch, max_batch_size=64, window_ms=20)
+            results = await asyncio.gather(*(batcher.submit((float(i),)) for i in range(5)))
+            return batcher, results
+
+        batcher, results = asyncio.run(submit_all())
+
+        assert results == [0.0, 10.0, 20.0, 30.0, 40.0]
+        assert len(calls) == 1
+        assert batcher.stats()['max_batch_size'] == 5
+
+    def test_close_waits_for_pending_rows(self):
+        """Test that closing the batcher flushes queued rows and awaits running batches.
+
+        Verifies that:
+        - A row still waiting for its window is evaluated on close
+        - No batch task is left behind once close returns
+
+        """
+        import asyncio
+
+        from batching import MicroBatcher
+
+        async def submit_and_close():
+            batcher = MicroBatcher(lambda rows: [row[0] * 10 for row in rows], window_ms=60_000)
+            submitted = asyncio.ensure_future(batcher.submit((1.0,)))
+            await asyncio.sleep(0)
+            await batcher.close()
+            return batcher, await submitted
+
+        batcher, result = asyncio.run(submit_and_close())
+
+        assert result == 10.0
+        assert not batcher._tasks
+        assert batcher.stats()['pending'] == 0
+
+    def test_batch_size_buckets_overflow(self):
+        """Test that batches above the largest bound land in the +Inf bucket.
+
+        Verifies that:
+        - A batch equal to a bound is counted in that bound's bucket
+        - A batch larger than every bound is counted in '+Inf', not the last bound
+
+        """
+        import asyncio
+
+        from batching import BATCH_SIZE_BUCKETS, MicroBatcher
+
+        async def submit_all(count):
+            batcher = MicroBatcher(
+                lambda rows: [row[0] for row in rows], max_batch_size=1000, window_ms=20
+            )
+            await asyncio.gather(*(batcher.submit((float(i),)) for i in range(count)))
+            return batcher.stats()['batch_size_buckets']
+
+        largest = BATCH_SIZE_BUCKETS[-1]
+        assert asyncio.run(submit_all(largest))[largest] == 1
+        buckets = asyncio.run(submit_all(largest + 1))
+        assert buckets[largest] == 0
+        assert buckets['+Inf'] == 1
+
+
+class TestModelRegistry:
+    """Test suite for the versioned model registry."""
+
+    def test_publish_and_hot_reload(self, tmp_path):
+        """Test that a newly published version is swapped in without touching readers.
+
+        Verifies that:
+        - Published versions get increasing names and metadata with the feature order
+        - A reader holding the old LoadedModel keeps it after the swap
+        - Swap listeners are notified with the new version
+        - The compressed forest archive is inflated for memory-mapping on first load
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+
+        """
+        import numpy as np
+        from registry import FEATURE_COLUMNS, ModelRegistry, publish, read_metadata
+        from sklearn.ensemble import ExtraTreesRegressor
+
+        X = np.random.default_rng(0).uniform(0, 100, size=(50, len(FEATURE_COLUMNS)))
+        model = ExtraTreesRegressor(n_estimators=3, random_state=0).fit(X, X[:, 0])
+
+        assert publish(model, {'test_r2': 0.5}, registry_dir=str(tmp_path)) == 'v0001'
+        model_registry = ModelRegistry(registry_dir=str(tmp_path), engine='forest')
+        swapped = []
+        model_registry.add_listener(lambda loaded: swapped.append(loaded.version))
+        in_flight = model_registry.active
+
+        assert publish(model, {'test_r2': 0.6}, registry_dir=str(tmp_path)) == 'v0002'
+        model_registry.reload_in_background().join()
+
+        assert in_flight.version == 'v0001'
+        assert model_registry.active.version == 'v0002'
+        assert swapped == ['v0001', 'v0002']
+        assert read_metadata('v0002', str(tmp_path))['feature_order'] == FEATURE_COLUMNS
+        assert (tmp_path / 'v0002' / 'model.forest.z').exists()
+        assert (tmp_path / 'v0002' / 'model.forest').exists()
+        np.testing.assert_allclose(model_registry.active.model.predict(X), model.predict(X))
+
+    def test_list_versions_skips_staging_and_sorts_numerically(self, tmp_path):
+        """Test that only published versions are listed, in numeric order.
+
+        Verifies that:
+        - A staging directory with metadata is not listed as a version
+        - v10000 sorts after v9999
+        - Publishing next to a crashed publish's staging directory removes it and
+          numbers the new version after the highest published one
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+
+        """
+        import time
+
+        import numpy as np
+        import registry
+        from sklearn.ensemble import ExtraTreesRegressor
+
+        for name in ['v9999', 'v10000', '.staging-crashed', 'notes']:
+            (tmp_path / name).mkdir()
+            (tmp_path / name / registry.METADATA_FILE).write_text('{}')
+        stale = time.time() - registry.STAGING_MAX_AGE_SECONDS - 1
+        os.utime(tmp_path / '.staging-crashed', (stale, stale))
+
+        assert registry.list_versions(str(tmp_path)) == ['v9999', 'v10000']
+
+        X = np.random.default_rng(0).uniform(0, 100, size=(20, len(registry.FEATURE_COLUMNS)))
+        model = ExtraTreesRegressor(n_estimators=2, random_state=0).fit(X, X[:, 0])
+        version = registry.publish(model, {}, registry_dir=str(tmp_path), make_current=False)
+
+        assert version == 'v10001'
+        assert not (tmp_path / '.staging-crashed').exists()
+        assert not [path for path in tmp_path.iterdir() if path.name.startswith('.staging-')]
+
+    def test_concurrent_first_use_loads_once(self, tmp_path):
+        """Test that requests racing on a cold registry share one load.
+
+        Verifies that:
+        - The version is read from disk once
+        - Listeners are notified once, and not again when the same version is reloaded
+        - Every caller gets the same LoadedModel
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+
+        """
+        import threading
+        import time
+
+        import registry
+        from registry import LoadedModel, ModelRegistry
+
+        loads = []
+
+        def load_version(version, registry_dir, engine):
+            loads.append(version)
+            time.sleep(0.05)
+            return LoadedModel(version, Mock(), {})
+
+        model_registry = ModelRegistry(registry_dir=str(tmp_path))
+        swapped = []
+        model_registry.add_listener(lambda loaded: swapped.append(loaded.version))
+        results = []
+        barrier = threading.Barrier(8)
+
+        def read_active():
+            barrier.wait()
+            results.append(model_registry.active)
+
+        with patch.object(registry, 'load_version', load_version):
+            threads = [threading.Thread(target=read_active) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            model_registry.load('legacy')
+
+        assert loads == ['legacy', 'legacy']
+        assert swapped == ['legacy']
+        assert len({id(loaded) for loaded in results}) == 1
+
+
+class TestPredictionScoring:
+    """Test suite for precomputed predictions."""
+
+    @pytest.fixture
+    def athletes_db(self, tmp_path, monkeypatch):
+        """Create an empty athletes database with the predictions table in a temp directory.
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+            monkeypatch (MonkeyPatch): Pytest fixture for changing the working directory.
+
+        Returns:
+            str: Path of the database file.
+
+        """
+        import database
+        import duckdb
+
+        monkeypatch.chdir(tmp_path)
+        numeric_columns = [
+            'age',
+            'height',
+            'weight',
+            'fran',
+            'helen',
+            'grace',
+            'filthy50',
+            'fgonebad',
+            'run400',
+            'run5k',
+            'candj',
+            'snatch',
+            'deadlift',
+            'backsq',
+            'pullups',
+        ]
+        columns = ', '.join(f'{column} DOUBLE' for column in numeric_columns)
+        with duckdb.connect('athletes.duckdb') as conn:
+            conn.execute(
+                f'CREATE TABLE athletes (athlete_id DOUBLE, name VARCHAR, gender VARCHAR, {columns})'
+            )
+        database.init_schema()
+        return str(tmp_path / 'athletes.duckdb')
+
+    def test_init_schema_waits_for_another_process_lock(self, athletes_db):
+        """Test that init_schema retries while another worker process holds the database.
+
+        Args:
+            athletes_db (str): Path of the temporary athletes database.
+
+        """
+        import subprocess
+        import sys
+
+        import database
+
+        holder = subprocess.Popen(
+            [
+                sys.executable,
+                '-c',
+                'import duckdb, time; conn = duckdb.connect("athletes.duckdb"); '
+                'print("locked", flush=True); time.sleep(1)',
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        assert holder.stdout.readline().strip() == 'locked'
+
+        database.init_schema(lock_timeout=10)
+
+        assert holder.poll() == 0
+
+    def test_create_athlete_scores_new_athlete(self, client, athletes_db):
+        """Test that a created athlete is scored with missing features imputed.
+
+        The athlete has no weight or height, which the create endpoint does not accept,
+        so those features come from the model's training means.
+
+        Args:
+            client (TestClient): FastAPI test client.
+            athletes_db (str): Path of the temporary athletes database.
+
+        """
+        import duckdb
+        import predict
+        from registry import FEATURE_COLUMNS, LoadedModel
+
+        model = Mock()
+        model.predict.return_value = [1500.0]
+        feature_stats = {column: {'mean': 100.0, 'std': 10.0} for column in FEATURE_COLUMNS}
+        loaded = LoadedModel(
+            'v0003', model, {'feature_order': FEATURE_COLUMNS, 'feature_stats': feature_stats}
+        )
+
+        with patch.object(predict.registry, '_active', loaded):
+            response = client.post(
+                '/api/athletes', json={'name': 'New Athlete', 'age': 30, 'backsq': 300}
+            )
+
+        assert response.status_code == 201
+        athlete_id = response.json()['athlete_id']
+        with duckdb.connect(athletes_db) as conn:
+            rows = conn.execute(
+                'SELECT athlete_id, model_version, predicted_run5k FROM predictions'
+            ).fetchall()
+        assert rows == [(athlete_id, 'v0003', 1500.0)]
+
+        (features,) = model.predict.call_args[0][0]
+        assert features[FEATURE_COLUMNS.index('age')] == 30
+        assert features[FEATURE_COLUMNS.index('backsq')] == 300
+        assert features[FEATURE_COLUMNS.index('weight')] == 100.0
+        assert features[FEATURE_COLUMNS.index('gender')] == 0
+
+    def test_create_athlete_without_feature_stats_skips_incomplete_athlete(
+        self, client, athletes_db
+    ):
+        """Test that a model without feature_stats only scores complete athletes.
+
+        Args:
+            client (TestClient): FastAPI test client.
+            athletes_db (str): Path of the temporary athletes database.
+
+        """
+        import duckdb
+        import predict
+        from registry import FEATURE_COLUMNS, LoadedModel
+
+        model = Mock()
+        loaded = LoadedModel('legacy', model, {'feature_order': FEATURE_COLUMNS})
+
+        with patch.object(predict.registry, '_active', loaded):
+            response = client.post('/api/athletes', json={'name': 'New Athlete', 'age': 30})
+
+        assert response.status_code == 201
+        with duckdb.connect(athletes_db) as conn:
+            assert conn.execute('SELECT count(*) FROM predictions').fetchone() == (0,)
+        model.predict.assert_not_called()
+
+
+class TestMetrics:
+    """Test suite for GET /metrics endpoint."""
+
+    def test_metrics_exposes_route_histograms(self, client):
+        """Test that handled requests show up as per-route counters and histograms.
+
+        Args:
+            client (TestClient): FastAPI test client.
+
+        """
+        with patch('database.get_athlete', return_value=None):
+            client.get('/api/athlete/7')
+
+        response = client.get('/metrics')
+
+        assert response.status_code == 200
+        body = response.text
+        assert 'http_requests_total{route="/api/athlete/{athlete_id}",status="404"}' in body
+        assert 'http_request_duration_seconds_bucket{route="/api/athlete/{athlete_id}"' in body
+        assert '# TYPE duckdb_query_duration_seconds histogram' in body
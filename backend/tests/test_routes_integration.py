@@ -7,6 +7,7 @@ testing real database operations rather than mocked responses.
 import os
 import sys
 
+import duckdb
 import pytest
 from fastapi.testclient import TestClient
 
@@ -16,6 +17,24 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from routes import app
 
 
+def _dataset_loaded() -> bool:
+    """Check whether the athletes database holds the real dataset.
+
+    Returns:
+        bool: True if the athletes table exists and has rows, False otherwise.
+
+    """
+    try:
+        with duckdb.connect('athletes.duckdb', read_only=True) as conn:
+            return conn.execute('SELECT count(*) FROM athletes').fetchone()[0] > 0
+    except duckdb.Error:
+        return False
+
+
+# these tests query the real athletes table; the tracked athletes.duckdb is empty
+pytestmark = pytest.mark.skipif(not _dataset_loaded(), reason='athletes dataset not loaded')
+
+
 @pytest.fixture
 def client():
     """Create a test client for the FastAPI app.
@@ -0,0 +1,677 @@
+"""Tests for the training pipeline stages.
+
+This module checks drift detection, warm-start incremental fitting, finalist
+selection, the shared search matrix, the imputers, the training cache, the
+outlier filter, the search strategies and the training sample, using temporary
+databases instead of the athletes database.
+"""
+
+import argparse
+import os
+import sys
+from types import SimpleNamespace
+
+import duckdb
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.ensemble import ExtraTreesRegressor
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import trainer
+from registry import FEATURE_COLUMNS
+
+
+def _athletes(rng, n, shift=0.0):
+    """Build a cleaned, athlete-shaped training frame.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        n (int): Number of rows.
+        shift (float): Amount added to every feature.
+
+    Returns:
+        pd.DataFrame: Frame with every training column.
+
+    """
+    df = pd.DataFrame(
+        rng.normal(100, 10, size=(n, len(trainer.TRAINING_COLUMNS))) + shift,
+        columns=trainer.TRAINING_COLUMNS,
+    )
+    df['gender'] = rng.integers(0, 2, n)
+    return df
+
+
+class TestIncrementalTraining:
+    """Test suite for drift metrics and warm-start fitting."""
+
+    def test_mean_shift_flags_moved_columns(self):
+        """Test that the standardized mean shift grows with the distribution change."""
+        rng = np.random.default_rng(0)
+        stats = trainer._feature_stats(_athletes(rng, 2000))
+
+        same = trainer._mean_shift(stats, _athletes(rng, 2000))
+        shifted = trainer._mean_shift(stats, _athletes(rng, 2000, shift=10))
+
+        assert max(same.values()) < trainer.DRIFT_THRESHOLD
+        assert shifted['run5k'] > 0.9
+
+    def test_fit_stage_adds_trees_for_new_rows(self):
+        """Test that an incremental fit keeps the old trees and adds proportionally more."""
+        rng = np.random.default_rng(0)
+        base = _athletes(rng, 200)
+        base_model = ExtraTreesRegressor(n_estimators=20, random_state=42)
+        base_model.fit(base[FEATURE_COLUMNS], base['run5k'])
+        old_trees = list(base_model.estimators_)
+        new_rows = _athletes(rng, 100)
+
+        state = {
+            'incremental': True,
+            'base_model': base_model,
+            'base_metadata': {'training_rows': 200},
+            'X_train': new_rows[FEATURE_COLUMNS],
+            'y_train': new_rows['run5k'],
+            'X_test': base[FEATURE_COLUMNS],
+        }
+        update = trainer.fit_stage(state, argparse.Namespace(n_jobs=1))
+        model = update['model']
+
+        assert model.n_estimators == 30
+        assert update['serving']['size_mb'] > 0
+        assert model.estimators_[:20] == old_trees
+        assert not model.warm_start
+
+    def test_clean_stage_reports_drift_as_fallback_reason(self, monkeypatch, capsys):
+        """Test that a drift fallback reloads fully and prints the drift as the reason.
+
+        Args:
+            monkeypatch (pytest.MonkeyPatch): Fixture used to replace model and data loading.
+            capsys (pytest.CaptureFixture): Fixture capturing printed output.
+
+        """
+        rng = np.random.default_rng(0)
+        base = _athletes(rng, 200)
+        base_model = ExtraTreesRegressor(n_estimators=5, random_state=42)
+        base_model.fit(base[FEATURE_COLUMNS], base['run5k'])
+        reloads = []
+
+        def load_stage(state, args):
+            reloads.append(state)
+            return {'incremental': False, 'cleaned': base, 'raw': None}
+
+        monkeypatch.setattr(
+            trainer.registry,
+            'load_version',
+            lambda version, engine: argparse.Namespace(model=base_model),
+        )
+        monkeypatch.setattr(trainer, 'load_stage', load_stage)
+        state = {
+            'incremental': True,
+            'cleaned': _athletes(rng, 100, shift=10),
+            'base_version': 'v0001',
+            'base_metadata': {'feature_stats': trainer._feature_stats(base), 'test_r2': 0.0},
+        }
+        args = argparse.Namespace(min_new_rows=1, drift_threshold=0.5, max_r2_drop=100.0)
+
+        update = trainer.clean_stage(state, args)
+
+        output = capsys.readouterr().out
+        assert reloads == [{'incremental': False}]
+        assert 'mean shift' in output
+        assert 'R² drop' not in output
+        assert 'No published model' not in output
+        assert len(update['X_train']) + len(update['X_test']) == len(base)
+
+
+class TestFinalistSelection:
+    """Test suite for choosing among search finalists under a serving budget."""
+
+    def test_select_finalist_respects_latency_budget(self):
+        """Test that the most accurate finalist loses to a cheaper one over budget."""
+        rng = np.random.default_rng(0)
+        df = _athletes(rng, 300)
+        big = {'n_estimators': 40, 'max_depth': None}
+        small = {'n_estimators': 2, 'max_depth': 2}
+        candidates = [{'params': big, 'score': 0.9}, {'params': small, 'score': 0.8}]
+        state = {
+            'search': {'candidates': candidates},
+            'best_params': big,
+            'X_train': df[FEATURE_COLUMNS],
+            'y_train': df['run5k'],
+            'X_test': df[FEATURE_COLUMNS],
+        }
+        args = argparse.Namespace(
+            finalists=2, max_latency_ms=None, max_size_mb=None, n_jobs=1, engine='sklearn'
+        )
+        unlimited = trainer._select_finalist(state, args)
+
+        args.max_size_mb = unlimited['finalists'][1]['size_mb']
+        budgeted = trainer._select_finalist(state, args)
+
+        assert unlimited['best_params'] == big
+        assert budgeted['best_params'] == small
+        assert budgeted['model'].n_estimators == 2
+        assert not budgeted['finalists'][0]['within_budget']
+
+    def test_measure_serving_uses_published_artifacts(self, monkeypatch):
+        """Test that serving is measured on the published artifacts with the requested engine.
+
+        Args:
+            monkeypatch (pytest.MonkeyPatch): Fixture used to observe load_version.
+
+        """
+        import registry
+        from forest import FlatForest
+
+        rng = np.random.default_rng(0)
+        df = _athletes(rng, 300)
+        model = ExtraTreesRegressor(n_estimators=5, random_state=0)
+        model.fit(df[FEATURE_COLUMNS].to_numpy(), df['run5k'])
+        load_version = registry.load_version
+        loaded, sizes = [], []
+
+        def observed_load_version(version, registry_dir, engine):
+            published = os.path.join(registry_dir, version)
+            sizes.append(
+                sum(
+                    os.path.getsize(os.path.join(published, name))
+                    for name in (registry.MODEL_FILE, registry.FOREST_ARCHIVE_FILE)
+                )
+            )
+            loaded.append(load_version(version, registry_dir, engine=engine))
+            return loaded[-1]
+
+        monkeypatch.setattr(registry, 'load_version', observed_load_version)
+        reports = [
+            trainer._measure_serving(model, df[FEATURE_COLUMNS], engine=engine, repeat=5)
+            for engine in ('sklearn', 'forest')
+        ]
+
+        assert isinstance(loaded[0].model, ExtraTreesRegressor)
+        assert isinstance(loaded[1].model, FlatForest)
+        assert [report['engine'] for report in reports] == ['sklearn', 'forest']
+        assert [report['size_mb'] for report in reports] == [size / 1024**2 for size in sizes]
+
+
+class TestSearchWorkers:
+    """Test suite for the shared training matrix and the search worker count."""
+
+    def test_share_matrix_is_read_only_float32(self, tmp_path):
+        """Test that shared training data is a read-only float32 memmap.
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+
+        """
+        df = _athletes(np.random.default_rng(0), 50)
+
+        shared = trainer._share_matrix(df[FEATURE_COLUMNS], str(tmp_path), 'X_train')
+
+        assert isinstance(shared, np.memmap)
+        assert shared.dtype == np.float32
+        assert not shared.flags.writeable
+        np.testing.assert_array_equal(shared, df[FEATURE_COLUMNS].to_numpy(np.float32))
+
+    def test_search_stage_removes_shared_files(self, tmp_path, monkeypatch):
+        """Test that the shared matrix files exist during the search and are deleted after.
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+            monkeypatch (pytest.MonkeyPatch): Fixture used to redirect the cache directory
+                and replace the search.
+
+        """
+        monkeypatch.setattr(trainer, 'TRAINING_CACHE_DIR', str(tmp_path))
+        shared_files = []
+
+        def run_search(strategy, estimator, param_grid, X, y, budget_seconds, n_jobs=-1):
+            shared_files.extend([X.filename, y.filename])
+            assert all(os.path.exists(path) for path in shared_files)
+            return {
+                'best_params': {},
+                'best_score': 0.5,
+                'evaluated': 1,
+                'discarded': 0,
+                'search_time': 0.0,
+            }
+
+        monkeypatch.setattr(trainer, '_run_search', run_search)
+        df = _athletes(np.random.default_rng(0), 50)
+        state = {'incremental': False, 'X_train': df[FEATURE_COLUMNS], 'y_train': df['run5k']}
+        args = argparse.Namespace(search='grid', budget=60, n_jobs=1, worker_memory_mb=None)
+
+        trainer.search_stage(state, args)
+
+        assert len(shared_files) == 2
+        assert os.listdir(tmp_path) == []
+
+    def test_worker_count_without_available_memory(self, monkeypatch):
+        """Test that the requested workers are kept when available memory is unknown.
+
+        Args:
+            monkeypatch (pytest.MonkeyPatch): Fixture used to make os.sysconf unsupported.
+
+        """
+
+        def sysconf(name):
+            raise ValueError(f'unrecognized configuration name: {name}')
+
+        monkeypatch.setattr(os, 'sysconf', sysconf)
+
+        assert trainer._worker_count(2, worker_memory_mb=100) == 2
+
+
+def _realistic_athletes(rng, n):
+    """Build a raw athlete frame with every value inside OUTLIER_RANGES.
+
+    Args:
+        rng (np.random.Generator): Random generator.
+        n (int): Number of rows.
+
+    Returns:
+        pd.DataFrame: Frame with every training column and no missing values.
+
+    """
+    df = pd.DataFrame(
+        {
+            column: rng.uniform(lower, upper, n)
+            for column, (lower, upper) in trainer.OUTLIER_RANGES.items()
+        }
+    )
+    df['gender'] = rng.integers(0, 2, n).astype(float)
+    return df[trainer.TRAINING_COLUMNS]
+
+
+class TestImputers:
+    """Test suite for the imputation strategies and their benchmark."""
+
+    def test_knn_fills_only_missing_cells_from_neighbours(self):
+        """Test that knn imputation leaves observed cells alone and averages the nearest rows."""
+        first = np.arange(20, dtype=float)
+        values = np.column_stack([first, first * 10])
+        values = np.vstack([values, [[7.5, np.nan], [np.nan, 135.0]]])
+
+        imputed = trainer._impute_knn(values, None, n_neighbors=2, weights='uniform')
+
+        observed = ~np.isnan(values)
+        np.testing.assert_array_equal(imputed[observed], values[observed])
+        assert imputed[20, 1] == 75.0
+        assert imputed[21, 0] == 13.5
+
+    def test_group_median_falls_back_to_overall_median(self):
+        """Test that group medians fill gaps and an all-missing group gets the overall median."""
+        df = pd.DataFrame(1.0, index=range(7), columns=trainer.TRAINING_COLUMNS)
+        df['gender'] = [1, 1, 1, 0, 0, 0, 0]
+        df['age'] = [25, 27, 29, 22, 24, 28, 45]
+        df['backsq'] = [200, 220, np.nan, 120, 140, np.nan, np.nan]
+
+        imputed = trainer._impute_missing_values(df, 'group_median')
+
+        assert trainer.IMPUTERS['group_median'] is trainer._impute_group_median
+        assert imputed['backsq'].tolist() == [200, 220, 210, 120, 140, 130, 170]
+
+    def test_benchmark_reports_every_strategy(self, monkeypatch, capsys):
+        """Test that the imputer benchmark reports a time and score row per strategy.
+
+        Args:
+            monkeypatch (pytest.MonkeyPatch): Fixture used to shrink the benchmark model.
+            capsys (pytest.CaptureFixture): Fixture used to read the printed table.
+
+        """
+        monkeypatch.setattr(
+            trainer,
+            'ExtraTreesRegressor',
+            lambda **params: ExtraTreesRegressor(**{**params, 'n_estimators': 5, 'n_jobs': 1}),
+        )
+        raw = _realistic_athletes(np.random.default_rng(0), 200)
+        raw = raw.mask(np.random.default_rng(1).random(raw.shape) < 0.1)
+        raw['gender'] = raw['gender'].fillna(0)
+
+        results = trainer._benchmark_imputers(raw)
+
+        assert [result['strategy'] for result in results] == list(trainer.IMPUTERS)
+        for result in results:
+            assert result['fit_seconds'] >= 0
+            assert result['rows'] == 200
+            assert np.isfinite(result['test_r2'])
+        table = capsys.readouterr().out.splitlines()
+        assert all(any(line.split()[:1] == [name] for line in table) for name in trainer.IMPUTERS)
+
+
+def _athletes_database(path, df):
+    """Write an athletes table shaped like the production one.
+
+    Args:
+        path (str): Path of the DuckDB database file.
+        df (pd.DataFrame): Rows with every training column and a 0/1 gender.
+
+    Returns:
+        duckdb.DuckDBPyConnection: Connection to the new database.
+
+    """
+    conn = duckdb.connect(str(path))
+    conn.register('rows', df.assign(athlete_id=range(1, len(df) + 1)))
+    conn.execute(
+        "CREATE TABLE athletes AS SELECT * REPLACE (CASE WHEN gender = 1 THEN 'Male' "
+        "ELSE 'Female' END AS gender) FROM rows"
+    )
+    conn.unregister('rows')
+    return conn
+
+
+class TestTrainingCache:
+    """Test suite for the cleaned training set cache key and the cached load."""
+
+    def test_key_follows_rows_and_cleaning_config(self, tmp_path, monkeypatch):
+        """Test that changing the rows, the imputer or the outlier ranges changes the key.
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+            monkeypatch (pytest.MonkeyPatch): Fixture used to change the outlier ranges.
+
+        """
+        conn = _athletes_database(
+            tmp_path / 'athletes.duckdb', _realistic_athletes(np.random.default_rng(0), 50)
+        )
+        config = {'strategy': 'median', 'n_neighbors': 10, 'weights': 'distance'}
+        key = trainer._training_cache_path(conn, config)
+
+        assert trainer._training_cache_path(conn, dict(config)) == key
+        assert trainer._training_cache_path(conn, {**config, 'strategy': 'knn'}) != key
+        assert trainer._training_cache_path(conn, {**config, 'n_neighbors': 5}) != key
+
+        conn.execute('UPDATE athletes SET backsq = backsq + 1 WHERE athlete_id = 7')
+        changed_rows = trainer._training_cache_path(conn, config)
+        assert changed_rows != key
+
+        monkeypatch.setitem(trainer.OUTLIER_RANGES, 'backsq', (100, 500))
+        assert trainer._training_cache_path(conn, config) != changed_rows
+
+    def test_second_run_reads_cache_without_imputing(self, tmp_path, monkeypatch):
+        """Test that a repeated load returns the cached cleaned set and skips imputation.
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+            monkeypatch (pytest.MonkeyPatch): Fixture used to move into tmp_path and
+                watch imputation.
+
+        """
+        raw = _realistic_athletes(np.random.default_rng(0), 80)
+        raw.loc[::5, 'fran'] = np.nan
+        _athletes_database(tmp_path / 'athletes.duckdb', raw).close()
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(trainer, 'TRAINING_CACHE_DIR', str(tmp_path / 'cache'))
+        args = argparse.Namespace(
+            imputer='median', incremental=False, sample_size=None, seed=42, no_cache=False
+        )
+
+        state = trainer.load_stage({}, args)
+        state.update(trainer.clean_stage(state, args))
+        first = state['cleaned']
+
+        def impute(*args, **kwargs):
+            raise AssertionError('cached data was imputed again')
+
+        monkeypatch.setattr(trainer, '_impute_missing_values', impute)
+        cached = trainer.load_stage({}, args)
+        cached.update(trainer.clean_stage(cached, args))
+
+        assert cached['cache_path'] == state['cache_path']
+        pd.testing.assert_frame_equal(
+            cached['cleaned'].reset_index(drop=True),
+            first.reset_index(drop=True),
+            check_dtype=False,
+        )
+
+    def test_unreadable_cache_falls_back_to_full_load(self, tmp_path, monkeypatch):
+        """Test that a corrupt or missing cache file leads to a full load.
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+            monkeypatch (pytest.MonkeyPatch): Fixture used to move into tmp_path and
+                make the cache vanish after the existence check.
+
+        """
+        _athletes_database(
+            tmp_path / 'athletes.duckdb', _realistic_athletes(np.random.default_rng(0), 30)
+        ).close()
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(trainer, 'TRAINING_CACHE_DIR', str(tmp_path / 'cache'))
+        args = argparse.Namespace(
+            imputer='median', incremental=False, sample_size=None, seed=42, no_cache=False
+        )
+        cache_path = trainer.load_stage({}, args)['cache_path']
+        os.makedirs(os.path.dirname(cache_path))
+        with open(cache_path, 'wb') as f:
+            f.write(b'PAR1 truncated')
+
+        corrupt = trainer.load_stage({}, args)
+        os.remove(cache_path)
+        monkeypatch.setattr(os.path, 'exists', lambda path: True)
+        missing = trainer.load_stage({}, args)
+
+        for state in (corrupt, missing):
+            assert state['cleaned'] is None
+            assert len(state['raw']) == 30
+
+
+class TestOutlierFilter:
+    """Test suite for the outlier ranges applied in DuckDB and in pandas."""
+
+    def test_sql_filter_keeps_the_rows_remove_outliers_keeps(self, tmp_path):
+        """Test that RANGE_FILTER and _remove_outliers agree, with NULLs passed through as NaN.
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+
+        """
+        rng = np.random.default_rng(0)
+        raw = pd.DataFrame(
+            {
+                column: rng.integers(
+                    lower - (upper - lower) // 10, upper + (upper - lower) // 10, 400
+                )
+                for column, (lower, upper) in trainer.OUTLIER_RANGES.items()
+            },
+            dtype=float,
+        )
+        raw.iloc[0] = [lower for lower, _ in trainer.OUTLIER_RANGES.values()]
+        raw.iloc[1] = [upper for _, upper in trainer.OUTLIER_RANGES.values()]
+        raw = raw.mask(rng.random(raw.shape) < 0.05)
+        raw['gender'] = rng.integers(0, 2, len(raw)).astype(float)
+        raw = raw[trainer.TRAINING_COLUMNS]
+        conn = _athletes_database(tmp_path / 'athletes.duckdb', raw)
+
+        fetched = trainer._fetch_training_matrix(conn, trainer.TRAINING_QUERY, trainer.RANGE_PARAMS)
+
+        # a missing value is imputed later, so it must not drop the row here
+        in_range = raw.fillna(
+            {column: lower for column, (lower, _) in trainer.OUTLIER_RANGES.items()}
+        )
+        expected = raw.loc[trainer._remove_outliers(in_range).index].reset_index(drop=True)
+        assert 2 < len(expected) < len(raw)
+        assert expected.isna().to_numpy().sum() > 0
+        pd.testing.assert_frame_equal(fetched, expected.astype(np.float32))
+
+
+class _Blend(RegressorMixin, BaseEstimator):
+    """Regressor blending the first feature with the target mean, for predictable R².
+
+    A quality of 1 predicts the first feature, which the search tests use as the
+    target; a quality of 0 predicts the training mean. Every fit is logged in
+    _Blend.fits.
+
+    Attributes:
+        quality (float): Weight of the first feature in the prediction.
+        n_jobs (int | None): Accepted like ExtraTreesRegressor's, unused.
+
+    """
+
+    fits = []
+
+    def __init__(self, quality=1.0, n_jobs=None):
+        """Initialize the regressor.
+
+        Args:
+            quality (float): Weight of the first feature in the prediction.
+            n_jobs (int | None): Unused.
+
+        """
+        self.quality = quality
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y):
+        """Record the fit and remember the target mean.
+
+        Args:
+            X (np.ndarray): Features.
+            y (np.ndarray): Target.
+
+        Returns:
+            _Blend: The fitted regressor.
+
+        """
+        _Blend.fits.append(self.quality)
+        self.mean_ = float(np.mean(y))
+        return self
+
+    def predict(self, X):
+        """Blend the first feature with the training mean.
+
+        Args:
+            X (np.ndarray): Features.
+
+        Returns:
+            np.ndarray: Predictions.
+
+        """
+        return self.quality * np.asarray(X)[:, 0] + (1 - self.quality) * self.mean_
+
+
+class TestSearch:
+    """Test suite for the budgeted random search and the search strategies."""
+
+    def test_random_search_drops_weak_candidates_early(self, monkeypatch):
+        """Test that candidates clearly below the best stop after two folds.
+
+        Args:
+            monkeypatch (pytest.MonkeyPatch): Fixture used to reset the fit log.
+
+        """
+        monkeypatch.setattr(_Blend, 'fits', [])
+        X = np.random.default_rng(0).normal(size=(50, 2))
+
+        result = trainer._budgeted_random_search(
+            _Blend(), {'quality': [1.0, 0.0, 0.5]}, X, X[:, 0], budget_seconds=60, n_jobs=1
+        )
+
+        assert _Blend.fits == [1.0] * 5 + [0.0] * 2 + [0.5] * 2
+        assert result['best_params'] == {'quality': 1.0}
+        assert (result['evaluated'], result['discarded']) == (3, 2)
+        assert [candidate['params'] for candidate in result['candidates']] == [{'quality': 1.0}]
+
+    def test_random_search_stops_at_budget(self, monkeypatch):
+        """Test that no candidate starts once budget_seconds have passed.
+
+        Args:
+            monkeypatch (pytest.MonkeyPatch): Fixture used to reset the fit log and
+                replace the clock with one that advances a second per fit.
+
+        """
+        monkeypatch.setattr(_Blend, 'fits', [])
+        monkeypatch.setattr(
+            trainer, 'time', SimpleNamespace(perf_counter=lambda: float(len(_Blend.fits)))
+        )
+        X = np.random.default_rng(0).normal(size=(50, 2))
+
+        result = trainer._budgeted_random_search(
+            _Blend(), {'quality': [1.0, 0.999, 0.998, 0.997]}, X, X[:, 0], budget_seconds=6
+        )
+
+        assert (result['evaluated'], result['discarded']) == (2, 0)
+        assert len(_Blend.fits) == 10
+        assert result['search_time'] == 10
+
+    def test_halving_ranks_candidates_like_grid(self):
+        """Test that halving lists every candidate once, in the same order as grid."""
+        X = np.random.default_rng(0).normal(size=(90, 2))
+        grid = {'quality': [0.0, 0.5, 0.9, 1.0]}
+
+        results = {
+            strategy: trainer._run_search(strategy, _Blend(), grid, X, X[:, 0], 60, n_jobs=1)
+            for strategy in ('grid', 'halving')
+        }
+
+        ranked = {
+            strategy: [candidate['params'] for candidate in result['candidates']]
+            for strategy, result in results.items()
+        }
+        assert ranked['halving'] == ranked['grid']
+        assert ranked['grid'] == [{'quality': quality} for quality in (1.0, 0.9, 0.5, 0.0)]
+        assert results['halving']['best_params'] == results['grid']['best_params']
+
+
+class TestSampling:
+    """Test suite for the stratified reservoir sample of the training data."""
+
+    def _sample(self, tmp_path, monkeypatch, seed):
+        """Load a 100-row sample of 2000 athletes, two of them in a stratum of their own.
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+            monkeypatch (pytest.MonkeyPatch): Fixture used to move into tmp_path.
+            seed (int): Sampling seed.
+
+        Returns:
+            tuple[pd.DataFrame, dict]: The sampled rows and the population stratum counts.
+
+        """
+        path = tmp_path / 'athletes.duckdb'
+        if not path.exists():
+            rng = np.random.default_rng(0)
+            raw = _realistic_athletes(rng, 2000)
+            raw['age'] = rng.uniform(20, 59, len(raw))
+            raw.loc[:1, ['age', 'gender']] = [62, 1]
+            _athletes_database(path, raw).close()
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(trainer, 'TRAINING_CACHE_DIR', str(tmp_path / 'cache'))
+        args = argparse.Namespace(
+            imputer='median', incremental=False, sample_size=100, seed=seed, no_cache=True
+        )
+        state = trainer.load_stage({}, args)
+        with duckdb.connect(str(path)) as conn:
+            return state['raw'], trainer._stratum_counts(conn)
+
+    def test_strata_get_proportional_shares(self, tmp_path, monkeypatch):
+        """Test that every stratum gets its share of the sample and small ones keep a row.
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+            monkeypatch (pytest.MonkeyPatch): Fixture used to move into tmp_path.
+
+        """
+        sample, stratum_counts = self._sample(tmp_path, monkeypatch, seed=42)
+
+        strata = (sample['gender'] * 100 + sample['age'] // 10).astype(int)
+        expected = {
+            stratum: max(1, round(100 * count / 2000)) for stratum, count in stratum_counts.items()
+        }
+        assert stratum_counts[106] == 2
+        assert strata.value_counts().to_dict() == expected
+
+    def test_fixed_seed_gives_same_sample(self, tmp_path, monkeypatch):
+        """Test that the same seed draws the same rows and another seed does not.
+
+        Args:
+            tmp_path (Path): Temporary directory provided by pytest.
+            monkeypatch (pytest.MonkeyPatch): Fixture used to move into tmp_path.
+
+        """
+        first, _ = self._sample(tmp_path, monkeypatch, seed=42)
+        again, _ = self._sample(tmp_path, monkeypatch, seed=42)
+        other, _ = self._sample(tmp_path, monkeypatch, seed=7)
+
+        pd.testing.assert_frame_equal(first, again)
+        assert not first.equals(other)
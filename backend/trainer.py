@@ -1,21 +1,128 @@
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import warnings
+
 import duckdb
 import joblib
+import numpy as np
+import pandas as pd
+import registry
+from forest import (
+    compact_forest,
+    compact_model,
+    export_forest,
+    load_forest,
+    predict_forest,
+    save_forest,
+    tree_predictions,
+)
+from sklearn.base import clone
 from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
 from sklearn.experimental import enable_iterative_imputer  # noqa: F401
-from sklearn.impute import IterativeImputer
-from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.impute import IterativeImputer, SimpleImputer
+from sklearn.metrics import r2_score
+from sklearn.model_selection import (
+    GridSearchCV,
+    HalvingRandomSearchCV,
+    KFold,
+    ParameterSampler,
+    train_test_split,
+)
+from sklearn.neighbors import BallTree
+
+SEARCH_STRATEGIES = ['grid', 'halving', 'random']
+TRAINING_CACHE_DIR = os.getenv('TRAINING_CACHE_DIR', '.training_cache')
+TRAINING_SAMPLE_SIZE = int(os.getenv('TRAINING_SAMPLE_SIZE', '0')) or None
+TRAINING_COLUMNS = [
+    'age',
+    'backsq',
+    'gender',
+    'deadlift',
+    'snatch',
+    'candj',
+    'pullups',
+    'weight',
+    'height',
+    'run400',
+    'fran',
+    'helen',
+    'grace',
+    'run5k',
+]
+# gender is never missing, every other column is imputed
+IMPUTED_COLUMNS = [column for column in TRAINING_COLUMNS if column != 'gender']
+# inclusive realistic ranges; rows outside any of them are treated as outliers
+OUTLIER_RANGES = {
+    'age': (18, 65),
+    'run5k': (900, 2400),
+    'backsq': (100, 600),
+    'deadlift': (150, 700),
+    'snatch': (50, 350),
+    'candj': (75, 450),
+    'pullups': (10, 50),
+    'weight': (100, 300),
+    'height': (60, 80),
+    'run400': (50, 200),
+    'fran': (200, 600),
+    'helen': (200, 720),
+    'grace': (200, 600),
+}
+# parameterized WHERE condition applying OUTLIER_RANGES in DuckDB; NULLs pass so they
+# can be imputed
+RANGE_FILTER = ' AND '.join(
+    f'({column} IS NULL OR {column} BETWEEN ? AND ?)' for column in OUTLIER_RANGES
+)
+RANGE_PARAMS = [bound for bounds in OUTLIER_RANGES.values() for bound in bounds]
+# gender is encoded as numeric (Male=1, Female=0, others=0) and everything is cast to
+# float32 in DuckDB so Arrow batches copy straight into the training matrix
+TRAINING_SELECT = ', '.join(
+    "coalesce(lower(gender) = 'male', false)::FLOAT AS gender"
+    if col == 'gender'
+    else f'{col}::FLOAT AS {col}'
+    for col in TRAINING_COLUMNS
+)
+TRAINING_QUERY = f"""
+    SELECT {TRAINING_SELECT}
+    FROM athletes
+    WHERE {RANGE_FILTER}
+"""
+INCREMENTAL_QUERY = f'{TRAINING_QUERY} AND athlete_id > ?'
+# sampling strata: encoded gender x 10-year age bucket (99 for unknown age)
+STRATUM_EXPR = (
+    "coalesce(lower(gender) = 'male', false)::INT * 100 + coalesce(floor(age / 10)::INT, 99)"
+)
+ARROW_BATCH_ROWS = 100_000
+STAGES = ['load', 'clean', 'search', 'fit', 'evaluate', 'export']
+# --incremental falls back to a full retrain above these drift thresholds
+DRIFT_THRESHOLD = 0.25
+MAX_R2_DROP = 0.05
+MIN_INCREMENTAL_ROWS = 100
+FINALISTS = 3
+BENCHMARK_BATCH_ROWS = 1000
+# max R² drop allowed for depth capping and tree pruning of the served artifact
+COMPACT_TOLERANCE = 0.002
+COMPACT_VALIDATION_ROWS = 10_000
+PARAM_GRID = {
+    'n_estimators': [50, 100, 200, 300],
+    'max_depth': [None, 10, 20, 30],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4],
+}
 
 
 def _remove_outliers(df):
     """Remove outliers with realistic ranges for CrossFit athletes.
 
-    run5k: 15-40 minutes (900-2400 seconds)
-    backsq: 100-600 lbs
-    deadlift: 150-700 lbs
-    snatch: 50-350 lbs
-    candj: 75-450 lbs
-    pullups: 1-100 reps
-    weight: 100-300 lbs
+    Rows outside any of the inclusive ranges in OUTLIER_RANGES are dropped, e.g.
+    run5k: 15-40 minutes (900-2400 seconds), backsq: 100-600 lbs, weight: 100-300 lbs.
+    Observed values are already filtered by RANGE_FILTER in DuckDB, so this only
+    drops rows whose imputed values fall outside the ranges.
 
     Args:
         df (pd.DataFrame): DataFrame containing athlete data
@@ -24,171 +131,1406 @@ def _remove_outliers(df):
         pd.DataFrame: DataFrame with outliers removed
 
     """
-    return df[
-        (df['age'] >= 18)
-        & (df['age'] <= 65)
-        & (df['run5k'] >= 900)
-        & (df['run5k'] <= 2400)
-        & (df['backsq'] >= 100)
-        & (df['backsq'] <= 600)
-        & (df['deadlift'] >= 150)
-        & (df['deadlift'] <= 700)
-        & (df['snatch'] >= 50)
-        & (df['snatch'] <= 350)
-        & (df['candj'] >= 75)
-        & (df['candj'] <= 450)
-        & (df['pullups'] >= 10)
-        & (df['pullups'] <= 50)
-        & (df['weight'] >= 100)
-        & (df['weight'] <= 300)
-        & (df['height'] >= 60)
-        & (df['height'] <= 80)
-        & (df['run400'] >= 50)
-        & (df['run400'] <= 200)
-        & (df['fran'] >= 200)
-        & (df['fran'] <= 600)
-        & (df['helen'] >= 200)
-        & (df['helen'] <= 720)
-        & (df['grace'] >= 200)
-        & (df['grace'] <= 600)
-    ]
-
-
-def _impute_missing_values(df, n_neighbors=10, weights='distance'):
-    """Impute missing values in numeric columns using KNN.
+    mask = np.ones(len(df), dtype=bool)
+    for column, (lower, upper) in OUTLIER_RANGES.items():
+        mask &= (df[column] >= lower).to_numpy() & (df[column] <= upper).to_numpy()
+    return df[mask]
+
+
+def _impute_iterative(values, gender, n_neighbors, weights):
+    """Impute with sklearn's IterativeImputer (round-robin regression per column).
+
+    Args:
+        values (np.ndarray): IMPUTED_COLUMNS matrix with NaNs for missing values.
+        gender (np.ndarray): Unused, accepted for a uniform imputer signature.
+        n_neighbors (int): Unused, accepted for a uniform imputer signature.
+        weights (str): Unused, accepted for a uniform imputer signature.
+
+    Returns:
+        np.ndarray: Matrix with missing values imputed.
+
+    """
+    imputer = IterativeImputer(max_iter=50, random_state=42, tol=0.001)
+    return imputer.fit_transform(values)
+
+
+def _impute_knn(values, gender, n_neighbors, weights):
+    """Impute each missing value from the nearest complete rows, found with a BallTree.
+
+    Incomplete rows are grouped by their missing-column pattern. For each pattern a
+    BallTree is built over the complete rows restricted to the observed columns
+    (standardized), so each row only pays for a tree query instead of a brute-force
+    distance computation against every other row.
+
+    Args:
+        values (np.ndarray): IMPUTED_COLUMNS matrix with NaNs for missing values.
+        gender (np.ndarray): Unused, accepted for a uniform imputer signature.
+        n_neighbors (int): Number of neighboring rows to use for imputation.
+        weights (str): 'uniform' weights all neighbors equally; 'distance' gives closer
+            neighbors more influence.
+
+    Returns:
+        np.ndarray: Matrix with missing values imputed.
+
+    """
+    values = values.astype(float, copy=True)
+    missing = np.isnan(values)
+    complete = values[~missing.any(axis=1)]
+    if len(complete) == 0:
+        return _impute_median(values, gender, n_neighbors, weights)
+
+    scale = complete.std(axis=0)
+    scale[scale == 0] = 1
+    scaled_complete = (complete - complete.mean(axis=0)) / scale
+    k = min(n_neighbors, len(complete))
+
+    patterns, inverse = np.unique(missing, axis=0, return_inverse=True)
+    for pattern_index, pattern in enumerate(patterns):
+        if not pattern.any():
+            continue
+        rows = np.flatnonzero(inverse.ravel() == pattern_index)
+        observed = ~pattern
+        if not observed.any():
+            values[np.ix_(rows, pattern)] = np.median(complete[:, pattern], axis=0)
+            continue
+        tree = BallTree(scaled_complete[:, observed])
+        queries = (values[np.ix_(rows, observed)] - complete.mean(axis=0)[observed]) / scale[
+            observed
+        ]
+        distances, neighbors = tree.query(queries, k=k)
+        if weights == 'distance':
+            neighbor_weights = 1 / np.maximum(distances, 1e-12)
+        else:
+            neighbor_weights = np.ones_like(distances)
+        neighbor_weights /= neighbor_weights.sum(axis=1, keepdims=True)
+        neighbor_values = complete[:, pattern][neighbors]
+        values[np.ix_(rows, pattern)] = np.einsum('rk,rkc->rc', neighbor_weights, neighbor_values)
+    return values
+
+
+def _impute_median(values, gender, n_neighbors, weights):
+    """Impute each column with its median.
+
+    Args:
+        values (np.ndarray): IMPUTED_COLUMNS matrix with NaNs for missing values.
+        gender (np.ndarray): Unused, accepted for a uniform imputer signature.
+        n_neighbors (int): Unused, accepted for a uniform imputer signature.
+        weights (str): Unused, accepted for a uniform imputer signature.
+
+    Returns:
+        np.ndarray: Matrix with missing values imputed.
+
+    """
+    return SimpleImputer(strategy='median').fit_transform(values)
+
+
+def _impute_group_median(values, gender, n_neighbors, weights):
+    """Impute each column with its median within gender and 10-year age buckets.
+
+    Rows with a missing age form their own bucket. A group with no observed value
+    in a column falls back to that column's overall median.
+
+    Args:
+        values (np.ndarray): IMPUTED_COLUMNS matrix with NaNs for missing values.
+        gender (np.ndarray): Encoded gender of every row.
+        n_neighbors (int): Unused, accepted for a uniform imputer signature.
+        weights (str): Unused, accepted for a uniform imputer signature.
+
+    Returns:
+        np.ndarray: Matrix with missing values imputed.
+
+    """
+    frame = pd.DataFrame(values)
+    age_bucket = (frame[IMPUTED_COLUMNS.index('age')] // 10).fillna(-1)
+    group_medians = frame.groupby([gender, age_bucket]).transform('median')
+    return frame.fillna(group_medians).fillna(frame.median()).to_numpy()
+
+
+IMPUTERS = {
+    'iterative': _impute_iterative,
+    'knn': _impute_knn,
+    'median': _impute_median,
+    'group_median': _impute_group_median,
+}
+
+
+def _impute_missing_values(df, strategy='iterative', n_neighbors=10, weights='distance'):
+    """Impute missing values in numeric columns with the selected strategy.
+
+    Strategies:
+        iterative: IterativeImputer with 50 rounds of per-column regression.
+        knn: distance-weighted nearest complete rows, searched with a BallTree.
+        median: per-column median.
+        group_median: per-column median within gender and 10-year age buckets,
+            falling back to the overall median for empty groups.
 
     Args:
         df (pd.DataFrame): DataFrame containing athlete data
-        n_neighbors (int): Number of neighboring rows to use for imputation
+        strategy (str): One of the keys of IMPUTERS
+        n_neighbors (int): Number of neighboring rows to use for knn imputation
         weights (str): 'uniform' weights all neighbors equally; 'distance' gives closer neighbors more influence
 
     Returns:
         pd.DataFrame: DataFrame with missing values imputed
 
     """
-    numeric_cols = [
-        'age',
-        'backsq',
-        'deadlift',
-        'snatch',
-        'candj',
-        'pullups',
-        'weight',
-        'height',
-        'run400',
-        'fran',
-        'helen',
-        'grace',
-        'run5k',
-    ]
-    imputer = IterativeImputer(max_iter=50, random_state=42, tol=0.001)
-    df[numeric_cols] = imputer.fit_transform(df[numeric_cols])
+    values = df[IMPUTED_COLUMNS].to_numpy(dtype=float)
+    gender = df['gender'].to_numpy()
+    df[IMPUTED_COLUMNS] = IMPUTERS[strategy](values, gender, n_neighbors, weights)
     return df
 
 
-# Pull training data from DuckDB
-conn = duckdb.connect('athletes.duckdb')
-df = conn.execute("""
-    SELECT age, backsq, gender, deadlift, snatch, candj, pullups, weight, height, run400, fran, helen, grace, run5k
-    FROM athletes LIMIT 30000
-""").df()
-print(f'Initial dataset contains {len(df)} athletes')
-
-# Encode gender as numeric (Male=1, Female=0, others=0)
-df['gender'] = df['gender'].str.lower().map({'male': 1, 'female': 0}).fillna(0)
-print(f'Before impute: {df.head()}')
-df = _impute_missing_values(df, n_neighbors=10, weights='distance')
-print(f'After impute: {df.head()}')
-
-df = _remove_outliers(df)
-print(f'Cleaned dataset contains {len(df)} athletes')
-
-# Prep features and target
-X = df[
-    [
-        'age',
-        'backsq',
-        'gender',
-        'deadlift',
-        'snatch',
-        'candj',
-        'pullups',
-        'weight',
-        'height',
-        'run400',
-        'fran',
-        'helen',
-        'grace',
-    ]
-]
-y = df['run5k']
+def _fetch_training_matrix(conn, query, params):
+    """Run a training query and copy its Arrow record batches into a float32 matrix.
 
-# choose several combinations of hyperparameters to test
-param_grid = {
-    'n_estimators': [50, 100, 200, 300],
-    'max_depth': [None, 10, 20, 30],
-    'min_samples_split': [2, 5, 10],
-    'min_samples_leaf': [1, 2, 4],
+    The matrix is preallocated from a count of the same query and filled batch by
+    batch, so the result is never materialized twice in pandas.
+
+    Args:
+        conn (duckdb.DuckDBPyConnection): Connection to the athletes database.
+        query (str): Query selecting TRAINING_COLUMNS as floats.
+        params (list): Query parameters.
+
+    Returns:
+        pd.DataFrame: Training data backed by a single float32 array, NaN for missing values.
+
+    """
+    (n_rows,) = conn.execute(f'SELECT count(*) FROM ({query})', params).fetchone()
+    # column-major so each Arrow column lands in contiguous memory
+    matrix = np.empty((n_rows, len(TRAINING_COLUMNS)), dtype=np.float32, order='F')
+    offset = 0
+    for batch in conn.execute(query, params).fetch_record_batch(ARROW_BATCH_ROWS):
+        end = offset + batch.num_rows
+        for index, column in enumerate(batch.columns):
+            matrix[offset:end, index] = column.to_numpy(zero_copy_only=False)
+        offset = end
+    return pd.DataFrame(matrix[:offset], columns=TRAINING_COLUMNS, copy=False)
+
+
+def _benchmark_imputers(raw_df, n_neighbors=10, weights='distance'):
+    """Compare imputation strategies on fit time, memory and downstream test R².
+
+    Each strategy imputes a copy of the raw data, which then goes through the usual
+    outlier filtering and train/test split before a fixed ExtraTrees model is fitted.
+
+    Args:
+        raw_df (pd.DataFrame): Training data from _fetch_training_matrix, before imputation
+        n_neighbors (int): Number of neighboring rows for knn imputation
+        weights (str): Neighbor weighting for knn imputation
+
+    Returns:
+        list[dict]: One result per strategy with fit_seconds, peak_memory_mb, rows and test_r2
+
+    """
+    results = []
+    for strategy in IMPUTERS:
+        tracemalloc.start()
+        start = time.perf_counter()
+        imputed = _impute_missing_values(raw_df.copy(), strategy, n_neighbors, weights)
+        fit_seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        cleaned = _remove_outliers(imputed)
+        X_train, X_test, y_train, y_test = train_test_split(
+            cleaned[registry.FEATURE_COLUMNS], cleaned['run5k'], random_state=42
+        )
+        model = ExtraTreesRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+        test_r2 = model.fit(X_train, y_train).score(X_test, y_test)
+        results.append(
+            {
+                'strategy': strategy,
+                'fit_seconds': fit_seconds,
+                'peak_memory_mb': peak / 1024**2,
+                'rows': len(cleaned),
+                'test_r2': test_r2,
+            }
+        )
+
+    print('\n=== Imputation Benchmark ===')
+    print(f'  {"strategy":14s} {"fit time":>10s} {"peak mem":>10s} {"rows":>8s} {"test R²":>8s}')
+    for result in results:
+        print(
+            f'  {result["strategy"]:14s} {result["fit_seconds"]:9.2f}s '
+            f'{result["peak_memory_mb"]:8.1f}MB {result["rows"]:8d} {result["test_r2"]:8.4f}'
+        )
+    return results
+
+
+def _stratum_counts(conn) -> dict:
+    """Count the rows within realistic ranges in every sampling stratum.
+
+    Args:
+        conn (duckdb.DuckDBPyConnection): Connection to the athletes database.
+
+    Returns:
+        dict: Row count per STRATUM_EXPR value.
+
+    """
+    rows = conn.execute(
+        f"""
+        SELECT {STRATUM_EXPR} AS stratum, count(*)
+        FROM athletes
+        WHERE {RANGE_FILTER}
+        GROUP BY stratum
+        """,
+        RANGE_PARAMS,
+    ).fetchall()
+    return dict(rows)
+
+
+def _sample_query(stratum_counts, sample_size, seed):
+    """Build a stratified reservoir sample of the training query.
+
+    Every gender x age bucket stratum gets a share of sample_size proportional to its
+    size, and at least one row, and is sampled with DuckDB's reservoir sampling, so
+    the sample keeps the population's strata mix regardless of storage order. The
+    seed makes the sample reproducible as long as the query runs on a single thread.
+
+    Args:
+        stratum_counts (dict): Row count per stratum, from _stratum_counts.
+        sample_size (int): Target number of rows.
+        seed (int): Seed for REPEATABLE sampling.
+
+    Returns:
+        tuple[str, list]: The query and its parameters; the plain training query when
+            the table is not larger than sample_size.
+
+    """
+    total = sum(stratum_counts.values())
+    if total <= sample_size:
+        return TRAINING_QUERY, RANGE_PARAMS
+
+    blocks, params = [], []
+    for stratum, count in sorted(stratum_counts.items()):
+        rows = max(1, round(sample_size * count / total))
+        # USING SAMPLE applies to the FROM clause, so filtering happens in the subquery
+        blocks.append(f"""
+            SELECT {TRAINING_SELECT}
+            FROM (SELECT * FROM athletes WHERE {RANGE_FILTER} AND {STRATUM_EXPR} = ?)
+            USING SAMPLE reservoir({int(rows)} ROWS) REPEATABLE ({int(seed)})
+        """)
+        params += RANGE_PARAMS + [stratum]
+    return 'UNION ALL'.join(blocks), params
+
+
+def _log_sample_representativeness(conn, sample, stratum_counts) -> dict:
+    """Compare a sample with the full table and print how representative it is.
+
+    Reports the population and sample share of every stratum, and every column's
+    mean in the sample against the full table, in full-table standard deviations.
+
+    Args:
+        conn (duckdb.DuckDBPyConnection): Connection to the athletes database.
+        sample (pd.DataFrame): Sampled training data before imputation.
+        stratum_counts (dict): Row count per stratum in the full table.
+
+    Returns:
+        dict: Sample and population sizes, largest stratum share difference and
+            largest standardized mean difference.
+
+    """
+    total = sum(stratum_counts.values())
+    sample_strata = (sample['gender'] * 100 + (sample['age'] // 10).fillna(99)).astype(int)
+    sample_shares = sample_strata.value_counts(normalize=True)
+
+    print(f'\n=== Sample Representativeness ({len(sample)} of {total} athletes) ===')
+    print(f'  {"gender":>6s} {"age":>6s} {"population":>11s} {"sample":>8s}')
+    share_diffs = []
+    for stratum, count in sorted(stratum_counts.items()):
+        gender, bucket = divmod(stratum, 100)
+        population_share = count / total
+        sample_share = float(sample_shares.get(stratum, 0.0))
+        share_diffs.append(abs(sample_share - population_share))
+        age = f'{bucket * 10}s' if bucket != 99 else 'n/a'
+        gender = 'male' if gender else 'other'
+        print(f'  {gender:>6s} {age:>6s} {population_share:10.2%} {sample_share:8.2%}')
+
+    aggregates = ', '.join(f'avg({col}), stddev_samp({col})' for col in TRAINING_COLUMNS)
+    population = conn.execute(
+        f'SELECT {aggregates} FROM ({TRAINING_QUERY})', RANGE_PARAMS
+    ).fetchone()
+    print(f'  {"column":10s} {"population":>11s} {"sample":>8s} {"shift":>7s}')
+    mean_shifts = []
+    for index, col in enumerate(TRAINING_COLUMNS):
+        mean, std = population[2 * index], population[2 * index + 1]
+        sample_mean = float(sample[col].mean())
+        shift = abs(sample_mean - mean) / (std or 1)
+        mean_shifts.append(shift)
+        print(f'  {col:10s} {mean:11.2f} {sample_mean:8.2f} {shift:6.3f}σ')
+
+    return {
+        'rows': len(sample),
+        'population_rows': total,
+        'max_stratum_share_diff': max(share_diffs),
+        'max_mean_shift': max(mean_shifts),
+    }
+
+
+def _training_cache_path(conn, imputer_config, query=TRAINING_QUERY, params=RANGE_PARAMS) -> str:
+    """Build the cache file path for the cleaned training set.
+
+    The key hashes an order-independent digest of the source rows (row count and
+    sum of row hashes, computed inside DuckDB) together with the query, imputer
+    configuration and outlier ranges, so any change to the data or the cleaning
+    steps produces a new key.
+
+    Args:
+        conn (duckdb.DuckDBPyConnection): Connection to the athletes database.
+        imputer_config (dict): Imputation strategy and its parameters.
+        query (str): Query selecting the training rows. Defaults to TRAINING_QUERY.
+        params (list): Query parameters. Defaults to RANGE_PARAMS.
+
+    Returns:
+        str: Path of the Parquet cache file for the current data and configuration.
+
+    """
+    row_count, row_hash_sum = conn.execute(
+        f"""
+        SELECT count(*), sum(hash({', '.join(TRAINING_COLUMNS)})::HUGEINT)
+        FROM ({query})
+        """,
+        params,
+    ).fetchone()
+    fingerprint = json.dumps(
+        {
+            'rows': [row_count, str(row_hash_sum)],
+            'query': query,
+            'imputer': imputer_config,
+            'outliers': OUTLIER_RANGES,
+        },
+        sort_keys=True,
+    )
+    key = hashlib.sha256(fingerprint.encode()).hexdigest()[:16]
+    return os.path.join(TRAINING_CACHE_DIR, f'training_{key}.parquet')
+
+
+def _write_training_cache(conn, df, path):
+    """Write the cleaned training set to Parquet atomically.
+
+    Args:
+        conn (duckdb.DuckDBPyConnection): DuckDB connection used to write the file.
+        df (pd.DataFrame): Cleaned training data.
+        path (str): Destination Parquet path.
+
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    conn.register('cleaned_training_data', df)
+    conn.execute(f"COPY cleaned_training_data TO '{tmp_path}' (FORMAT PARQUET)")
+    conn.unregister('cleaned_training_data')
+    os.replace(tmp_path, path)
+
+
+def _budgeted_random_search(
+    estimator,
+    param_grid,
+    X,
+    y,
+    budget_seconds,
+    cv=5,
+    discard_margin=0.01,
+    random_state=42,
+    n_jobs=-1,
+):
+    """Random search over a parameter grid that stops when a wall-clock budget runs out.
+
+    Candidates are cross-validated fold by fold. Once a best score exists, a candidate
+    whose running mean after two folds is more than discard_margin below it is
+    dropped without fitting the remaining folds.
+
+    Args:
+        estimator (BaseEstimator): Unfitted estimator to tune.
+        param_grid (dict): Parameter grid to sample candidates from without replacement.
+        X (pd.DataFrame): Training features.
+        y (pd.Series): Training target.
+        budget_seconds (float): Wall-clock budget for the search.
+        cv (int): Number of cross-validation folds.
+        discard_margin (float): R² margin below the best score that discards a candidate early.
+        random_state (int): Seed for candidate sampling and fold shuffling.
+        n_jobs (int): Threads used to fit each candidate's trees.
+
+    Returns:
+        dict: Search result with best_params, best_score, time_to_best,
+            search_time, evaluated and discarded candidate counts, and the fully
+            cross-validated candidates, best first.
+
+    """
+    n_candidates = int(np.prod([len(values) for values in param_grid.values()]))
+    sampler = ParameterSampler(param_grid, n_iter=n_candidates, random_state=random_state)
+    folds = list(KFold(n_splits=cv, shuffle=True, random_state=random_state).split(X))
+    X_values, y_values = np.asarray(X), np.asarray(y)
+
+    start = time.perf_counter()
+    best_params, best_score, time_to_best = None, -np.inf, None
+    evaluated = discarded = 0
+    candidates = []
+    for params in sampler:
+        if time.perf_counter() - start > budget_seconds:
+            break
+        evaluated += 1
+        fold_scores = []
+        for train_idx, val_idx in folds:
+            fold_model = clone(estimator).set_params(**params, n_jobs=n_jobs)
+            fold_model.fit(X_values[train_idx], y_values[train_idx])
+            fold_scores.append(r2_score(y_values[val_idx], fold_model.predict(X_values[val_idx])))
+            if len(fold_scores) >= 2 and np.mean(fold_scores) < best_score - discard_margin:
+                break
+        if len(fold_scores) < cv:
+            discarded += 1
+            continue
+        candidates.append({'params': params, 'score': float(np.mean(fold_scores))})
+        if np.mean(fold_scores) > best_score:
+            best_params, best_score = params, float(np.mean(fold_scores))
+            time_to_best = time.perf_counter() - start
+
+    if best_params is None:
+        raise RuntimeError(f'No candidate finished within the {budget_seconds}s search budget')
+    return {
+        'best_params': best_params,
+        'best_score': best_score,
+        'time_to_best': time_to_best,
+        'search_time': time.perf_counter() - start,
+        'evaluated': evaluated,
+        'discarded': discarded,
+        'candidates': sorted(candidates, key=lambda candidate: -candidate['score']),
+    }
+
+
+def _run_search(strategy, estimator, param_grid, X, y, budget_seconds, n_jobs=-1):
+    """Tune hyperparameters with the selected search strategy.
+
+    The search only ranks candidates; the selected one is fitted by the fit stage.
+
+    Args:
+        strategy (str): 'grid' for exhaustive GridSearchCV (kept for auditing), 'halving'
+            for HalvingRandomSearchCV, or 'random' for the budgeted random search.
+        estimator (BaseEstimator): Unfitted estimator to tune.
+        param_grid (dict): Parameter grid.
+        X (pd.DataFrame): Training features.
+        y (pd.Series): Training target.
+        budget_seconds (float): Wall-clock budget, used by the 'random' strategy.
+        n_jobs (int): Number of parallel workers.
+
+    Returns:
+        dict: Search result with best_params, best_score, time_to_best,
+            search_time, evaluated and discarded candidate counts, and the candidates
+            ranked best first. For 'grid' and 'halving' the best candidate is only
+            known once the search finishes, so time_to_best equals search_time.
+
+    """
+    if strategy == 'random':
+        return _budgeted_random_search(estimator, param_grid, X, y, budget_seconds, n_jobs=n_jobs)
+
+    if strategy == 'grid':
+        search = GridSearchCV(
+            estimator=estimator,
+            param_grid=param_grid,
+            scoring='r2',
+            cv=5,
+            n_jobs=n_jobs,
+            refit=False,
+            verbose=1,
+        )
+    else:
+        # successive halving: all candidates start on a small sample, only the best
+        # third survive each round and get three times as many rows
+        search = HalvingRandomSearchCV(
+            estimator=estimator,
+            param_distributions=param_grid,
+            factor=3,
+            scoring='r2',
+            cv=5,
+            n_jobs=n_jobs,
+            refit=False,
+            random_state=42,
+            verbose=1,
+        )
+
+    start = time.perf_counter()
+    search.fit(X, y)
+    search_time = time.perf_counter() - start
+    if strategy == 'halving':
+        evaluated = search.n_candidates_[0]
+        discarded = search.n_candidates_[0] - search.n_candidates_[-1]
+    else:
+        evaluated, discarded = len(search.cv_results_['params']), 0
+    # rank candidates that survived to the last halving round first, then by score;
+    # halving reports a candidate once per round, so only its latest round is kept
+    results = search.cv_results_
+    scores = np.nan_to_num(results['mean_test_score'], nan=-np.inf)
+    rounds = results.get('iter', np.zeros(len(scores)))
+    candidates, seen = [], set()
+    for i in np.lexsort((-scores, -rounds)):
+        key = tuple(sorted(results['params'][i].items()))
+        if key not in seen:
+            seen.add(key)
+            candidates.append({'params': results['params'][i], 'score': float(scores[i])})
+    return {
+        'best_params': search.best_params_,
+        'best_score': search.best_score_,
+        'time_to_best': search_time,
+        'search_time': search_time,
+        'evaluated': evaluated,
+        'discarded': discarded,
+        'candidates': candidates,
+    }
+
+
+def _latency_percentiles(predict, X, repeat):
+    """Time repeated predict calls.
+
+    Args:
+        predict (Callable): Predict function.
+        X (list[list[float]]): Rows passed to every call.
+        repeat (int): Number of timed calls, after one warm-up call.
+
+    Returns:
+        tuple[float, float]: p50 and p99 latency in milliseconds.
+
+    """
+    predict(X)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(timings, [50, 99]) * 1000
+    return float(p50), float(p99)
+
+
+def _measure_serving(model, X, engine=registry.PREDICT_ENGINE, repeat=200) -> dict:
+    """Measure what serving a model would cost with one of the backend's engines.
+
+    The model is published to a temporary registry, so the size is that of the
+    compressed artifacts publish writes, and the load time covers load_version
+    and the first prediction, as on a cold worker. Rows are passed as lists, as
+    the prediction service does.
+
+    Args:
+        model (ExtraTreesRegressor): Fitted model.
+        X (pd.DataFrame): Rows to predict, at least BENCHMARK_BATCH_ROWS for the batch figures.
+        engine (str): 'forest' or 'sklearn'. Defaults to the engine the backend serves with.
+        repeat (int): Number of timed single-row calls; batches are timed a tenth as often.
+
+    Returns:
+        dict: Artifact size in MB, load time and single-row/batch p50/p99 latency in ms.
+
+    """
+    rows = np.asarray(X, dtype=np.float32).tolist()
+    with tempfile.TemporaryDirectory() as tmp_dir, warnings.catch_warnings():
+        # lists carry no column names, which sklearn would warn about on every call
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        version = registry.publish(model, {}, registry_dir=tmp_dir, make_current=False)
+        size_mb = (
+            sum(
+                os.path.getsize(os.path.join(tmp_dir, version, name))
+                for name in (registry.MODEL_FILE, registry.FOREST_ARCHIVE_FILE)
+            )
+            / 1024**2
+        )
+        start = time.perf_counter()
+        served = registry.load_version(version, tmp_dir, engine=engine).model
+        served.predict(rows[:1])
+        load_ms = (time.perf_counter() - start) * 1000
+        single_p50, single_p99 = _latency_percentiles(served.predict, rows[:1], repeat)
+        batch_p50, batch_p99 = _latency_percentiles(
+            served.predict, rows[:BENCHMARK_BATCH_ROWS], max(repeat // 10, 5)
+        )
+    return {
+        'engine': engine,
+        'size_mb': size_mb,
+        'load_ms': load_ms,
+        'single_p50_ms': single_p50,
+        'single_p99_ms': single_p99,
+        'batch_rows': min(len(rows), BENCHMARK_BATCH_ROWS),
+        'batch_p50_ms': batch_p50,
+        'batch_p99_ms': batch_p99,
+    }
+
+
+def _forest_mb(forest) -> float:
+    """Size of flat forest arrays in memory.
+
+    Args:
+        forest (dict): Flat forest arrays.
+
+    Returns:
+        float: Total array size in MB.
+
+    """
+    return sum(value.nbytes for value in forest.values() if isinstance(value, np.ndarray)) / 1024**2
+
+
+def _compact_model(model, X, y, max_depth=None, prune_trees=False, tolerance=COMPACT_TOLERANCE):
+    """Build the compact serving artifacts for a model and verify them.
+
+    The arrays are 32-bit and optionally cut at max_depth and/or pruned to the
+    smallest set of trees, best individual R² first, whose ensemble stays within
+    tolerance of the full model's R². A depth cap that alone exceeds the tolerance
+    is dropped. The sklearn estimator is cut the same way, so both serving engines
+    predict with the same trees. The arrays are round-tripped through a compressed
+    file and both artifacts are compared with the full model's predictions.
+
+    Args:
+        model (ExtraTreesRegressor): Fitted model.
+        X (pd.DataFrame): Validation features; the first COMPACT_VALIDATION_ROWS are used.
+        y (pd.Series): Validation target.
+        max_depth (int | None): Depth cap. Defaults to no cap.
+        prune_trees (bool): Whether to drop trees. Defaults to False.
+        tolerance (float): Maximum R² drop against the full model.
+
+    Returns:
+        tuple[ExtraTreesRegressor, dict, dict]: The cut estimator, the compact forest
+            arrays and a report with tree and node counts, depth, compressed and
+            uncompressed size, R² drop and prediction errors of the worse artifact.
+
+    Raises:
+        ValueError: If either artifact loses more than tolerance R².
+
+    """
+    X = np.asarray(X, dtype=np.float32)[:COMPACT_VALIDATION_ROWS]
+    y = np.asarray(y)[:COMPACT_VALIDATION_ROWS]
+    full = export_forest(model)
+    reference = predict_forest(full, X)
+    reference_r2 = r2_score(y, reference)
+
+    forest = compact_forest(full, max_depth=max_depth)
+    if max_depth is not None and r2_score(y, predict_forest(forest, X)) < reference_r2 - tolerance:
+        print(f'Depth cap {max_depth} loses more than {tolerance} R², keeping full depth')
+        max_depth, forest = None, compact_forest(full)
+
+    trees = None
+    if prune_trees:
+        per_tree = tree_predictions(forest, X).astype(np.float64)
+        tree_r2 = [r2_score(y, per_tree[:, index]) for index in range(per_tree.shape[1])]
+        order = np.argsort(tree_r2)[::-1]
+        ensembles = np.cumsum(per_tree[:, order], axis=1) / np.arange(1, len(order) + 1)
+        n_trees = next(
+            (
+                count
+                for count in range(1, len(order) + 1)
+                if r2_score(y, ensembles[:, count - 1]) >= reference_r2 - tolerance
+            ),
+            len(order),
+        )
+        trees = order[:n_trees]
+        forest = compact_forest(full, max_depth=max_depth, trees=trees)
+    model = compact_model(model, max_depth=max_depth, trees=trees)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, registry.FOREST_ARCHIVE_FILE)
+        save_forest(forest, path, compress=registry.ARTIFACT_COMPRESS)
+        size_mb = os.path.getsize(path) / 1024**2
+        engine_predictions = [
+            predict_forest(load_forest(path, mmap_mode=None), X),
+            model.predict(X),
+        ]
+
+    errors = np.abs(np.stack(engine_predictions) - reference)
+    report = {
+        'trees': len(forest['roots']),
+        'nodes': len(forest['left']),
+        'max_depth': forest['max_depth'],
+        'compressed_mb': size_mb,
+        'uncompressed_mb': _forest_mb(forest),
+        'full_mb': _forest_mb(full),
+        'r2_drop': reference_r2 - min(r2_score(y, pred) for pred in engine_predictions),
+        'max_abs_error': float(errors.max()),
+        'mean_abs_error': float(errors.mean()),
+    }
+    if report['r2_drop'] > tolerance:
+        raise ValueError(
+            f'Compact artifact loses {report["r2_drop"]:.4f} R², more than {tolerance}'
+        )
+    return model, forest, report
+
+
+def _select_finalist(state, args) -> dict:
+    """Pick the most accurate search finalist that fits the serving budget.
+
+    The top --finalists candidates by cross-validated R² are fitted and measured with
+    _measure_serving on the --engine serving engine. The best R² with a single-row
+    p99 within --max-latency-ms and an artifact within --max-size-mb wins; when none
+    fits, the fastest finalist is used.
+
+    Args:
+        state (dict): Pipeline state after the search stage.
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        dict: State updates with the chosen model, its best_params, cv_r2 and serving
+            figures, and the report of every finalist.
+
+    """
+    chosen = fastest = None
+    finalists = []
+    for candidate in state['search']['candidates'][: args.finalists]:
+        params = candidate['params']
+        model = ExtraTreesRegressor(random_state=42, n_jobs=args.n_jobs, **params)
+        model.fit(state['X_train'], state['y_train'])
+        report = {'params': params, 'cv_r2': candidate['score']}
+        report.update(_measure_serving(model, state['X_test'], engine=args.engine))
+        report['within_budget'] = (
+            args.max_latency_ms is None or report['single_p99_ms'] <= args.max_latency_ms
+        ) and (args.max_size_mb is None or report['size_mb'] <= args.max_size_mb)
+        finalists.append(report)
+
+        if chosen is None and report['within_budget']:
+            chosen = (model, report)
+        if fastest is None or report['single_p99_ms'] < fastest[1]['single_p99_ms']:
+            fastest = (model, report)
+
+    print(f'\n=== Finalists ({args.engine} engine) ===')
+    print(
+        f'  {"CV R²":>7s} {"size":>9s} {"load":>8s} {"1-row p50/p99":>16s} '
+        f'{"batch p50/p99":>18s}  params'
+    )
+    for report in finalists:
+        print(
+            f'  {report["cv_r2"]:7.4f} {report["size_mb"]:7.1f}MB {report["load_ms"]:6.1f}ms '
+            f'{report["single_p50_ms"]:6.2f}/{report["single_p99_ms"]:6.2f}ms '
+            f'{report["batch_p50_ms"]:7.2f}/{report["batch_p99_ms"]:7.2f}ms  '
+            f'{report["params"]}{"" if report["within_budget"] else "  (over budget)"}'
+        )
+    if chosen is None:
+        print('No finalist fits the serving budget, using the fastest one')
+        chosen = fastest
+    model, report = chosen
+    print(f'Selected: {report["params"]}')
+    return {
+        'model': model,
+        'best_params': report['params'],
+        'cv_r2': report['cv_r2'],
+        'serving': {key: value for key, value in report.items() if key != 'params'},
+        'finalists': finalists,
+    }
+
+
+def _share_matrix(values, directory, name) -> np.memmap:
+    """Write an array as contiguous float32 and memory-map it read-only.
+
+    joblib passes memmaps to worker processes as a file reference, so every worker
+    reads the same page-cached data. float32 is the dtype sklearn trees use
+    internally, so fitting does not convert it into a private copy.
+
+    Args:
+        values (array-like): Matrix or vector to share.
+        directory (str): Directory the file is written to; the caller removes it.
+        name (str): File name stem inside directory.
+
+    Returns:
+        np.memmap: Read-only view of the data.
+
+    """
+    path = os.path.join(directory, f'{name}.npy')
+    np.save(path, np.ascontiguousarray(values, dtype=np.float32))
+    return np.load(path, mmap_mode='r')
+
+
+def _worker_count(n_jobs, worker_memory_mb=None) -> int:
+    """Resolve the number of search workers, capped by available memory.
+
+    Args:
+        n_jobs (int): Requested workers; -1 uses every core.
+        worker_memory_mb (float | None): Memory budget per worker. Workers are limited
+            to available memory divided by this budget where the platform reports it.
+            Defaults to no cap.
+
+    Returns:
+        int: Number of workers to start.
+
+    """
+    workers = joblib.effective_n_jobs(n_jobs)
+    if worker_memory_mb:
+        try:
+            available_mb = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / 1024**2
+        except (AttributeError, ValueError, OSError):
+            # SC_AVPHYS_PAGES is Linux-only and os.sysconf does not exist on Windows
+            print('Available memory is unknown on this platform, not capping search workers')
+            return workers
+        workers = max(1, min(workers, int(available_mb // worker_memory_mb)))
+    return workers
+
+
+def _feature_stats(df) -> dict:
+    """Summarize the distribution of every training column.
+
+    Args:
+        df (pd.DataFrame): Cleaned training data.
+
+    Returns:
+        dict: Mean and standard deviation per column.
+
+    """
+    return {
+        col: {'mean': float(df[col].mean()), 'std': float(df[col].std())}
+        for col in TRAINING_COLUMNS
+    }
+
+
+def _mean_shift(reference_stats, df) -> dict:
+    """Measure how far each column's mean moved, in reference standard deviations.
+
+    Args:
+        reference_stats (dict): Output of _feature_stats for the reference data.
+        df (pd.DataFrame): New cleaned data.
+
+    Returns:
+        dict: Absolute standardized mean shift per column.
+
+    """
+    return {
+        col: abs(float(df[col].mean()) - stats['mean']) / (stats['std'] or 1)
+        for col, stats in reference_stats.items()
+    }
+
+
+def _split(df) -> dict:
+    """Split cleaned data into train and test features and targets.
+
+    Args:
+        df (pd.DataFrame): Cleaned training data.
+
+    Returns:
+        dict: X_train, X_test, y_train and y_test.
+
+    """
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[registry.FEATURE_COLUMNS], df['run5k'], random_state=42
+    )
+    return {'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test}
+
+
+def load_stage(state, args) -> dict:
+    """Pull training rows from DuckDB.
+
+    A full run reads TRAINING_QUERY, or a stratified reservoir sample of it with
+    --sample-size, or the cleaned Parquet cache when the data and cleaning
+    configuration are unchanged and the cache file is readable. An incremental
+    run reads only athletes inserted after the current model version's
+    max_athlete_id watermark, and falls back to a full load when there is no
+    model to update.
+
+    Args:
+        state (dict): Pipeline state.
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        dict: State updates with raw or cleaned data, the imputer configuration and
+            the max_athlete_id watermark.
+
+    """
+    conn = duckdb.connect('athletes.duckdb')
+    imputer_config = {'strategy': args.imputer, 'n_neighbors': 10, 'weights': 'distance'}
+    (max_athlete_id,) = conn.execute('SELECT max(athlete_id) FROM athletes').fetchone()
+    update = {
+        'imputer_config': imputer_config,
+        'max_athlete_id': max_athlete_id,
+        'incremental': False,
+    }
+
+    incremental = state.get('incremental', args.incremental)
+    base_version = registry.current_version() if incremental else None
+    if base_version is not None:
+        base_metadata = registry.read_metadata(base_version)
+        watermark = base_metadata.get('max_athlete_id')
+        if watermark is not None and 'feature_stats' in base_metadata:
+            df = _fetch_training_matrix(conn, INCREMENTAL_QUERY, RANGE_PARAMS + [watermark])
+            print(f'Loaded {len(df)} athletes inserted since model {base_version}')
+            return {
+                **update,
+                'incremental': True,
+                'base_version': base_version,
+                'base_metadata': base_metadata,
+                'raw': df,
+            }
+        print(f'Model {base_version} has no watermark or feature statistics, retraining fully')
+    elif incremental:
+        print('No published model to update, retraining fully')
+
+    query, params, stratum_counts = TRAINING_QUERY, RANGE_PARAMS, None
+    if args.sample_size:
+        stratum_counts = _stratum_counts(conn)
+        query, params = _sample_query(stratum_counts, args.sample_size, args.seed)
+        if query != TRAINING_QUERY:
+            # REPEATABLE only draws the same rows on one thread, and the sample is
+            # read once for the cache key and again for the matrix
+            conn.execute('SET threads = 1')
+
+    cache_path = _training_cache_path(conn, imputer_config, query, params)
+    update['cache_path'] = cache_path
+    if not args.no_cache and os.path.exists(cache_path):
+        try:
+            df = conn.execute(f"SELECT * FROM read_parquet('{cache_path}')").df()
+        except duckdb.Error as error:
+            # a truncated or removed cache file only costs a full load
+            print(f'Ignoring unreadable cache {cache_path}: {error}')
+        else:
+            print(f'Loaded cleaned dataset of {len(df)} athletes from {cache_path}')
+            return {**update, 'raw': None, 'cleaned': df}
+
+    df = _fetch_training_matrix(conn, query, params)
+    print(f'Loaded {len(df)} athletes within realistic ranges')
+    if stratum_counts is not None:
+        conn.execute('RESET threads')
+        update['sample'] = _log_sample_representativeness(conn, df, stratum_counts)
+    return {**update, 'raw': df, 'cleaned': None}
+
+
+def clean_stage(state, args) -> dict:
+    """Encode, impute and filter the loaded rows, then split them.
+
+    In incremental mode the new rows are checked for drift against the current
+    model: if any column's mean moved more than --drift-threshold standard
+    deviations, or the model's R² on the new rows dropped more than --max-r2-drop
+    below its recorded test R², the pipeline falls back to a full load and clean.
+
+    Args:
+        state (dict): Pipeline state.
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        dict: State updates with the cleaned data, train/test split and, for
+            incremental runs, the drift metrics.
+
+    """
+    df = state.get('cleaned')
+    if df is None:
+        df = _impute_missing_values(state['raw'], **state['imputer_config'])
+        df = _remove_outliers(df)
+        print(f'Cleaned dataset contains {len(df)} athletes')
+        if not state['incremental']:
+            _write_training_cache(duckdb.connect('athletes.duckdb'), df, state['cache_path'])
+            print(f'Cached cleaned dataset to {state["cache_path"]}')
+
+    if not state['incremental']:
+        return {'cleaned': df, 'raw': None, **_split(df)}
+
+    if len(df) < args.min_new_rows:
+        print(f'Only {len(df)} new athletes (< {args.min_new_rows}), nothing to update')
+        return {'cleaned': df, 'raw': None, 'skip': True}
+
+    base_metadata = state['base_metadata']
+    base_model = registry.load_version(state['base_version'], engine='sklearn').model
+    shift = _mean_shift(base_metadata['feature_stats'], df)
+    new_r2 = r2_score(df['run5k'], base_model.predict(df[registry.FEATURE_COLUMNS]))
+    drift = {
+        'max_mean_shift': max(shift.values()),
+        'max_mean_shift_column': max(shift, key=shift.get),
+        'new_rows_r2': new_r2,
+        'r2_drop': base_metadata['test_r2'] - new_r2,
+    }
+    print(
+        f'Drift: max mean shift {drift["max_mean_shift"]:.3f} std '
+        f'({drift["max_mean_shift_column"]}), R² on new rows {new_r2:.4f} '
+        f'(drop {drift["r2_drop"]:.4f})'
+    )
+    reasons = []
+    if drift['max_mean_shift'] > args.drift_threshold:
+        reasons.append(
+            f'{drift["max_mean_shift_column"]} mean shift {drift["max_mean_shift"]:.3f} std '
+            f'> {args.drift_threshold}'
+        )
+    if drift['r2_drop'] > args.max_r2_drop:
+        reasons.append(f'R² drop {drift["r2_drop"]:.4f} > {args.max_r2_drop}')
+    if reasons:
+        print(f'Drift exceeds thresholds ({"; ".join(reasons)}), falling back to a full retrain')
+        # incremental=False makes load_stage do a full load without reporting a missing model
+        state.update(load_stage({'incremental': False}, args))
+        return clean_stage(state, args)
+
+    return {'cleaned': df, 'raw': None, 'drift': drift, 'base_model': base_model, **_split(df)}
+
+
+def search_stage(state, args) -> dict:
+    """Tune hyperparameters on the training split.
+
+    The training matrix is written once to a memory-mapped float32 file, which
+    joblib hands to the worker processes by reference instead of pickling a copy
+    per worker. The file is deleted once the search finishes. Incremental runs
+    reuse the current model's hyperparameters.
+
+    Args:
+        state (dict): Pipeline state.
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        dict: State updates with best_params, and for full runs the search result.
+
+    """
+    if state['incremental']:
+        return {'best_params': state['base_metadata']['best_params'], 'search': None}
+
+    n_jobs = _worker_count(args.n_jobs, args.worker_memory_mb)
+    os.makedirs(TRAINING_CACHE_DIR, exist_ok=True)
+    # the shared files are only needed while the search workers run
+    with tempfile.TemporaryDirectory(
+        dir=TRAINING_CACHE_DIR, prefix='shared-', ignore_cleanup_errors=True
+    ) as shared_dir:
+        X_train = _share_matrix(state['X_train'], shared_dir, 'X_train')
+        y_train = _share_matrix(state['y_train'], shared_dir, 'y_train')
+        print(
+            f'Searching with {n_jobs} workers on a shared {X_train.nbytes / 1024**2:.1f}MB matrix'
+        )
+        search = _run_search(
+            args.search,
+            ExtraTreesRegressor(random_state=42),
+            PARAM_GRID,
+            X_train,
+            y_train,
+            args.budget,
+            n_jobs=n_jobs,
+        )
+    print(f'\n=== {args.search.capitalize()} Search Results ===')
+    print(f'Candidates evaluated: {search["evaluated"]} ({search["discarded"]} discarded early)')
+    print(f'Best parameters: {search["best_params"]}')
+    print(f'Best cross-validation R² score: {search["best_score"]:.4f}')
+    print(f'Search time: {search["search_time"]:.1f}s')
+    return {'best_params': search['best_params'], 'search': search}
+
+
+def fit_stage(state, args) -> dict:
+    """Fit the model with the chosen hyperparameters.
+
+    Full runs choose among the search finalists with _select_finalist. Incremental
+    runs warm start the current model and add trees fitted on the new rows only, in
+    proportion to how many rows were added.
+
+    Args:
+        state (dict): Pipeline state.
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        dict: State updates with the fitted model and its serving figures.
+
+    """
+    if not state['incremental']:
+        return _select_finalist(state, args)
+
+    model = state['base_model']
+    base_rows = state['base_metadata']['training_rows']
+    new_trees = max(1, round(model.n_estimators * len(state['X_train']) / base_rows))
+    start = time.perf_counter()
+    model.set_params(
+        warm_start=True, n_estimators=model.n_estimators + new_trees, n_jobs=args.n_jobs
+    )
+    model.fit(state['X_train'], state['y_train'])
+    model.set_params(warm_start=False)
+    print(
+        f'Added {new_trees} trees fitted on {len(state["X_train"])} new athletes '
+        f'in {time.perf_counter() - start:.1f}s ({model.n_estimators} trees total)'
+    )
+    return {'model': model, 'serving': _measure_serving(model, state['X_test'])}
+
+
+def evaluate_stage(state, args) -> dict:
+    """Score the fitted model and compare it with a Gradient Boosting baseline.
+
+    The baseline comparison is skipped for incremental runs, which are scored on the
+    held-out part of the new rows.
+
+    Args:
+        state (dict): Pipeline state.
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        dict: State updates with the evaluation scores.
+
+    """
+    model = state['model']
+    X_train, X_test = state['X_train'], state['X_test']
+    y_train, y_test = state['y_train'], state['y_test']
+
+    print('\n=== Feature Importances ===')
+    feature_names = X_train.columns
+    importances = model.feature_importances_
+    # reverse sort by importance (highest first)
+    for idx in importances.argsort()[::-1]:
+        print(f'  {feature_names[idx]:10s}: {importances[idx]:.4f} ({importances[idx] * 100:.1f}%)')
+
+    evaluation = {'train_r2': model.score(X_train, y_train), 'test_r2': model.score(X_test, y_test)}
+    print(f'\nTraining R² score: {evaluation["train_r2"]:.4f}')
+    print(f'Test R² score: {evaluation["test_r2"]:.4f}')
+    if state['incremental']:
+        return {'evaluation': evaluation}
+
+    print('\n=== Comparison with Baseline Gradient Boosting ===')
+    baseline = GradientBoostingRegressor(
+        n_estimators=50, learning_rate=0.05, max_depth=3, random_state=42, verbose=1
+    )
+    baseline.fit(X_train, y_train)
+    baseline_train = baseline.score(X_train, y_train)
+    baseline_test = baseline.score(X_test, y_test)
+    print(
+        f'\nGradient Boosting (baseline): Train R²={baseline_train:.4f}, '
+        f'Test R²={baseline_test:.4f}'
+    )
+    search = state['search'] or {}
+    print(
+        f'Extra Trees (optimized):      Train R²={evaluation["train_r2"]:.4f}, '
+        f'Test R²={evaluation["test_r2"]:.4f}, '
+        f'time to best score={search.get("time_to_best", 0):.1f}s ({args.search} search)'
+    )
+    improvement = (evaluation['test_r2'] - baseline_test) / abs(baseline_test) * 100
+    print(f'\nTest R² Improvement: {improvement:.1f}%')
+    return {'evaluation': evaluation}
+
+
+def export_stage(state, args) -> dict:
+    """Publish the fitted model to the registry as a verified compact artifact.
+
+    Args:
+        state (dict): Pipeline state.
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        dict: State updates with the published version.
+
+    """
+    metadata = {
+        **state['evaluation'],
+        'best_params': state['best_params'],
+        'max_athlete_id': state['max_athlete_id'],
+        'serving': state['serving'],
+    }
+    if state['incremental']:
+        base_metadata = state['base_metadata']
+        # drift stays measured against the last full retrain
+        metadata.update(
+            {
+                'cv_r2': base_metadata.get('cv_r2'),
+                'search_strategy': base_metadata.get('search_strategy'),
+                'training_rows': base_metadata['training_rows'] + len(state['X_train']),
+                'feature_stats': base_metadata['feature_stats'],
+                'incremental_from': state['base_version'],
+                'drift': state['drift'],
+            }
+        )
+    else:
+        metadata.update(
+            {
+                'cv_r2': state['cv_r2'],
+                'search_strategy': args.search,
+                'training_rows': len(state['X_train']),
+                'feature_stats': _feature_stats(state['cleaned']),
+                'sample': state.get('sample'),
+                'finalists': state['finalists'],
+                'serving_budget': {
+                    'max_latency_ms': args.max_latency_ms,
+                    'max_size_mb': args.max_size_mb,
+                },
+            }
+        )
+    model, forest, artifact = _compact_model(
+        state['model'],
+        state['X_test'],
+        state['y_test'],
+        max_depth=args.compact_max_depth,
+        prune_trees=args.prune_trees,
+        tolerance=args.compact_tolerance,
+    )
+    print(
+        f'\nCompact artifact: {artifact["trees"]} trees, {artifact["nodes"]} nodes, '
+        f'depth {artifact["max_depth"]}, {artifact["full_mb"]:.1f}MB -> '
+        f'{artifact["uncompressed_mb"]:.1f}MB ({artifact["compressed_mb"]:.1f}MB compressed), '
+        f'R² drop {artifact["r2_drop"]:.5f}, max error {artifact["max_abs_error"]:.3f}s'
+    )
+    metadata['artifact'] = artifact
+    version = registry.publish(model, metadata, forest=forest)
+    print(f'\nPublished model version {version} to {registry.MODEL_REGISTRY_DIR}/')
+    return {'version': version}
+
+
+STAGE_FUNCTIONS = {
+    'load': load_stage,
+    'clean': clean_stage,
+    'search': search_stage,
+    'fit': fit_stage,
+    'evaluate': evaluate_stage,
+    'export': export_stage,
 }
 
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, random_state=42)
+def _checkpoint_path(stage) -> str:
+    """Path of the pipeline state saved after a stage.
 
-base_model = ExtraTreesRegressor(random_state=42)
-# Grid search with 5-fold cross-validation
-grid_search = GridSearchCV(
-    estimator=base_model, param_grid=param_grid, scoring='r2', cv=5, n_jobs=-1, verbose=1
-)
+    Args:
+        stage (str): Stage name.
 
-# Fit grid search
-grid_search.fit(X_train, y_train)
-
-# Show results
-print('\n=== Grid Search Results ===')
-print(f'Best parameters: {grid_search.best_params_}')
-print(f'Best cross-validation R² score: {grid_search.best_score_:.4f}')
-
-# Use the best model
-model = grid_search.best_estimator_
-
-# Show feature importances
-print('\n=== Feature Importances ===')
-feature_names = X.columns
-importances = model.feature_importances_
-# reverse sort by importance (highest first)
-sorted_idx = importances.argsort()[::-1]
-for idx in sorted_idx:
-    print(f'  {feature_names[idx]:10s}: {importances[idx]:.4f} ({importances[idx] * 100:.1f}%)')
-
-# Evaluate
-train_score = model.score(X_train, y_train)
-test_score = model.score(X_test, y_test)
-print(f'\nTraining R² score: {train_score:.4f}')
-print(f'Test R² score: {test_score:.4f}')
-
-# Compare with baseline Gradient Boosting model
-print('\n=== Comparison with Baseline Gradient Boosting ===')
-previous_model = GradientBoostingRegressor(
-    n_estimators=50, learning_rate=0.05, max_depth=3, random_state=42, verbose=1
-)
-previous_model.fit(X_train, y_train)
-previous_train_score = previous_model.score(X_train, y_train)
-previous_test_score = previous_model.score(X_test, y_test)
-importances = previous_model.feature_importances_
-# reverse sort by importance (highest first)
-print('\nBaseline Gradient Boosting Feature Importances:')
-sorted_idx = importances.argsort()[::-1]
-for idx in sorted_idx:
-    print(f'  {feature_names[idx]:10s}: {importances[idx]:.4f} ({importances[idx] * 100:.1f}%)')
-
-
-print(
-    f'\nGradient Boosting (baseline): Train R²={previous_train_score:.4f}, Test R²={previous_test_score:.4f}'
-)
-print(f'Extra Trees (optimized):      Train R²={train_score:.4f}, Test R²={test_score:.4f}')
-print(
-    f'\nTest R² Improvement: {((test_score - previous_test_score) / abs(previous_test_score) * 100):.1f}%'
-)
+    Returns:
+        str: Path of the checkpoint file.
+
+    """
+    return os.path.join(TRAINING_CACHE_DIR, f'stage_{stage}.joblib')
+
+
+def run_stages(stages, args) -> dict:
+    """Run a range of pipeline stages.
+
+    Every stage from the earliest to the latest requested one runs, in pipeline
+    order. When the range does not start at 'load', the state saved after the
+    preceding stage is loaded, and the state is saved again after every stage so
+    the pipeline can be resumed.
+
+    Args:
+        stages (list[str]): Requested stage names.
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        dict: Final pipeline state.
+
+    Raises:
+        FileNotFoundError: If the preceding stage has not been run yet.
+
+    """
+    first = min(STAGES.index(stage) for stage in stages)
+    last = max(STAGES.index(stage) for stage in stages)
+    state = {}
+    if first > 0:
+        previous = STAGES[first - 1]
+        if not os.path.exists(_checkpoint_path(previous)):
+            raise FileNotFoundError(f'No saved state, run the {previous} stage first')
+        state = joblib.load(_checkpoint_path(previous))
+
+    os.makedirs(TRAINING_CACHE_DIR, exist_ok=True)
+    for stage in STAGES[first : last + 1]:
+        start = time.perf_counter()
+        state.update(STAGE_FUNCTIONS[stage](state, args))
+        print(f'[{stage}] finished in {time.perf_counter() - start:.1f}s')
+        if state.get('skip'):
+            break
+        if stage != STAGES[-1]:
+            joblib.dump(state, _checkpoint_path(stage), compress=0)
+    return state
+
+
+def main():
+    """Parse command line arguments and run the training pipeline."""
+    parser = argparse.ArgumentParser(description='Train the run5k predictor.')
+    parser.add_argument(
+        'stages',
+        nargs='*',
+        metavar='STAGE',
+        help=f'stages to run, from {", ".join(STAGES)} (default: all); '
+        'stages in between the requested ones also run',
+    )
+    parser.add_argument(
+        '--search',
+        choices=SEARCH_STRATEGIES,
+        default='halving',
+        help="hyperparameter search strategy; 'grid' runs the full grid for auditing",
+    )
+    parser.add_argument(
+        '--budget', type=float, default=600, help="wall-clock budget in seconds for 'random' search"
+    )
+    parser.add_argument(
+        '--n-jobs', type=int, default=-1, help='parallel search workers (-1 for every core)'
+    )
+    parser.add_argument(
+        '--worker-memory-mb',
+        type=float,
+        default=None,
+        help='memory budget per search worker; fewer workers start if memory is short',
+    )
+    parser.add_argument(
+        '--finalists',
+        type=int,
+        default=FINALISTS,
+        help='number of top search candidates measured for serving cost',
+    )
+    parser.add_argument(
+        '--max-latency-ms',
+        type=float,
+        default=None,
+        help='single-row p99 predict latency budget for the selected model',
+    )
+    parser.add_argument(
+        '--max-size-mb',
+        type=float,
+        default=None,
+        help='serving artifact size budget for the selected model',
+    )
+    parser.add_argument(
+        '--engine',
+        choices=['sklearn', 'forest'],
+        default=registry.PREDICT_ENGINE,
+        help='serving engine the finalists are measured with (default: PREDICT_ENGINE)',
+    )
+    parser.add_argument(
+        '--compact-max-depth',
+        type=int,
+        default=None,
+        help='cut the served trees at this depth if it stays within --compact-tolerance',
+    )
+    parser.add_argument(
+        '--prune-trees',
+        action='store_true',
+        help='serve the fewest trees that stay within --compact-tolerance',
+    )
+    parser.add_argument(
+        '--compact-tolerance',
+        type=float,
+        default=COMPACT_TOLERANCE,
+        help='max test R² drop of the served artifact against the full model',
+    )
+    parser.add_argument(
+        '--imputer', choices=list(IMPUTERS), default='iterative', help='imputation strategy'
+    )
+    parser.add_argument(
+        '--benchmark-imputers',
+        action='store_true',
+        help='compare imputation strategies on time, memory and test R², then exit',
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='rebuild the cleaned training set even if a cached copy exists',
+    )
+    parser.add_argument(
+        '--sample-size',
+        type=int,
+        default=TRAINING_SAMPLE_SIZE,
+        help='train on a stratified reservoir sample of this many athletes (default: all)',
+    )
+    parser.add_argument(
+        '--seed', type=int, default=42, help='seed for reproducible --sample-size sampling'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='add trees fitted on athletes inserted since the current model version',
+    )
+    parser.add_argument(
+        '--drift-threshold',
+        type=float,
+        default=DRIFT_THRESHOLD,
+        help='max mean shift, in standard deviations, before --incremental retrains fully',
+    )
+    parser.add_argument(
+        '--max-r2-drop',
+        type=float,
+        default=MAX_R2_DROP,
+        help='max drop of R² on new athletes before --incremental retrains fully',
+    )
+    parser.add_argument(
+        '--min-new-rows',
+        type=int,
+        default=MIN_INCREMENTAL_ROWS,
+        help='minimum new athletes for --incremental to update the model',
+    )
+    args = parser.parse_args()
+    unknown = sorted(set(args.stages) - set(STAGES))
+    if unknown:
+        parser.error(f'unknown stages: {", ".join(unknown)}')
+
+    if args.benchmark_imputers:
+        conn = duckdb.connect('athletes.duckdb')
+        _benchmark_imputers(_fetch_training_matrix(conn, TRAINING_QUERY, RANGE_PARAMS))
+        return
+
+    run_stages(args.stages or STAGES, args)
 
 
-joblib.dump(model, 'run5k_predictor.model')
+if __name__ == '__main__':
+    main()
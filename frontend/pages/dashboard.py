@@ -12,15 +12,23 @@ def render_dashboard():
         Exception: Displays error message if the application fails to load.
 
     """
-    import io
+    import html
     import traceback
-    import zipfile
     from datetime import datetime
 
     import pandas as pd
+    import requests
     import streamlit as st
-    from src.plot import clean_data, generate_histogram, generate_scatter_plot, load_data
-    from st_aggrid import AgGrid, GridOptionsBuilder
+    from src import export
+    from src.plot import (
+        clean_data,
+        generate_histogram,
+        generate_scatter_plot,
+        load_athlete,
+        load_data,
+        nearest_point,
+        scatter_render_mode,
+    )
     from utils import helpers
 
     try:
@@ -41,16 +49,20 @@ def render_dashboard():
         st.set_page_config(page_title='Crossfit Data')
         with helpers.timer('Initial data load'):
             df = load_data()
+        data_version = df.attrs.get('data_version')
 
         @st.fragment
-        def download_data(df: pd.DataFrame, x_axis, y_axis, fig):
-            """Download data as a zip file containing the filtered data and the scatter plot.
+        def download_data(df: pd.DataFrame, x_axis, y_axis, fig, export_key):
+            """Download the filtered data as Parquet, Feather or a zip with the scatter plot.
+
+            The export is only built once requested, and reused for the same export_key.
 
             Args:
                 df (pd.DataFrame): The dataframe to download
                 x_axis (str): The x axis column name
                 y_axis (str): The y axis column name
                 fig: the plotly figure
+                export_key (tuple): data version and dashboard settings the export depends on
 
 
 
@@ -62,51 +74,46 @@ def render_dashboard():
                     x_axis,
                     y_axis,
                     fig,
+                    export_key,
                 )
 
             """
-            with helpers.timer('Preparing download data'):
-                cols_to_include = ['name', 'affiliate', 'region', 'team', 'gender', x_axis, y_axis]
-                filtered_df = df[cols_to_include].copy()
-
-                # captilize
-                filtered_df.columns = [col.capitalize() for col in filtered_df.columns]
-
-                # convert to int
-                for col in filtered_df.columns:
-                    if filtered_df[col].dtype == 'float64':
-                        filtered_df[col] = filtered_df[col].astype(int)
-
-                zip_buffer = io.BytesIO()
-
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-
-                # image
-                img_buffer = io.BytesIO()
-                fig.write_image(img_buffer, format='png', width=1000, height=800)
-
-                with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                    csv = filtered_df.to_csv(index=False)
-                    zip_file.writestr('crossfit_data.csv', csv)
-
-                    metadata = f"""
-    Generated at: {timestamp}
-    X Axis: {x_axis}
-    Y Axis: {y_axis}
-    Trendline: {trendline_options.get(trendline)}
-    Records: {len(filtered_df)}
-    Columns: {', '.join(filtered_df.columns)}
-    """
-
-                    zip_file.writestr('metadata.txt', metadata)
-                    zip_file.writestr('scatter.png', img_buffer.getvalue())
-
-            st.download_button(
-                label='Download Data',
-                data=zip_buffer.getvalue(),
-                file_name=f'crossfit_data_{timestamp}.zip',
-                mime='application/zip',
+            export_formats = {
+                'zip': 'CSV and plot (zip)',
+                'parquet': 'Parquet',
+                'feather': 'Feather',
+            }
+            export_format = st.radio(
+                'Format',
+                options=export_formats.keys(),
+                format_func=export_formats.get,
+                horizontal=True,
+                key='export_format',
             )
+            export_request = export_key + (export_format,)
+            if st.session_state.get('export_request') != export_request:
+                if st.button('Prepare Download'):
+                    st.session_state.export_request = export_request
+                    st.rerun(scope='fragment')
+                return
+
+            with st.spinner('Preparing download...'):
+                if export_format == 'zip':
+                    export_path = export.build_zip(
+                        export_key, df, x_axis, y_axis, fig, trendline_options.get(trendline)
+                    )
+                else:
+                    export_path = export.build_columnar(
+                        export_key, df, x_axis, y_axis, export_format
+                    )
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            with open(export_path, 'rb') as export_file:
+                st.download_button(
+                    label='Download Data',
+                    data=export_file,
+                    file_name=f'crossfit_data_{timestamp}.{export_format}',
+                    mime=export.MEDIA_TYPES[export_format],
+                )
 
         with st.sidebar:
             st.subheader('Options')
@@ -219,10 +226,49 @@ def render_dashboard():
 
         scatter_tab, stabs_tab = st.tabs(['Scatter', 'Stats'])
         with scatter_tab:
-            fig = generate_scatter_plot(df=df, x_axis=x_axis, y_axis=y_axis, trendline=trendline)
-            download_data(df=df, x_axis=x_axis, y_axis=y_axis, fig=fig)
-
-            st.plotly_chart(fig)
+            render_mode = scatter_render_mode(len(df))
+            fig = generate_scatter_plot(
+                df=df, x_axis=x_axis, y_axis=y_axis, trendline=trendline, render_mode=render_mode
+            )
+            export_key = (
+                data_version,
+                x_axis,
+                y_axis,
+                trendline,
+                sample_size,
+                x_threshold,
+                y_threshold,
+                (x_std_slider, y_std_slider),
+            )
+            download_data(df=df, x_axis=x_axis, y_axis=y_axis, fig=fig, export_key=export_key)
+
+            event = st.plotly_chart(fig, on_select='rerun', selection_mode='points', key='scatter')
+            if render_mode != 'svg':
+                # details aren't embedded per point at this size; look up the clicked athlete
+                points = event.selection.points if event else []
+                if points:
+                    nearest = nearest_point(df, x_axis, y_axis, points[0]['x'], points[0]['y'])
+                    athlete_id = int(nearest['athlete_id'])
+                    try:
+                        athlete = load_athlete(athlete_id)
+                    except requests.RequestException as e:
+                        st.warning(f'⚠️ Unable to load athlete {athlete_id}: {str(e)}')
+                    else:
+                        # athlete fields are user input, escape them before rendering as HTML
+                        details = [
+                            html.escape(str(athlete.get(field)))
+                            for field in ('region', 'affiliate', 'team', 'gender')
+                            if athlete.get(field)
+                        ]
+                        st.markdown(
+                            f'**[{html.escape(athlete["name"])}](/profile?athlete_id={athlete_id})**'
+                            f' ({helpers.format_value(nearest[x_axis], x_axis)},'
+                            f' {helpers.format_value(nearest[y_axis], y_axis)})'
+                            f'<br/>{" · ".join(details)}',
+                            unsafe_allow_html=True,
+                        )
+                else:
+                    st.caption('Click the plot to see the nearest athlete.')
             if st.checkbox('Show Statistics'):
                 st.subheader('Averages')
                 st.markdown(
@@ -323,6 +369,9 @@ def render_dashboard():
                 )
 
             if st.toggle('Raw Data'):
+                # AgGrid is only needed here, so its import is deferred until first use
+                from st_aggrid import AgGrid, GridOptionsBuilder
+
                 gender_options = df['gender'].unique().tolist()
                 selected_genders = st.multiselect('Gender', options=gender_options)
                 df = df[df['gender'].isin(selected_genders)] if selected_genders else df
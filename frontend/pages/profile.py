@@ -20,12 +20,13 @@ def render_profile():
 
     """
     import traceback
+    from itertools import chain, zip_longest
 
     import requests
     import streamlit as st
-    from src import api
-    from src.plot import load_athlete, load_data
-    from utils import helpers
+    from src import api, prefetch
+    from src.plot import load_athlete, load_navigation
+    from utils import constants, helpers
 
     # Load custom CSS (same as main page)
     with open('style.css') as f:
@@ -35,15 +36,6 @@ def render_profile():
 
     st.title('🏋️ Athlete Profile')
 
-    # Load all athlete IDs for navigation
-    try:
-        df = load_data()
-        athlete_ids = sorted(df['athlete_id'].dropna().astype(int).tolist())
-    except Exception as e:
-        traceback.print_exc()
-        st.error(f'❌ Unable to load athlete IDs: {str(e)}')
-        return
-
     # Check URL parameter
     athlete_id_param = helpers.get_url_param('athlete_id', None)
     if athlete_id_param:
@@ -52,61 +44,68 @@ def render_profile():
         except ValueError:
             st.error('❌ Invalid athlete_id parameter in URL. Must be an integer.')
             return
+        st.session_state.athlete_id = athlete_id_param
 
-        if athlete_id_param not in athlete_ids:
-            st.error(f'❌ Athlete ID {athlete_id_param} not found in dataset.')
-            return
-
-    # Initialize or update session state for current index
-    if 'athlete_index' not in st.session_state:
-        # First load - initialize from URL param or default to 0
-        if athlete_id_param and athlete_id_param in athlete_ids:
-            st.session_state.athlete_index = athlete_ids.index(athlete_id_param)
+    # Look up neighbours and position of the current athlete (first athlete by default)
+    try:
+        navigation = load_navigation(
+            st.session_state.get('athlete_id'), window=constants.PREFETCH_NEIGHBOURS
+        )
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            st.error(f'❌ Athlete ID {st.session_state.get("athlete_id")} not found in dataset.')
         else:
-            st.session_state.athlete_index = 0
-    elif athlete_id_param and athlete_id_param in athlete_ids:
-        # URL param exists and differs from current - sync session state
-        current_id = athlete_ids[st.session_state.athlete_index]
-        if current_id != athlete_id_param:
-            st.session_state.athlete_index = athlete_ids.index(athlete_id_param)
+            st.error(f'❌ Unable to load athlete navigation: {str(e)}')
+        st.session_state.pop('athlete_id', None)
+        return
+    except Exception as e:
+        traceback.print_exc()
+        st.error(f'❌ Unable to load athlete navigation: {str(e)}')
+        return
+    st.session_state.athlete_id = navigation['athlete_id']
 
     # Navigation buttons
     col1, col2, col3 = st.columns([1, 2, 1])
 
     with col1:
         if st.button(
-            '⬅️ Previous', use_container_width=True, disabled=st.session_state.athlete_index == 0
+            '⬅️ Previous', use_container_width=True, disabled=navigation['previous_id'] is None
         ):
-            st.session_state.athlete_index -= 1
-            st.query_params.update({'athlete_id': athlete_ids[st.session_state.athlete_index]})
+            st.session_state.athlete_id = navigation['previous_id']
+            st.query_params.update({'athlete_id': navigation['previous_id']})
             st.rerun()
 
     with col2:
-        current_athlete_id = athlete_ids[st.session_state.athlete_index]
+        current_athlete_id = navigation['athlete_id']
         st.markdown(
             f"<div style='text-align: center; padding: 8px;'>"
-            f'<strong>Athlete {st.session_state.athlete_index + 1} of {len(athlete_ids)}</strong>'
+            f'<strong>Athlete {navigation["position"]} of {navigation["total"]}</strong>'
             f'<br/>ID: {current_athlete_id}'
             f'</div>',
             unsafe_allow_html=True,
         )
 
     with col3:
-        if st.button(
-            'Next ➡️',
-            use_container_width=True,
-            disabled=st.session_state.athlete_index >= len(athlete_ids) - 1,
-        ):
-            st.session_state.athlete_index += 1
-            st.query_params.update({'athlete_id': athlete_ids[st.session_state.athlete_index]})
+        if st.button('Next ➡️', use_container_width=True, disabled=navigation['next_id'] is None):
+            st.session_state.athlete_id = navigation['next_id']
+            st.query_params.update({'athlete_id': navigation['next_id']})
             st.rerun()
 
     athlete_id = current_athlete_id
 
     # Load and display athlete data
     try:
-        with st.spinner('Loading athlete data...'):
-            athlete = load_athlete(athlete_id)
+        if 'profile_cache' not in st.session_state:
+            st.session_state.profile_cache = prefetch.ProfileCache()
+        profile_cache = st.session_state.profile_cache
+        profile_cache.touch()
+
+        # render from the prefetched profiles when possible
+        athlete = profile_cache.get(athlete_id)
+        if athlete is None:
+            with st.spinner('Loading athlete data...'):
+                athlete = load_athlete(athlete_id)
+            profile_cache.put(athlete_id, athlete)
 
         # Personal Information Section
         st.markdown('---')
@@ -321,6 +320,15 @@ def render_profile():
                 except Exception as e:
                     st.error(helpers.generate_error_message('unexpected', e))
 
+        # fetch the neighbours in the background once this profile has rendered, so they do not
+        # compete with it for the backend, nearest first
+        neighbours = chain.from_iterable(
+            zip_longest(navigation['next_ids'], navigation['previous_ids'])
+        )
+        prefetch.prefetch(
+            profile_cache, [i for i in neighbours if i is not None], load=load_athlete
+        )
+
     except requests.HTTPError as e:
         if hasattr(e, 'response') and e.response is not None:
             if e.response.status_code == 404:
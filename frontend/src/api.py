@@ -1,5 +1,5 @@
-import requests
-from utils import constants, helpers
+from src import client
+from utils import helpers
 
 
 def predict_run5k(
@@ -33,6 +33,7 @@ def predict_run5k(
     Raises:
         requests.HTTPError: If the API request fails (4xx, 5xx status codes).
         requests.ConnectionError: If unable to connect to the backend server.
+        requests.Timeout: If the backend does not answer within the configured timeouts.
         KeyError: If the response doesn't contain the expected 'predicted_run5k_time' key.
 
     """
@@ -47,7 +48,7 @@ def predict_run5k(
             'pullups': pullups,
             'weight': weight,
         }
-        res = requests.get(f'{constants.BACKEND_URL}/api/predict/run5k', params=params)
+        res = client.get('/api/predict/run5k', params=params)
         res.raise_for_status()
         response_data = res.json()
 
@@ -0,0 +1,82 @@
+"""Shared HTTP client for calls to the backend API.
+
+This module keeps one process-wide requests Session so every Streamlit session
+reuses pooled keep-alive connections. Every call gets connect/read timeouts,
+idempotent GETs are retried with exponential backoff, and each call is timed
+with helpers.timer.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils import constants, helpers
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _create_session() -> requests.Session:
+    """Create a session with a pooled, retrying adapter.
+
+    Retries cover connection errors, read errors and 502/503/504 responses, and only
+    for GET requests, so a non-idempotent call is never sent twice.
+
+    Returns:
+        requests.Session: The configured session.
+
+    """
+    retry = Retry(
+        total=constants.HTTP_RETRIES,
+        backoff_factor=constants.HTTP_RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({'GET'}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=constants.HTTP_POOL_SIZE,
+        pool_maxsize=constants.HTTP_POOL_SIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Get the process-wide session, creating it on first use.
+
+    Returns:
+        requests.Session: The shared session.
+
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def get(path: str, params: dict | None = None, timeout: tuple[float, float] | None = None):
+    """Send a GET request to the backend.
+
+    Args:
+        path (str): Path relative to BACKEND_URL, e.g. '/api/athletes'.
+        params (dict | None): Query parameters. Defaults to None.
+        timeout (tuple[float, float] | None): Connect and read timeouts in seconds.
+            Defaults to HTTP_CONNECT_TIMEOUT and HTTP_READ_TIMEOUT.
+
+    Returns:
+        requests.Response: The response, after retries.
+
+    Raises:
+        requests.ConnectionError: If the backend cannot be reached after retries.
+        requests.Timeout: If connecting or reading takes longer than the timeout.
+
+    """
+    timeout = timeout or (constants.HTTP_CONNECT_TIMEOUT, constants.HTTP_READ_TIMEOUT)
+    with helpers.timer(f'GET {path}'):
+        return get_session().get(f'{constants.BACKEND_URL}{path}', params=params, timeout=timeout)
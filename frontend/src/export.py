@@ -0,0 +1,183 @@
+"""Download exports for the dashboard.
+
+This module builds the zip of filtered athlete data, metadata and the scatter
+plot PNG, and Parquet/Feather files of the filtered data. Exports are written
+to disk only when requested, streamed entry by entry into the archive, and
+reused for the same data version and dashboard settings until
+DATA_CACHE_TTL_SECONDS have passed.
+"""
+
+import hashlib
+import io
+import os
+import threading
+import time
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+from utils import constants, helpers
+
+CSV_CHUNK_ROWS = 10_000
+EXPORT_COLUMNS = ['name', 'affiliate', 'region', 'team', 'gender']
+MEDIA_TYPES = {
+    'zip': 'application/zip',
+    'parquet': 'application/vnd.apache.parquet',
+    'feather': 'application/vnd.apache.arrow.file',
+}
+
+
+def _export_path(key: tuple, suffix: str) -> str:
+    """Get the file an export for the given key is stored in.
+
+    Args:
+        key (tuple): Data version and dashboard settings the export depends on.
+        suffix (str): File suffix, e.g. '.zip'.
+
+    Returns:
+        str: Path inside EXPORT_DIR.
+
+    """
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()
+    return os.path.join(constants.EXPORT_DIR, f'{digest}{suffix}')
+
+
+def _remove_stale_exports():
+    """Delete exports older than DATA_CACHE_TTL_SECONDS."""
+    cutoff = time.time() - constants.DATA_CACHE_TTL_SECONDS
+    for entry in os.scandir(constants.EXPORT_DIR):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            # removed by another session
+            pass
+
+
+def _cached_export(key: tuple, suffix: str, write) -> str:
+    """Return the cached export for key, writing it with write(path) on a miss.
+
+    Exports are written to a private temporary file and renamed into place, so
+    concurrent sessions never see a partial file.
+
+    Args:
+        key (tuple): Data version and dashboard settings the export depends on.
+        suffix (str): File suffix, e.g. '.zip'.
+        write (Callable[[str], None]): Function writing the export to a path.
+
+    Returns:
+        str: Path of the export.
+
+    """
+    path = _export_path(key, suffix)
+    cutoff = time.time() - constants.DATA_CACHE_TTL_SECONDS
+    if os.path.exists(path) and os.path.getmtime(path) >= cutoff:
+        return path
+
+    os.makedirs(constants.EXPORT_DIR, exist_ok=True)
+    _remove_stale_exports()
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def format_export_data(df: pd.DataFrame, x_axis: str, y_axis: str) -> pd.DataFrame:
+    """Select and format the columns included in a data export.
+
+    Args:
+        df (pd.DataFrame): The filtered athlete data.
+        x_axis (str): The x axis column name.
+        y_axis (str): The y axis column name.
+
+    Returns:
+        pd.DataFrame: Athlete details and both axes, with capitalized column names and
+            float columns converted to int.
+
+    """
+    export_df = df[EXPORT_COLUMNS + [x_axis, y_axis]]
+
+    # captilize
+    export_df = export_df.rename(columns=str.capitalize)
+
+    # convert to int
+    return export_df.astype(dict.fromkeys(export_df.select_dtypes('float64').columns, int))
+
+
+def build_zip(key: tuple, df: pd.DataFrame, x_axis: str, y_axis: str, fig, trendline: str) -> str:
+    """Build the zip export of the filtered data and the scatter plot, or reuse a cached one.
+
+    The CSV is written in chunks and the PNG rendered straight into the archive, so
+    neither the CSV text nor the whole archive is held in memory.
+
+    Args:
+        key (tuple): Data version and dashboard settings the export depends on.
+        df (pd.DataFrame): The filtered athlete data.
+        x_axis (str): The x axis column name.
+        y_axis (str): The y axis column name.
+        fig: The plotly scatter plot figure.
+        trendline (str): Display name of the trendline.
+
+    Returns:
+        str: Path of the zip file.
+
+    """
+
+    def write(path: str):
+        export_df = format_export_data(df, x_axis, y_axis)
+        metadata = f"""
+    Generated at: {datetime.now().strftime('%Y%m%d_%H%M%S')}
+    X Axis: {x_axis}
+    Y Axis: {y_axis}
+    Trendline: {trendline}
+    Records: {len(export_df)}
+    Columns: {', '.join(export_df.columns)}
+    """
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            with zip_file.open('crossfit_data.csv', 'w') as raw:
+                with io.TextIOWrapper(raw, encoding='utf-8', newline='') as csv_file:
+                    export_df.to_csv(csv_file, index=False, chunksize=CSV_CHUNK_ROWS)
+            zip_file.writestr('metadata.txt', metadata)
+            with zip_file.open('scatter.png', 'w') as png_file:
+                fig.write_image(png_file, format='png', width=1000, height=800)
+
+    with helpers.timer('Preparing download data'):
+        return _cached_export(key, '.zip', write)
+
+
+def build_columnar(key: tuple, df: pd.DataFrame, x_axis: str, y_axis: str, file_format: str) -> str:
+    """Build a Parquet or Feather export of the filtered data, or reuse a cached one.
+
+    The data goes through a single Arrow table conversion and keeps its column
+    types, so missing values stay null and measurements are not rounded to int.
+
+    Args:
+        key (tuple): Data version and dashboard settings the export depends on.
+        df (pd.DataFrame): The filtered athlete data.
+        x_axis (str): The x axis column name.
+        y_axis (str): The y axis column name.
+        file_format (str): 'parquet' or 'feather'.
+
+    Returns:
+        str: Path of the export file.
+
+    """
+    # pyarrow is only imported once a columnar export is requested
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    writers = {'parquet': pq.write_table, 'feather': feather.write_feather}
+
+    def write(path: str):
+        columns = EXPORT_COLUMNS + [x_axis, y_axis]
+        table = pa.Table.from_pandas(df[columns], preserve_index=False)
+        table = table.rename_columns([col.capitalize() for col in columns])
+        writers[file_format](table, path)
+
+    with helpers.timer(f'Preparing {file_format} download'):
+        return _cached_export(key, f'.{file_format}', write)
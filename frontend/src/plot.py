@@ -4,11 +4,17 @@ This module provides functions for loading, cleaning, and visualizing
 athlete performance data using Plotly and Pandas.
 """
 
+import time
+
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 import requests
 import streamlit as st
+from src import client
 from utils import constants, helpers
+from utils.logger import logger
 
 
 def calculate_stats(df, column):
@@ -27,11 +33,55 @@ def calculate_stats(df, column):
     return mean, std
 
 
-@st.cache_data
+@st.cache_data(ttl=constants.DATA_VERSION_CHECK_SECONDS, show_spinner=False)
+def load_data_version() -> str | None:
+    """Load the version of the athlete data from the backend API.
+
+    The result is cached for DATA_VERSION_CHECK_SECONDS, so the backend is asked at
+    most once per interval no matter how many sessions are rerunning.
+
+    Returns:
+        str | None: The data version, or None if the backend could not be asked.
+
+    """
+    try:
+        res = client.get('/api/athletes/version', timeout=(constants.HTTP_CONNECT_TIMEOUT, 5))
+        res.raise_for_status()
+        return res.json()['version']
+    except requests.RequestException as e:
+        logger.debug(f'Athlete data version check failed: {e}')
+        return None
+
+
+@st.cache_data(ttl=constants.DATA_CACHE_TTL_SECONDS, max_entries=2, show_spinner=False)
+def _load_data(version: str | None) -> tuple[pd.DataFrame, float]:
+    """Fetch athlete data for a data version.
+
+    Args:
+        version (str | None): Data version the result is cached under.
+
+    Returns:
+        tuple[pd.DataFrame, float]: The athlete data and the time it was fetched.
+
+    Raises:
+        requests.RequestException: If the API request fails.
+
+    """
+    with helpers.timer(f'Loading athlete data version {version} from API'):
+        res = client.get('/api/athletes')
+        res.raise_for_status()
+        data = res.json()
+        df = pd.DataFrame(data=data['athletes'], columns=data['columns'])
+    return df, time.time()
+
+
 def load_data() -> pd.DataFrame:
     """Load athlete data from the backend API.
 
     Fetches athlete data from the backend service and converts it to a DataFrame.
+    The data is cached per data version, so it is only refetched after athletes are
+    added or predictions change. DATA_CACHE_TTL_SECONDS bounds the age of cached data
+    when the version cannot be checked.
 
     Returns:
         pd.DataFrame: DataFrame containing athlete data with all columns.
@@ -40,10 +90,11 @@ def load_data() -> pd.DataFrame:
         requests.RequestException: If the API request fails.
 
     """
-    with helpers.timer('Loading athlete data from API'):
-        res = requests.get(f'{constants.BACKEND_URL}/api/athletes')
-        data = res.json()
-        df = pd.DataFrame(data=data['athletes'], columns=data['columns'])
+    version = load_data_version()
+    df, loaded_at = _load_data(version)
+    logger.debug(f'Athlete data version {version}, cache age {time.time() - loaded_at:.1f}s')
+    # identifies this exact data for caches downstream, e.g. clean_data
+    df.attrs['data_version'] = (version, loaded_at)
     return df
 
 
@@ -64,13 +115,87 @@ def load_athlete(athlete_id: int) -> dict:
 
     """
     with helpers.timer(f'Loading athlete {athlete_id}'):
-        res = requests.get(f'{constants.BACKEND_URL}/api/athlete/{athlete_id}')
+        res = client.get(f'/api/athlete/{athlete_id}')
         res.raise_for_status()
         athlete_data = res.json()
     return athlete_data
 
 
-def clean_data(
+def load_navigation(athlete_id: int | None = None, window: int = 1) -> dict:
+    """Load an athlete's previous/next ids and position from the backend API.
+
+    Args:
+        athlete_id (int | None): The athlete to locate. Defaults to the first athlete.
+        window (int): Number of neighbour ids to return on each side. Defaults to 1.
+
+    Returns:
+        dict: Dictionary with athlete_id, previous_id, next_id, previous_ids, next_ids,
+            position and total.
+
+    Raises:
+        requests.RequestException: If the API request fails.
+        requests.HTTPError: If athlete not found (404).
+
+    """
+    params = {'window': window}
+    if athlete_id is not None:
+        params['athlete_id'] = athlete_id
+    res = client.get('/api/athletes/navigation', params=params)
+    res.raise_for_status()
+    return res.json()
+
+
+def _strata(df: pd.DataFrame) -> list[pd.Series]:
+    """Get the gender and age-decade stratum keys of every row.
+
+    Args:
+        df (pd.DataFrame): The dataframe to stratify.
+
+    Returns:
+        list[pd.Series]: Group keys, with missing values as their own stratum.
+
+    """
+    strata = [pd.Series(0, index=df.index)]
+    if 'gender' in df:
+        strata.append(df['gender'].fillna('unknown'))
+    if 'age' in df:
+        strata.append((df['age'] // 10).fillna(-1))
+    return strata
+
+
+def _stratified_sample(df: pd.DataFrame, sample_size: int) -> pd.DataFrame:
+    """Draw a seeded sample with the same gender and age-decade mix as df.
+
+    Every stratum keeps its share of sample_size, rounded, taking the athletes with
+    the lowest seeded multiplicative hash of athlete_id. The backend export samples
+    with the same rule, so the same seed exports the athletes plotted here. Rows
+    keep their original order.
+
+    Args:
+        df (pd.DataFrame): The dataframe to sample.
+        sample_size (int): Target number of rows.
+
+    Returns:
+        pd.DataFrame: df itself if it has at most sample_size rows, otherwise the sample.
+
+    """
+    if len(df) <= sample_size:
+        return df
+    ids = df['athlete_id'] if 'athlete_id' in df else pd.Series(df.index, index=df.index)
+    ids = ids.astype('int64')
+    hashed = (ids + constants.SAMPLE_SEED) * constants.SAMPLE_HASH_MULTIPLIER
+    ranked = df.loc[
+        pd.DataFrame({'hash': hashed % constants.SAMPLE_HASH_MODULUS, 'id': ids})
+        .sort_values(['hash', 'id'], kind='stable')
+        .index
+    ]
+    groups = ranked.groupby(_strata(ranked))
+    stratum_rows = groups[ranked.columns[0]].transform('size')
+    keep = groups.cumcount() < np.floor(stratum_rows * sample_size / len(df) + 0.5)
+    return ranked[keep].sort_index(kind='stable')
+
+
+def _clean_data(
     df: pd.DataFrame,
     sample_size: int,
     x_axis: str,
@@ -78,11 +203,8 @@ def clean_data(
     x_thresholds: tuple[int, int],
     y_thresholds: tuple[int, int],
     standard_deviations: tuple[int, int],
-) -> pd.DataFrame:
-    """Clean and filter athlete data based on thresholds and outliers.
-
-    Filters the dataframe by removing null values, applying threshold bounds,
-    limiting sample size, and optionally removing statistical outliers.
+):
+    """Clean and filter athlete data without caching. See clean_data.
 
     Args:
         df (pd.DataFrame): The dataframe containing athlete data.
@@ -91,15 +213,10 @@ def clean_data(
         y_axis (str): Column name for y-axis metric.
         x_thresholds (tuple[int, int]): Lower and upper bounds for x-axis values.
         y_thresholds (tuple[int, int]): Lower and upper bounds for y-axis values.
-        standard_deviations (tuple[int, int]): Standard deviation multipliers for outlier removal (0 to disable).
+        standard_deviations (tuple[int, int]): Outlier standard deviation multipliers.
 
     Returns:
-        tuple: A tuple containing:
-            - filtered_df (pd.DataFrame): The cleaned and filtered dataframe
-            - (x_mean, x_std): Mean and standard deviation for x-axis
-            - (y_mean, y_std): Mean and standard deviation for y-axis
-            - (x_lower, x_upper): Applied lower and upper bounds for x-axis
-            - (y_lower, y_upper): Applied lower and upper bounds for y-axis
+        tuple: Same as clean_data.
 
     """
     with helpers.timer('Data cleaning'):
@@ -110,7 +227,7 @@ def clean_data(
             & (filtered_df[x_axis] >= x_thresholds[0])
             & (filtered_df[y_axis] >= y_thresholds[0])
         ]
-        filtered_df = filtered_df.head(sample_size)
+        filtered_df = _stratified_sample(filtered_df, sample_size)
 
         x_mean, x_std = calculate_stats(filtered_df, x_axis)
         y_mean, y_std = calculate_stats(filtered_df, y_axis)
@@ -134,40 +251,204 @@ def clean_data(
         else:
             y_lower, y_upper = y_thresholds[0], y_thresholds[1]
 
+    filtered_df.attrs = {}
     return (filtered_df, (x_mean, x_std), (y_mean, y_std), (x_lower, x_upper), (y_lower, y_upper))
 
 
+@st.cache_data(
+    ttl=constants.DATA_CACHE_TTL_SECONDS,
+    max_entries=constants.CLEAN_DATA_CACHE_ENTRIES,
+    show_spinner=False,
+)
+def _clean_data_cached(
+    data_version: tuple,
+    sample_size: int,
+    x_axis: str,
+    y_axis: str,
+    x_thresholds: tuple[int, int],
+    y_thresholds: tuple[int, int],
+    standard_deviations: tuple[int, int],
+    _df: pd.DataFrame,
+):
+    """Clean athlete data, cached by data version instead of hashing the dataframe.
+
+    Args:
+        data_version (tuple): Data version and fetch time identifying _df.
+        sample_size (int): Maximum number of samples to include.
+        x_axis (str): Column name for x-axis metric.
+        y_axis (str): Column name for y-axis metric.
+        x_thresholds (tuple[int, int]): Lower and upper bounds for x-axis values.
+        y_thresholds (tuple[int, int]): Lower and upper bounds for y-axis values.
+        standard_deviations (tuple[int, int]): Outlier standard deviation multipliers.
+        _df (pd.DataFrame): The athlete data. Excluded from the cache key.
+
+    Returns:
+        tuple: Same as clean_data.
+
+    """
+    return _clean_data(
+        _df, sample_size, x_axis, y_axis, x_thresholds, y_thresholds, standard_deviations
+    )
+
+
+def clean_data(
+    df: pd.DataFrame,
+    sample_size: int,
+    x_axis: str,
+    y_axis: str,
+    x_thresholds: tuple[int, int],
+    y_thresholds: tuple[int, int],
+    standard_deviations: tuple[int, int],
+) -> pd.DataFrame:
+    """Clean and filter athlete data based on thresholds and outliers.
+
+    Filters the dataframe by removing null values, applying threshold bounds,
+    drawing a seeded sample stratified by gender and age decade, and optionally
+    removing statistical outliers.
+
+    Results for data returned by load_data are cached per data version and inputs,
+    so reruns that don't change them skip the work. Other dataframes are cleaned
+    without caching.
+
+    Args:
+        df (pd.DataFrame): The dataframe containing athlete data.
+        sample_size (int): Maximum number of samples to include.
+        x_axis (str): Column name for x-axis metric.
+        y_axis (str): Column name for y-axis metric.
+        x_thresholds (tuple[int, int]): Lower and upper bounds for x-axis values.
+        y_thresholds (tuple[int, int]): Lower and upper bounds for y-axis values.
+        standard_deviations (tuple[int, int]): Standard deviation multipliers for outlier removal (0 to disable).
+
+    Returns:
+        tuple: A tuple containing:
+            - filtered_df (pd.DataFrame): The cleaned and filtered dataframe
+            - (x_mean, x_std): Mean and standard deviation for x-axis
+            - (y_mean, y_std): Mean and standard deviation for y-axis
+            - (x_lower, x_upper): Applied lower and upper bounds for x-axis
+            - (y_lower, y_upper): Applied lower and upper bounds for y-axis
+
+    """
+    args = (sample_size, x_axis, y_axis, tuple(x_thresholds), tuple(y_thresholds))
+    args += (tuple(standard_deviations),)
+    data_version = df.attrs.get('data_version')
+    if data_version is None:
+        return _clean_data(df, *args)
+    return _clean_data_cached(data_version, *args, _df=df)
+
+
+def scatter_render_mode(n_points: int) -> str:
+    """Choose how to render a scatter plot of n_points points.
+
+    Args:
+        n_points (int): Number of points in the plot.
+
+    Returns:
+        str: 'svg' below SCATTER_WEBGL_THRESHOLD points, 'webgl' below
+            SCATTER_RASTER_THRESHOLD points, otherwise 'raster'.
+
+    """
+    if n_points < constants.SCATTER_WEBGL_THRESHOLD:
+        return 'svg'
+    if n_points < constants.SCATTER_RASTER_THRESHOLD:
+        return 'webgl'
+    return 'raster'
+
+
+def _raster_traces(df: pd.DataFrame, x_axis: str, y_axis: str) -> list:
+    """Aggregate points into a 2D histogram image plus an invisible layer for hover and selection.
+
+    The figure then carries SCATTER_RASTER_BINS² counts at most instead of one
+    marker per point. The hover layer has one transparent marker per non-empty bin,
+    so clicking the image still reports a position to look the nearest athlete up.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing athlete data.
+        x_axis (str): Column name for x-axis metric.
+        y_axis (str): Column name for y-axis metric.
+
+    Returns:
+        list: A go.Heatmap with the point counts and a go.Scattergl hover layer.
+
+    """
+    counts, x_edges, y_edges = np.histogram2d(
+        df[x_axis], df[y_axis], bins=constants.SCATTER_RASTER_BINS
+    )
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    x_index, y_index = np.nonzero(counts)
+
+    image = go.Heatmap(
+        x=x_centers,
+        y=y_centers,
+        z=np.where(counts > 0, counts, np.nan).T,
+        colorscale='Blues',
+        colorbar=dict(title='Athletes'),
+        hoverinfo='skip',
+    )
+    hover_layer = go.Scattergl(
+        x=x_centers[x_index],
+        y=y_centers[y_index],
+        customdata=counts[x_index, y_index].astype(int),
+        mode='markers',
+        marker=dict(opacity=0),
+        hovertemplate=(
+            f'{helpers.get_event_info(x_axis)}: %{{x}}<br>'
+            f'{helpers.get_event_info(y_axis)}: %{{y}}<br>'
+            'Athletes: %{customdata}<extra></extra>'
+        ),
+        showlegend=False,
+    )
+    return [image, hover_layer]
+
+
 def generate_scatter_plot(
-    df: pd.DataFrame, x_axis: str = 'weight', y_axis: str = 'deadlift', trendline: str = 'ols'
+    df: pd.DataFrame,
+    x_axis: str = 'weight',
+    y_axis: str = 'deadlift',
+    trendline: str = 'ols',
+    render_mode: str = 'svg',
 ) -> px.scatter:
     """Generate a scatter plot comparing two athlete performance metrics.
 
     Creates an interactive Plotly scatter plot with trendline showing the relationship
-    between two performance metrics. Includes hover data for athlete details.
+    between two performance metrics. In 'svg' mode athlete details are embedded as
+    hover data. Larger plots leave them out and are meant to be paired with
+    nearest_point to look up the clicked athlete: 'webgl' draws the markers with
+    WebGL and 'raster' replaces them with a server-side 2D histogram image.
 
     Args:
         df (pd.DataFrame): DataFrame containing athlete data.
         x_axis (str): Column name for x-axis metric. Defaults to 'weight'.
         y_axis (str): Column name for y-axis metric. Defaults to 'deadlift'.
         trendline (str): Type of trendline to display ('ols', 'lowess', 'expanding'). Defaults to 'ols'.
+        render_mode (str): 'svg', 'webgl' or 'raster', see scatter_render_mode. Defaults to 'svg'.
 
     Returns:
         px.scatter: Plotly scatter plot figure object.
 
     """
-    with helpers.timer(f'Generating scatter plot ({x_axis} vs {y_axis})'):
+    with helpers.timer(f'Generating {render_mode} scatter plot ({x_axis} vs {y_axis})'):
         x_axis_display = helpers.get_event_info(x_axis)
         y_axis_display = helpers.get_event_info(y_axis)
+        hover = {}
+        if render_mode == 'svg':
+            hover = dict(hover_name='name', hover_data=['region', 'affiliate', 'team', 'gender'])
         fig = px.scatter(
             df,
             x=x_axis,
             y=y_axis,
             title=f'{x_axis_display} vs {y_axis_display}',
             trendline=trendline,
-            hover_name='name',
-            hover_data=['region', 'affiliate', 'team', 'gender'],
+            render_mode='svg' if render_mode == 'svg' else 'webgl',
+            **hover,
         )
 
+        if render_mode == 'raster':
+            # keep the trendline traces, drawn on top of the image
+            fig.data = fig.data[1:]
+            fig.add_traces(_raster_traces(df, x_axis, y_axis))
+            fig.data = fig.data[-2:] + fig.data[:-2]
+
         fig.update_layout(
             xaxis_title=f'{x_axis_display} ({helpers.get_event_info(x_axis, "unit")})',
             yaxis_title=f'{y_axis_display} ({helpers.get_event_info(y_axis, "unit")})',
@@ -180,6 +461,31 @@ def generate_scatter_plot(
     return fig
 
 
+def nearest_point(df: pd.DataFrame, x_axis: str, y_axis: str, x: float, y: float):
+    """Find the athlete closest to a position in a scatter plot.
+
+    Distances are measured with both axes scaled to their value range, matching
+    what is visually nearest in the plot.
+
+    Args:
+        df (pd.DataFrame): DataFrame containing athlete data.
+        x_axis (str): Column name for x-axis metric.
+        y_axis (str): Column name for y-axis metric.
+        x (float): Position on the x-axis.
+        y (float): Position on the y-axis.
+
+    Returns:
+        pd.Series | None: The nearest athlete's row, or None if df is empty.
+
+    """
+    if df.empty:
+        return None
+    x_range = (df[x_axis].max() - df[x_axis].min()) or 1
+    y_range = (df[y_axis].max() - df[y_axis].min()) or 1
+    distance = ((df[x_axis] - x) / x_range) ** 2 + ((df[y_axis] - y) / y_range) ** 2
+    return df.loc[distance.idxmin()]
+
+
 def generate_histogram(df: pd.DataFrame, column: str, mean, std, num_std=5):
     """Generate a histogram with mean and standard deviation lines.
 
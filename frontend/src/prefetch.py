@@ -0,0 +1,151 @@
+"""Background prefetching of athlete profiles.
+
+This module keeps a small per-session LRU of athlete profiles and fills it from
+a process-wide thread pool, so paging through profiles renders from memory
+instead of waiting on the backend. Queued prefetches are dropped once the
+session has been idle for PREFETCH_IDLE_SECONDS.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import constants
+from utils.logger import logger
+
+_executor = ThreadPoolExecutor(
+    max_workers=constants.PREFETCH_WORKERS, thread_name_prefix='profile-prefetch'
+)
+
+
+class ProfileCache:
+    """Thread-safe LRU of athlete profiles for one Streamlit session.
+
+    Attributes:
+        capacity (int): Maximum number of profiles kept.
+        last_active (float): time.monotonic() of the session's last interaction.
+
+    """
+
+    def __init__(self, capacity: int = constants.PREFETCH_CACHE_SIZE):
+        """Initialize an empty cache.
+
+        Args:
+            capacity (int): Maximum number of profiles kept. Defaults to PREFETCH_CACHE_SIZE.
+
+        """
+        self.capacity = capacity
+        self.last_active = time.monotonic()
+        self._profiles = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def touch(self):
+        """Record an interaction, keeping background prefetching alive."""
+        self.last_active = time.monotonic()
+
+    def is_idle(self) -> bool:
+        """Check whether the session has been idle for longer than PREFETCH_IDLE_SECONDS.
+
+        Returns:
+            bool: True if no interaction was recorded recently.
+
+        """
+        return time.monotonic() - self.last_active > constants.PREFETCH_IDLE_SECONDS
+
+    def get(self, athlete_id: int) -> dict | None:
+        """Get a cached profile, marking it as recently used.
+
+        Args:
+            athlete_id (int): The athlete to look up.
+
+        Returns:
+            dict | None: The athlete data, or None if not cached.
+
+        """
+        with self._lock:
+            profile = self._profiles.get(athlete_id)
+            if profile is not None:
+                self._profiles.move_to_end(athlete_id)
+            return profile
+
+    def put(self, athlete_id: int, profile: dict):
+        """Store a profile, evicting the least recently used one when full.
+
+        Args:
+            athlete_id (int): The athlete the profile belongs to.
+            profile (dict): The athlete data.
+
+        """
+        with self._lock:
+            self._profiles[athlete_id] = profile
+            self._profiles.move_to_end(athlete_id)
+            while len(self._profiles) > self.capacity:
+                self._profiles.popitem(last=False)
+
+    def _claim(self, athlete_id: int) -> bool:
+        """Mark a profile as being fetched unless it is cached or already in flight.
+
+        Args:
+            athlete_id (int): The athlete to fetch.
+
+        Returns:
+            bool: True if the caller should fetch the profile.
+
+        """
+        with self._lock:
+            if athlete_id in self._profiles or athlete_id in self._pending:
+                return False
+            self._pending.add(athlete_id)
+            return True
+
+    def _release(self, athlete_id: int):
+        """Clear the in-flight mark of a profile.
+
+        Args:
+            athlete_id (int): The athlete that was fetched.
+
+        """
+        with self._lock:
+            self._pending.discard(athlete_id)
+
+
+def _fetch(cache: ProfileCache, athlete_id: int, load):
+    """Fetch one profile into the cache unless the session went idle meanwhile.
+
+    Args:
+        cache (ProfileCache): The session's cache.
+        athlete_id (int): The athlete to fetch.
+        load (Callable[[int], dict]): Function loading an athlete from the backend.
+
+    """
+    try:
+        if cache.is_idle():
+            return
+        cache.put(athlete_id, load(athlete_id))
+    except Exception as e:
+        # prefetching is best effort; the page loads the profile itself on a miss
+        logger.debug(f'Prefetching athlete {athlete_id} failed: {e}')
+    finally:
+        cache._release(athlete_id)
+
+
+def prefetch(cache: ProfileCache, athlete_ids: list[int], load):
+    """Queue background fetches of the given profiles, nearest first.
+
+    Profiles already cached or in flight are skipped. Nothing is queued while the
+    session is idle. The load function runs on worker threads, so it must not call
+    Streamlit APIs.
+
+    Args:
+        cache (ProfileCache): The session's cache.
+        athlete_ids (list[int]): Athletes to prefetch, in priority order.
+        load (Callable[[int], dict]): Function loading an athlete from the backend.
+
+    """
+    if cache.is_idle():
+        return
+    for athlete_id in athlete_ids:
+        if cache._claim(athlete_id):
+            _executor.submit(_fetch, cache, athlete_id, load)
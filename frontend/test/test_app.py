@@ -5,7 +5,29 @@ including testing different axis selections and trendline options.
 """
 
 import pytest
+import requests
 from streamlit.testing.v1 import AppTest
+from utils import constants
+
+
+def _backend_available() -> bool:
+    """Check whether the backend the dashboard loads its data from is answering.
+
+    Returns:
+        bool: True if the athletes version endpoint responds, False otherwise.
+
+    """
+    try:
+        requests.get(f'{constants.BACKEND_URL}/api/athletes/version', timeout=2)
+    except requests.RequestException:
+        return False
+    return True
+
+
+# the dashboard renders live data, so these tests need a running backend
+pytestmark = pytest.mark.skipif(
+    not _backend_available(), reason=f'backend not reachable at {constants.BACKEND_URL}'
+)
 
 metrics = [
     'age',
@@ -0,0 +1,92 @@
+"""Test suite for dashboard download exports.
+
+This module contains tests for building and reusing the zip export.
+"""
+
+import zipfile
+from unittest.mock import Mock, patch
+
+
+def test_build_zip_is_built_once_per_key(tmp_path):
+    """Test that the zip export is built on request and reused for the same settings.
+
+    Verifies that:
+    - The zip contains the CSV, metadata and scatter plot PNG
+    - A second request with the same key reuses the file without re-rendering the PNG
+    - A different key builds a new export
+    """
+    import pandas as pd
+    from src import export
+
+    df = pd.DataFrame(
+        {
+            'name': ['Jane Smith', 'John Doe'],
+            'affiliate': ['CrossFit Berlin', None],
+            'region': ['Europe', 'Asia'],
+            'team': [None, None],
+            'gender': ['Female', 'Male'],
+            'fran': [265.0, 300.0],
+            'run5k': [1380.0, 1500.0],
+        }
+    )
+    fig = Mock()
+    fig.write_image.side_effect = lambda file, **kwargs: file.write(b'png')
+    key = (('v1', 0.0), 'fran', 'run5k', 'ols', 1000)
+
+    with patch('utils.constants.EXPORT_DIR', str(tmp_path)):
+        path = export.build_zip(key, df, 'fran', 'run5k', fig, 'Ordinary Least Squares')
+        assert export.build_zip(key, df, 'fran', 'run5k', fig, 'Ordinary Least Squares') == path
+        assert fig.write_image.call_count == 1
+
+        other = export.build_zip(key + ('x',), df, 'fran', 'run5k', fig, 'Expanding')
+        assert other != path
+        assert fig.write_image.call_count == 2
+
+    with zipfile.ZipFile(path) as zip_file:
+        assert sorted(zip_file.namelist()) == ['crossfit_data.csv', 'metadata.txt', 'scatter.png']
+        csv = zip_file.read('crossfit_data.csv').decode()
+        assert csv.splitlines()[0] == 'Name,Affiliate,Region,Team,Gender,Fran,Run5k'
+        assert 'Jane Smith' in csv
+        assert zip_file.read('scatter.png') == b'png'
+
+
+def test_build_columnar_keeps_column_types(tmp_path):
+    """Test that Parquet and Feather exports keep floats and nulls instead of casting to int.
+
+    Verifies that:
+    - Both formats contain the export columns with capitalized names
+    - Float measurements and missing values survive the export
+    """
+    import pandas as pd
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    from src import export
+
+    df = pd.DataFrame(
+        {
+            'name': ['Jane Smith', 'John Doe'],
+            'affiliate': ['CrossFit Berlin', None],
+            'region': ['Europe', 'Asia'],
+            'team': [None, None],
+            'gender': ['Female', 'Male'],
+            'weight': [145.5, None],
+            'run5k': [1380.0, 1500.0],
+        }
+    )
+    key = (('v1', 0.0), 'weight', 'run5k')
+
+    with patch('utils.constants.EXPORT_DIR', str(tmp_path)):
+        parquet_path = export.build_columnar(key, df, 'weight', 'run5k', 'parquet')
+        feather_path = export.build_columnar(key, df, 'weight', 'run5k', 'feather')
+
+    for table in (pq.read_table(parquet_path), feather.read_table(feather_path)):
+        assert table.column_names == [
+            'Name',
+            'Affiliate',
+            'Region',
+            'Team',
+            'Gender',
+            'Weight',
+            'Run5k',
+        ]
+        assert table.column('Weight').to_pylist() == [145.5, None]
@@ -0,0 +1,33 @@
+"""Test suite for helper utilities.
+
+This module contains tests for formatting metric values.
+"""
+
+
+def test_format_value_seconds():
+    """Test that times are formatted as MM:SS.
+
+    Verifies that:
+    - Whole minutes and seconds are zero padded
+    - Seconds that round up to a full minute carry over into the minutes
+    """
+    from utils import helpers
+
+    assert helpers.format_value(1380, 'run5k') == '23:00'
+    assert helpers.format_value(65, 'run5k') == '1:05'
+    assert helpers.format_value(119.6, 'run5k') == '2:00'
+
+
+def test_format_value_negative_residual():
+    """Test that a negative 5K residual keeps its sign in front of MM:SS.
+
+    Verifies that:
+    - -30 seconds is formatted as -0:30, not -1:30
+    - -90 seconds is formatted as -1:30, not -2:30
+    - A positive residual has no sign
+    """
+    from utils import helpers
+
+    assert helpers.format_value(-30, 'run5k_residual') == '-0:30'
+    assert helpers.format_value(-90, 'run5k_residual') == '-1:30'
+    assert helpers.format_value(90, 'run5k_residual') == '1:30'
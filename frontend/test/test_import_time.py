@@ -0,0 +1,142 @@
+"""Import-time profiling of the frontend cold start.
+
+This module runs the frontend imports in a fresh interpreter with
+``python -X importtime``, parses the output into a per-package report and checks
+it against a budget. The packages the first render cannot do without are
+imported first, and the budget covers what the app imports on top of them, so
+it does not depend on how fast the machine loads pandas or Streamlit. Modules
+that are only needed for some interactions must not be imported at startup. Run
+it directly to print the report:
+
+.. code-block:: bash
+
+    python test/test_import_time.py
+"""
+
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+FRONTEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# what the app and its pages import before the first render
+COLD_START_MODULES = ['main', 'src.api', 'src.export', 'src.plot', 'src.prefetch', 'utils.helpers']
+# needed for the first render; their import time is the floor the app cannot go below
+REQUIRED_PACKAGES = ['streamlit', 'pandas', 'plotly.express', 'plotly.graph_objects', 'requests']
+# imported on first use only: the raw data grid, PNG export and trendlines
+LAZY_PACKAGES = ['st_aggrid', 'kaleido', 'statsmodels']
+IMPORT_TIME_BUDGET_MS = float(os.getenv('IMPORT_TIME_BUDGET_MS', '500'))
+MARKER = 'required packages imported'
+
+
+def profile_imports(
+    modules: list[str], preloaded: list[str] = REQUIRED_PACKAGES
+) -> tuple[list[tuple[str, int, int, int]], list[tuple[str, int, int, int]]]:
+    """Import modules in a fresh interpreter and parse its -X importtime output.
+
+    Args:
+        modules (list[str]): Modules to import.
+        preloaded (list[str]): Modules imported before them. Defaults to REQUIRED_PACKAGES.
+
+    Returns:
+        tuple[list, list]: Rows of (module, self µs, cumulative µs, nesting depth) for the
+            preloaded imports and for the imports the modules added, in import order.
+
+    """
+    code = (
+        f'import {", ".join(preloaded)}; import sys; sys.stderr.write("{MARKER}\\n"); '
+        f'import {", ".join(modules)}'
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=FRONTEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    required, added = [], []
+    rows = required
+    for line in result.stderr.splitlines():
+        if line == MARKER:
+            rows = added
+            continue
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix('import time:').split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return required, added
+
+
+def _total_ms(rows: list[tuple[str, int, int, int]]) -> float:
+    """Sum the cumulative import time of the top-level imports.
+
+    Args:
+        rows (list[tuple[str, int, int, int]]): Rows returned by profile_imports.
+
+    Returns:
+        float: Import time in milliseconds.
+
+    """
+    return sum(cumulative_us for _, _, cumulative_us, depth in rows if depth == 0) / 1000
+
+
+def format_report(
+    required: list[tuple[str, int, int, int]], added: list[tuple[str, int, int, int]], top: int = 15
+) -> str:
+    """Summarize import time per top-level package.
+
+    Time is attributed to the package of the module that spent it, so a slow
+    dependency shows up under its own name rather than under the app module that
+    imported it.
+
+    Args:
+        required (list[tuple[str, int, int, int]]): Preloaded rows from profile_imports.
+        added (list[tuple[str, int, int, int]]): Rows the app modules added.
+        top (int): Number of packages to list. Defaults to 15.
+
+    Returns:
+        str: Required and added import time and the slowest packages, in milliseconds.
+
+    """
+    lines = [
+        f'Required packages: {_total_ms(required):.0f} ms',
+        f'Added by the app: {_total_ms(added):.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)',
+    ]
+    for title, rows in (('Slowest required packages', required), ('Slowest added', added)):
+        packages = defaultdict(int)
+        for name, self_us, _, _ in rows:
+            packages[name.split('.')[0]] += self_us
+        lines.append(f'{title}:')
+        for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f'{self_us / 1000:8.1f} ms  {package}')
+    return '\n'.join(lines)
+
+
+def test_cold_start_import_time_within_budget():
+    """Test that the frontend's startup imports stay within the import time budget.
+
+    Verifies that:
+    - Importing the app and page dependencies adds at most IMPORT_TIME_BUDGET_MS on top
+      of REQUIRED_PACKAGES
+    - The report lists the slowest packages when the budget is exceeded
+    """
+    required, added = profile_imports(COLD_START_MODULES)
+
+    assert _total_ms(added) <= IMPORT_TIME_BUDGET_MS, format_report(required, added)
+
+
+def test_conditional_modules_load_lazily():
+    """Test that AgGrid, Kaleido and statsmodels are not imported at startup.
+
+    Verifies that:
+    - None of LAZY_PACKAGES is imported by the cold start modules
+    """
+    required, added = profile_imports(COLD_START_MODULES)
+    imported = {name.split('.')[0] for name, _, _, _ in required + added}
+
+    assert imported.isdisjoint(LAZY_PACKAGES), sorted(imported & set(LAZY_PACKAGES))
+
+
+if __name__ == '__main__':
+    print(format_report(*profile_imports(COLD_START_MODULES)))
@@ -0,0 +1,170 @@
+"""Test suite for athlete data loading.
+
+This module contains tests for the version-aware athlete data cache, the
+shared backend HTTP client, the cached data cleaning and the scatter plot
+render modes.
+"""
+
+from unittest.mock import Mock, patch
+
+
+def test_load_data_refetches_only_on_version_change():
+    """Test that athlete data is refetched only when the backend data version changes.
+
+    Verifies that:
+    - Repeated loads with the same version reuse the cached DataFrame
+    - A new version triggers exactly one new fetch
+    """
+    from src import plot
+
+    plot._load_data.clear()
+    response = Mock()
+    response.json.return_value = {
+        'athletes': [(1, 'Jane Smith')],
+        'columns': ['athlete_id', 'name'],
+    }
+
+    with patch('src.plot.load_data_version', side_effect=['v1', 'v1', 'v2']):
+        with patch('src.client.get', return_value=response) as mock_get:
+            first = plot.load_data()
+            plot.load_data()
+            assert mock_get.call_count == 1
+
+            plot.load_data()
+            assert mock_get.call_count == 2
+
+    assert first['name'].tolist() == ['Jane Smith']
+
+
+def test_client_get_uses_pooled_session_with_timeouts():
+    """Test that backend calls share one session with timeouts and GET-only retries.
+
+    Verifies that:
+    - Every call goes through the same process-wide session
+    - Calls get the configured connect/read timeouts and the backend URL prefix
+    - Retries are bounded and never resend non-idempotent requests
+    """
+    from src import client
+    from utils import constants
+
+    session = client.get_session()
+    assert client.get_session() is session
+
+    retry = session.get_adapter(constants.BACKEND_URL).max_retries
+    assert retry.total == constants.HTTP_RETRIES
+    assert retry.allowed_methods == frozenset({'GET'})
+
+    with patch.object(session, 'get') as mock_get:
+        client.get('/api/athletes', params={'page': 1})
+
+    mock_get.assert_called_once_with(
+        f'{constants.BACKEND_URL}/api/athletes',
+        params={'page': 1},
+        timeout=(constants.HTTP_CONNECT_TIMEOUT, constants.HTTP_READ_TIMEOUT),
+    )
+
+
+def test_clean_data_cached_by_version_with_stratified_sample():
+    """Test that clean_data is memoized per data version and samples every stratum.
+
+    Verifies that:
+    - A rerun with the same data version and inputs skips the cleaning work
+    - The sample is reproducible and keeps the gender mix instead of taking the newest rows
+    """
+    import pandas as pd
+    from src import plot
+
+    plot._clean_data_cached.clear()
+    df = pd.DataFrame(
+        {
+            'athlete_id': range(1000, 0, -1),
+            'gender': ['Male'] * 900 + ['Female'] * 100,
+            'age': [20 + i % 40 for i in range(1000)],
+            'fran': [200 + i % 100 for i in range(1000)],
+            'run5k': [1200 + i % 300 for i in range(1000)],
+        }
+    )
+    df.attrs['data_version'] = ('v1', 0.0)
+    args = dict(
+        sample_size=100,
+        x_axis='fran',
+        y_axis='run5k',
+        x_thresholds=(0, 1000),
+        y_thresholds=(0, 3000),
+        standard_deviations=(0, 0),
+    )
+
+    with patch('src.plot._clean_data', wraps=plot._clean_data) as mock_clean:
+        first = plot.clean_data(df=df, **args)[0]
+        second = plot.clean_data(df=df, **args)[0]
+        assert mock_clean.call_count == 1
+
+    assert first['athlete_id'].tolist() == second['athlete_id'].tolist()
+    assert 90 <= len(first) <= 110
+    assert (first['gender'] == 'Female').sum() >= 5
+    assert first['athlete_id'].tolist() != df['athlete_id'].head(len(first)).tolist()
+
+
+def test_stratified_sample_matches_backend_export():
+    """Test that the dashboard sample picks the athletes the backend export samples.
+
+    The expected ids are what the backend's export_athletes draws from the same
+    athletes with the same seed; its tests assert the same list.
+    """
+    import pandas as pd
+    from src import plot
+
+    ids = range(1, 201)
+    df = pd.DataFrame(
+        {
+            'athlete_id': ids,
+            'gender': ['Female' if i % 5 == 0 else 'Male' for i in ids],
+            'age': [20.0 + i % 40 for i in ids],
+            'fran': [float(i) for i in ids],
+            'run5k': 1500.0,
+        }
+    )
+
+    with patch.object(plot.constants, 'SAMPLE_SEED', 42):
+        sampled = plot._stratified_sample(df, 20)
+
+    export_sample = '5 18 26 39 47 52 60 73 81 94 107 115 128 136 149 162 170 183 191 196'
+    assert sorted(sampled['athlete_id']) == [
+        int(athlete_id) for athlete_id in export_sample.split()
+    ]
+    assert sampled.index.is_monotonic_increasing
+
+
+def test_large_scatter_plots_drop_per_point_hover_data():
+    """Test that large scatter plots switch to WebGL and then to a server-side raster.
+
+    Verifies that:
+    - The render mode follows the configured point thresholds
+    - Raster plots carry binned counts instead of one marker per athlete
+    - The nearest athlete to a clicked position can be looked up
+    """
+    import pandas as pd
+    from src import plot
+    from utils import constants
+
+    assert plot.scatter_render_mode(constants.SCATTER_WEBGL_THRESHOLD - 1) == 'svg'
+    assert plot.scatter_render_mode(constants.SCATTER_WEBGL_THRESHOLD) == 'webgl'
+    assert plot.scatter_render_mode(constants.SCATTER_RASTER_THRESHOLD) == 'raster'
+
+    n = 20_000
+    df = pd.DataFrame(
+        {
+            'athlete_id': range(n),
+            'name': [f'Athlete {i}' for i in range(n)],
+            'fran': [200 + i % 97 for i in range(n)],
+            'run5k': [1200 + i % 301 for i in range(n)],
+        }
+    )
+    fig = plot.generate_scatter_plot(df, 'fran', 'run5k', trendline='ols', render_mode='raster')
+    image, hover_layer = fig.data[0], fig.data[1]
+    assert image.type == 'heatmap'
+    assert len(hover_layer.x) <= constants.SCATTER_RASTER_BINS**2
+    assert sum(hover_layer.customdata) == n
+
+    nearest = plot.nearest_point(df, 'fran', 'run5k', 200, 1200)
+    assert (nearest['fran'], nearest['run5k']) == (200, 1200)
@@ -4,10 +4,12 @@ This module contains tests for the profile page functionality,
 including fetching athlete data, rendering profiles, and navigation.
 """
 
+import time
 from unittest.mock import Mock, patch
 
 import pytest
 import requests
+from utils import constants
 
 
 def test_profile_page_renders_success():
@@ -49,7 +51,7 @@ def test_profile_page_renders_success():
     }
 
     # Test fetch_athlete function
-    with patch('requests.get') as mock_get:
+    with patch('src.client.get') as mock_get:
         mock_response = Mock()
         mock_response.json.return_value = mock_athlete_data
         mock_response.raise_for_status = Mock()
@@ -117,7 +119,7 @@ def test_profile_page_fail():
                 mock_fetch.assert_not_called()
 
     # Test 3: Athlete not found (404 error)
-    with patch('requests.get') as mock_get:
+    with patch('src.client.get') as mock_get:
         mock_response = Mock()
         mock_response.status_code = 404
         mock_response.raise_for_status.side_effect = requests.HTTPError(response=mock_response)
@@ -129,7 +131,7 @@ def test_profile_page_fail():
         assert exc_info.value.response.status_code == 404
 
     # Test 4: Server error (500)
-    with patch('requests.get') as mock_get:
+    with patch('src.client.get') as mock_get:
         mock_response = Mock()
         mock_response.status_code = 500
         mock_response.raise_for_status.side_effect = requests.HTTPError(response=mock_response)
@@ -171,3 +173,84 @@ def test_profile_page_fail():
 
             # Should handle missing fields without crashing
             render_profile()
+
+
+def test_load_navigation_uses_navigation_endpoint():
+    """Test that profile navigation comes from the lightweight navigation endpoint.
+
+    Verifies that:
+    - load_navigation() requests only the neighbours of the given athlete
+    - Without an athlete_id no parameter is sent, so the backend picks the first athlete
+    - The full athletes table is never downloaded
+    """
+    from src.plot import load_navigation
+
+    navigation = {
+        'athlete_id': 2554,
+        'previous_id': 2553,
+        'next_id': 2560,
+        'position': 40,
+        'total': 100,
+    }
+    with patch('src.client.get') as mock_get:
+        mock_get.return_value.json.return_value = navigation
+
+        assert load_navigation(2554) == navigation
+        mock_get.assert_called_once_with(
+            '/api/athletes/navigation', params={'window': 1, 'athlete_id': 2554}
+        )
+
+        load_navigation()
+        mock_get.assert_called_with('/api/athletes/navigation', params={'window': 1})
+        assert all(call.args[0] != '/api/athletes' for call in mock_get.call_args_list)
+
+
+def test_prefetch_fills_session_cache_until_idle():
+    """Test background prefetching of neighbouring profiles into the session LRU.
+
+    Verifies that:
+    - Prefetched profiles are served from the cache without another request
+    - The cache evicts the least recently used profile when full
+    - Nothing is fetched once the session is idle
+    """
+    from src import prefetch
+
+    cache = prefetch.ProfileCache(capacity=2)
+    load = Mock(side_effect=lambda athlete_id: {'athlete_id': athlete_id})
+
+    prefetch.prefetch(cache, [2, 3], load=load)
+    for _ in range(100):
+        if cache.get(2) and cache.get(3):
+            break
+        time.sleep(0.01)
+    assert cache.get(3) == {'athlete_id': 3}
+    assert load.call_count == 2
+
+    cache.put(4, {'athlete_id': 4})
+    assert cache.get(2) is None
+
+    cache.last_active -= constants.PREFETCH_IDLE_SECONDS + 1
+    prefetch.prefetch(cache, [5], load=load)
+    assert load.call_count == 2
+    assert cache.get(5) is None
+
+
+def test_queued_prefetch_skips_once_session_is_idle():
+    """Test that a queued prefetch re-checks idleness when it runs.
+
+    Verifies that:
+    - A fetch queued while active does not load once the session went idle
+    - The in-flight mark is released so the profile can be fetched later
+    """
+    from src import prefetch
+
+    cache = prefetch.ProfileCache(capacity=2)
+    load = Mock(side_effect=lambda athlete_id: {'athlete_id': athlete_id})
+
+    assert cache._claim(7)
+    cache.last_active -= constants.PREFETCH_IDLE_SECONDS + 1
+    prefetch._fetch(cache, 7, load)
+
+    load.assert_not_called()
+    assert cache.get(7) is None
+    assert cache._claim(7)
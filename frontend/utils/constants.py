@@ -5,10 +5,39 @@ for all CrossFit performance metrics.
 """
 
 import os
+import tempfile
 
 BACKEND_URL = os.getenv('BACKEND_URL', 'http://127.0.0.1:5000')
 FONT_FAMILY = 'Libertinus Sans, sans-serif'
 DEBUG = os.getenv('DEBUG', 'true').lower() == 'true'
+# how often the athlete data version is checked, and the backstop lifetime of cached data
+DATA_VERSION_CHECK_SECONDS = float(os.getenv('DATA_VERSION_CHECK_SECONDS', '10'))
+DATA_CACHE_TTL_SECONDS = float(os.getenv('DATA_CACHE_TTL_SECONDS', '600'))
+# backend HTTP client: timeouts in seconds, retries apply to GET requests only
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '3'))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', '0.3'))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+# profile page: neighbours prefetched on each side, per-session cache size, shared
+# worker threads, and seconds without interaction after which prefetching stops
+PREFETCH_NEIGHBOURS = int(os.getenv('PREFETCH_NEIGHBOURS', '2'))
+PREFETCH_CACHE_SIZE = int(os.getenv('PREFETCH_CACHE_SIZE', '16'))
+PREFETCH_WORKERS = int(os.getenv('PREFETCH_WORKERS', '4'))
+PREFETCH_IDLE_SECONDS = float(os.getenv('PREFETCH_IDLE_SECONDS', '60'))
+# dashboard: cached clean_data results kept, and the seed of the stratified sample,
+# which ranks athletes by the same seeded hash as the backend export
+CLEAN_DATA_CACHE_ENTRIES = int(os.getenv('CLEAN_DATA_CACHE_ENTRIES', '16'))
+SAMPLE_SEED = int(os.getenv('SAMPLE_SEED', '42'))
+SAMPLE_HASH_MULTIPLIER = 2654435761
+SAMPLE_HASH_MODULUS = 2**32
+# scatter plot: points from which markers are drawn with WebGL, and from which they
+# are replaced by a server-side 2D histogram of SCATTER_RASTER_BINS bins per axis
+SCATTER_WEBGL_THRESHOLD = int(os.getenv('SCATTER_WEBGL_THRESHOLD', '5000'))
+SCATTER_RASTER_THRESHOLD = int(os.getenv('SCATTER_RASTER_THRESHOLD', '50000'))
+SCATTER_RASTER_BINS = int(os.getenv('SCATTER_RASTER_BINS', '200'))
+# directory for download exports, reused until DATA_CACHE_TTL_SECONDS old
+EXPORT_DIR = os.getenv('EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'crossfit-exports'))
 
 EVENT_MAPPING = {
     'athlete_id': {
@@ -107,6 +136,18 @@ EVENT_MAPPING = {
         'unit': 'seconds',
         'description': 'Time to complete 5 kilometer run',
     },
+    'predicted_run5k': {
+        'display_name': 'Predicted 5K Run',
+        'better': 'lower',
+        'unit': 'seconds',
+        'description': 'Model-predicted time to complete 5 kilometer run',
+    },
+    'run5k_residual': {
+        'display_name': '5K Run vs Predicted',
+        'better': 'lower',
+        'unit': 'seconds',
+        'description': 'Actual 5K run time minus the model-predicted time',
+    },
     'candj': {
         'display_name': 'Clean & Jerk',
         'better': 'higher',
@@ -53,7 +53,8 @@ def format_value(value: float, axis_name: str):
     """Format a numeric value based on its unit type.
 
     Formats values appropriately based on the metric's unit (seconds as MM:SS,
-    inches with quote marks, or other units with their labels).
+    inches with quote marks, or other units with their labels). Negative seconds,
+    such as a run faster than predicted, keep their sign in front, e.g. -1:30.
 
     Args:
         value (float): The numeric value to format.
@@ -65,10 +66,10 @@ def format_value(value: float, axis_name: str):
     """
     unit = get_event_info(axis_name, 'unit')
     if unit == 'seconds':
-        minute = int(value // 60)
-        second = round(value % 60)
+        sign = '-' if value < 0 else ''
+        minute, second = divmod(round(abs(value)), 60)
 
-        return f'{minute}:{second:02d}'
+        return f'{sign}{minute}:{second:02d}'
     elif unit == 'inches':
         return f'{value:.2f}"'
     else:
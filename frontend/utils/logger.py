@@ -1,6 +1,5 @@
 import logging
 
-import streamlit as st
 import utils.constants as constants
 
 logging_level = logging.DEBUG if constants.DEBUG else logging.INFO
@@ -35,9 +34,13 @@ def setup_logger(name: str, level: int = logging_level) -> logging.Logger:
     return logger
 
 
-@st.cache_resource
 def get_logger(name: str, level: int = logging_level) -> logging.Logger:
-    """Get a cached logger instance."""
+    """Get a logger instance.
+
+    logging keeps one logger per name and setup_logger only adds a handler once,
+    so repeated calls across reruns return the same configured logger.
+
+    """
     return setup_logger(name, level)
 
 